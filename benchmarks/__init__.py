@@ -0,0 +1,3 @@
+"""
+性能基准: 合成语料(corpus)、各阶段微基准(bench_stages)、端到端吞吐(bench_e2e)与结果对比(report)
+"""
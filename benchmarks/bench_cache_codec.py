@@ -0,0 +1,117 @@
+"""
+缓存key与缓存值编码基准: 对比原方案(json.dumps(sort_keys)+MD5, 每个请求计算两次; 纯JSON值)
+与当前方案(确定性序列化+blake2b, 每个请求计算一次; orjson + 超过阈值时zlib压缩)
+
+python -m benchmarks.bench_cache_codec [--redis-url redis://localhost:6379/15]
+"""
+import argparse
+import hashlib
+import json
+import random
+import timeit
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from source.services.cache_codec import canonical_digest, combine_digests, decode_value, encode_value, orjson
+from source.services.parsed_resume import ParsedResume
+
+SKILLS = ['Python', 'Java', 'Go', 'SQL', 'Docker', 'Kubernetes', 'React', 'TensorFlow', 'PyTorch', 'Redis']
+COMPANIES = ['阿里巴巴', '腾讯', '字节跳动', '百度', '美团', '京东']
+PHRASES = ['负责后端服务的设计与开发', '参与推荐系统的模型训练和上线', '主导微服务架构改造',
+           '优化数据库查询性能', '搭建持续集成流水线', '带领五人团队完成项目交付']
+
+
+def make_resume(rng: random.Random) -> Tuple[Dict[str, Any], str]:
+    experiences = [{
+        'company': rng.choice(COMPANIES),
+        'position': '高级工程师',
+        'description': '，'.join(rng.sample(PHRASES, 3))
+    } for _ in range(rng.randint(2, 4))]
+    resume_info = {
+        'basic_info': {'name': '张三', 'phone': '13800138000', 'email': 'zhangsan@example.com'},
+        'education_info': {'education_level': '硕士', 'school': '浙江大学', 'major': '计算机科学与技术'},
+        'work_experience': {'total_work_years': rng.randint(1, 12), 'work_experiences': experiences},
+        'skills': rng.sample(SKILLS, 5)
+    }
+    text = '\n'.join(
+        f"{exp['company']} {exp['position']} {exp['description']}。" * 6 for exp in experiences
+    ) + ' 技能: ' + ', '.join(resume_info['skills'])
+    return resume_info, text
+
+
+def legacy_key(data: Dict[str, Any]) -> str:
+    return hashlib.md5(json.dumps(data, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def bench(func: Callable[[], Any], number: int) -> float:
+    """
+    :return: 单次调用耗时(微秒)
+    """
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1e6
+
+
+def redis_memory(redis_url: str, entries: List[Tuple[str, Any, Any]]) -> Dict[str, Tuple[int, int]]:
+    """
+    写入Redis后读取 MEMORY USAGE
+    :return: {名称: (原方案字节, 当前方案字节)}
+    """
+    import redis
+    client = redis.Redis.from_url(redis_url)
+    usage = {}
+    for name, legacy_value, new_value in entries:
+        client.set(f"bench:legacy:{name}", legacy_value)
+        client.set(f"bench:new:{name}", new_value)
+        usage[name] = (client.memory_usage(f"bench:legacy:{name}"), client.memory_usage(f"bench:new:{name}"))
+        client.delete(f"bench:legacy:{name}", f"bench:new:{name}")
+    return usage
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark cache key and value encoding")
+    parser.add_argument('--number', type=int, default=2000)
+    parser.add_argument('--redis-url', help="measure MEMORY USAGE per entry on this Redis (use a scratch db)")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(42)
+    resume_info, text = make_resume(rng)
+    job = {'job_description': '招聘高级Python后端工程师，负责推荐系统服务开发', 'required_skills': SKILLS[:4],
+           'min_work_years': 3}
+    parsed = ParsedResume.build(text, resume_info).to_dict()
+    analysis = {
+        'basic_info': resume_info['basic_info'],
+        'skill_analysis': {'total_skills': 5, 'top_skills': resume_info['skills'], 'skill_diversity_score': 0.6},
+        'work_experience_analysis': {'total_years': 6, 'companies': COMPANIES[:3], 'experience_depth_score': 0.8}
+    }
+    n = args.number
+
+    print(f"serializer: {'orjson' if orjson is not None else 'json'}")
+    print("\n== cache key per request (get + set) ==")
+    rows = [
+        ('analysis legacy (2x json+md5)', lambda: (legacy_key(resume_info), legacy_key(resume_info))),
+        ('analysis current (1x)', lambda: canonical_digest(resume_info)),
+        ('match legacy (2x json+md5)', lambda: (legacy_key({'resume_info': resume_info, 'job_description': job}),
+                                                legacy_key({'resume_info': resume_info, 'job_description': job}))),
+        ('match current (1x)', lambda: combine_digests(canonical_digest(resume_info), canonical_digest(job))),
+    ]
+    for name, func in rows:
+        print(f"  {name:<32} {bench(func, n):>9.2f} us")
+
+    print("\n== value encode / decode / size ==")
+    entries = []
+    for name, value in (('analysis_result', analysis), ('parsed_resume', parsed)):
+        legacy_bytes = json.dumps(value).encode('utf-8')
+        new_bytes = encode_value(value)
+        entries.append((name, legacy_bytes, new_bytes))
+        print(f"  {name}")
+        print(f"    legacy  encode {bench(lambda: json.dumps(value), n):>9.2f} us  "
+              f"decode {bench(lambda: json.loads(legacy_bytes), n):>9.2f} us  size {len(legacy_bytes):>7} B")
+        print(f"    current encode {bench(lambda: encode_value(value), n):>9.2f} us  "
+              f"decode {bench(lambda: decode_value(new_bytes), n):>9.2f} us  size {len(new_bytes):>7} B")
+
+    if args.redis_url:
+        print("\n== Redis MEMORY USAGE per entry ==")
+        for name, (legacy_usage, new_usage) in redis_memory(args.redis_url, entries).items():
+            print(f"  {name:<16} legacy {legacy_usage:>7} B  current {new_usage:>7} B")
+
+
+if __name__ == "__main__":
+    main()
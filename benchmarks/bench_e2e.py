@@ -0,0 +1,138 @@
+"""
+端到端吞吐: 在进程内通过ASGI调用FastAPI应用(不经过网络),Redis/MongoDB默认使用本地替身
+(fakeredis / mongomock-motor, 仅基准需要: pip install fakeredis mongomock-motor httpx)
+mongomock-motor 与新版pymongo的bulk_write不兼容时,攒批写入计为失败,不影响请求延迟的测量
+
+python -m benchmarks.bench_e2e [--count 40] [--concurrency 8] [--output e2e.json]
+python -m benchmarks.bench_e2e --redis-url redis://localhost:6379/15 --mongo-uri mongodb://localhost:27017
+"""
+import argparse
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+from benchmarks.corpus import generate_corpus, generate_jobs, render_pdf
+from benchmarks.report import BenchReport, summarize
+
+
+def use_local_stand_ins(redis_url: Optional[str], mongo_uri: Optional[str]) -> None:
+    """
+    未指定真实服务时,为缓存服务和句向量缓存注入共享同一数据的本地替身
+    """
+    from source.services.cache_service import cache_service
+    from source.services.embedding_cache import embedding_cache
+
+    if redis_url:
+        cache_service.redis_url = embedding_cache.redis_url = redis_url
+    else:
+        import fakeredis
+        server = fakeredis.FakeServer()
+        cache_service._redis_client = fakeredis.aioredis.FakeRedis(server=server)
+        embedding_cache._redis_client = fakeredis.FakeRedis(server=server)
+    if mongo_uri:
+        cache_service.mongo_uri = mongo_uri
+    else:
+        from mongomock_motor import AsyncMongoMockClient
+        cache_service._db = AsyncMongoMockClient()[cache_service.mongo_db_name]
+
+
+async def run_load(name: str,
+                   requests: Sequence[Callable[[], Awaitable[Any]]],
+                   concurrency: int,
+                   report: BenchReport) -> None:
+    """
+    以固定并发执行一组请求,记录每个请求的延迟和整体吞吐
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    samples: List[float] = []
+    errors = 0
+
+    async def one(request):
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            response = await request()
+            samples.append(time.perf_counter() - start)
+            if response.status_code != 200:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(request) for request in requests))
+    elapsed = time.perf_counter() - start
+    report.add(name, summarize(samples), rps=round(len(requests) / elapsed, 2), errors=errors)
+
+
+async def run(args: argparse.Namespace) -> BenchReport:
+    import httpx
+    from main import app
+    # 应用按INFO配置日志,不逐条输出基准请求
+    logging.getLogger('httpx').setLevel(logging.WARNING)
+    from source.services.cache_service import cache_service
+
+    use_local_stand_ins(args.redis_url, args.mongo_uri)
+    report = BenchReport('e2e', vars(args))
+
+    corpus = generate_corpus(args.count, args.seed)
+    pdfs = [(resume.resume_id, render_pdf(resume)) for resume in corpus]
+    jobs = generate_jobs(8, args.seed)
+
+    # 执行应用的startup/shutdown事件(预热、缓存服务后台任务)
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://bench', timeout=600) as client:
+
+            def upload(resume_id: str, pdf: bytes):
+                return lambda: client.post(
+                    '/upload/resume', files={'file': (f'{resume_id}.pdf', pdf, 'application/pdf')})
+
+            print(f"== end to end ({len(pdfs)} resumes, concurrency {args.concurrency}) ==")
+            # 首次上传全部未命中,再次上传命中去重缓存
+            resume_infos: Dict[str, Dict[str, Any]] = {}
+
+            async def upload_and_keep(resume_id: str, pdf: bytes):
+                response = await upload(resume_id, pdf)()
+                if response.status_code == 200:
+                    resume_infos[resume_id] = response.json()['resume_info']
+                return response
+
+            await run_load('upload_cold', [lambda r=r, p=p: upload_and_keep(r, p) for r, p in pdfs],
+                           args.concurrency, report)
+            await run_load('upload_warm', [upload(r, p) for r, p in pdfs], args.concurrency, report)
+
+            infos = [resume_infos[r] for r, _ in pdfs if r in resume_infos]
+            analyze = [lambda info=info: client.post('/analyze/resume', json=info) for info in infos]
+            match = [
+                lambda info=info, job=jobs[i % len(jobs)]: client.post(
+                    '/match/resume', json={'resume_info': info, 'job_description': job})
+                for i, info in enumerate(infos)
+            ]
+            rank = [
+                lambda job=job: client.post('/match/rank', json={'resumes': infos, 'job_description': job})
+                for job in jobs
+            ]
+            # 首轮全部计算(miss);清空L1后第二轮由Redis命中;第三轮由L1命中
+            for phase in ('miss', 'redis', 'l1'):
+                if phase == 'redis':
+                    cache_service.l1.clear()
+                await run_load(f'analyze_{phase}', analyze, args.concurrency, report)
+                await run_load(f'match_{phase}', match, args.concurrency, report)
+                await run_load(f'rank_{phase}', rank, args.concurrency, report)
+            report.results['cache_tiers'] = dict(cache_service.tier_counts)
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="End-to-end throughput through the FastAPI app in-process")
+    parser.add_argument('--count', type=int, default=40)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--redis-url', help="use this Redis instead of fakeredis (use a scratch db)")
+    parser.add_argument('--mongo-uri', help="use this MongoDB instead of mongomock-motor")
+    parser.add_argument('--output', help="write JSON results to this file")
+    args = parser.parse_args(argv)
+    asyncio.run(run(args)).write(args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+各处理阶段的微基准: PDF解析、文本清洗、文档构建(分词)、段落切分、信息抽取、简历分析、匹配与排序
+
+python -m benchmarks.bench_stages [--count 20] [--repeat 20] [--output stages.json]
+"""
+import argparse
+import random
+from typing import List, Optional
+
+from benchmarks.corpus import generate_corpus, generate_jobs, generate_resume, render_pdf
+from benchmarks.report import BenchReport, time_calls
+
+# PDF解析按页数分别计时
+PDF_PAGE_SIZES = (1, 3, 10, 30, 80)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark each resume processing stage")
+    parser.add_argument('--count', type=int, default=20, help="resumes per text stage")
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--pages', type=int, nargs='*', default=list(PDF_PAGE_SIZES))
+    parser.add_argument('--output', help="write JSON results to this file")
+    args = parser.parse_args(argv)
+
+    from source.services.info_extractor import get_resume_extractor
+    from source.services.parsed_resume import ParsedResume
+    from source.services.pdf_parser import PDFParser
+    from source.services.resume_analysis import perform_resume_analysis
+    from source.services.resume_matcher import ResumeMatcher
+    from source.services.resume_sections import sectionize
+    from source.utils.text_cleaner import process_resume_text
+
+    report = BenchReport('stages', vars(args))
+    rng = random.Random(args.seed)
+
+    print("== PDF parsing (bytes -> raw text) ==")
+    for pages in args.pages:
+        pdf = render_pdf(generate_resume(rng, pages, pages=pages, lang='zh'))
+        repeat = max(3, args.repeat // max(1, pages // 10))
+        report.add(
+            f"pdf_parse[pages={pages}]",
+            time_calls(lambda: PDFParser.extract_text_from_bytes(pdf, clean=False), repeat),
+            pdf_bytes=len(pdf)
+        )
+
+    # 文本阶段使用真实分布的简历(以1-3页为主)
+    corpus = generate_corpus(args.count, args.seed)
+    raw_texts = [resume.text for resume in corpus]
+    parsed = [ParsedResume.build(text) for text in raw_texts]
+    extractor = get_resume_extractor()
+    resume_infos = [extractor.extract_full_resume_info(doc.text) for doc in parsed]
+    for doc, info in zip(parsed, resume_infos):
+        doc.resume_info = info
+    jobs = generate_jobs(4, args.seed)
+    matcher = ResumeMatcher()
+
+    def each(func):
+        return lambda: [func(i) for i in range(len(corpus))]
+
+    print(f"\n== text stages (per {len(corpus)} resumes) ==")
+    stages = [
+        ('clean_text', each(lambda i: process_resume_text(raw_texts[i]))),
+        ('parsed_resume_build', each(lambda i: ParsedResume.build(raw_texts[i]))),
+        ('sectionize', each(lambda i: sectionize(parsed[i].text))),
+        ('extract_full_resume_info', each(lambda i: extractor.extract_full_resume_info(parsed[i].text))),
+        ('perform_resume_analysis', each(lambda i: perform_resume_analysis(resume_infos[i]))),
+        ('match_score', each(lambda i: matcher.calculate_comprehensive_match_score(
+            resume_infos[i], jobs[i % len(jobs)], parsed[i]))),
+        ('rank', lambda: matcher.rank(resume_infos, jobs[0], parsed_resumes=parsed)),
+    ]
+    for name, func in stages:
+        report.add(name, time_calls(func, args.repeat), items=len(corpus))
+
+    report.write(args.output)
+
+
+if __name__ == "__main__":
+    main()
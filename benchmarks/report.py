@@ -0,0 +1,130 @@
+"""
+基准结果: 统一的JSON格式,便于在不同提交之间对比
+
+python -m benchmarks.report before.json after.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+REPORT_VERSION = 1
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def summarize(samples: Sequence[float]) -> Dict[str, float]:
+    """
+    耗时样本(秒)汇总为毫秒统计
+    """
+    ordered = sorted(samples)
+    n = len(ordered)
+
+    def percentile(p: float) -> float:
+        return ordered[min(n - 1, int(p * n))] * 1000
+
+    return {
+        'n': n,
+        'mean_ms': round(statistics.fmean(ordered) * 1000, 3),
+        'min_ms': round(ordered[0] * 1000, 3),
+        'p50_ms': round(percentile(0.5), 3),
+        'p95_ms': round(percentile(0.95), 3),
+        'max_ms': round(ordered[-1] * 1000, 3)
+    }
+
+
+def time_calls(func: Callable[[], Any], repeat: int, warmup: int = 1) -> Dict[str, float]:
+    """
+    逐次计时(预热若干次后)
+    """
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+class BenchReport:
+    def __init__(self, suite: str, params: Optional[Dict[str, Any]] = None):
+        """
+        一次基准运行的结果
+        :param suite: 基准套件名称
+        :param params: 运行参数(语料规模、seed、并发数等)
+        """
+        self.suite = suite
+        self.params = params or {}
+        self.results: Dict[str, Dict[str, Any]] = {}
+
+    def add(self, name: str, stats: Dict[str, Any], **extra: Any) -> None:
+        self.results[name] = {**stats, **extra}
+        line = '  '.join(f"{k}={v}" for k, v in self.results[name].items())
+        print(f"  {name:<40} {line}")
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'version': REPORT_VERSION,
+            'suite': self.suite,
+            'commit': _git_commit(),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'params': self.params,
+            'results': self.results
+        }
+
+    def write(self, path: Optional[str]) -> None:
+        if not path:
+            return
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.as_dict(), f, ensure_ascii=False, indent=2)
+        print(f"results written to {path}")
+
+
+def compare(before: Dict[str, Any], after: Dict[str, Any], metric: str = 'p50_ms') -> List[str]:
+    """
+    对比两次运行中同名结果的指标
+    :return: 每项一行,变化为 after/before - 1
+    """
+    lines = [f"{before.get('commit')} -> {after.get('commit')} ({metric})"]
+    for name, result in after.get('results', {}).items():
+        old = before.get('results', {}).get(name, {}).get(metric)
+        new = result.get(metric)
+        if old is None or new is None:
+            lines.append(f"  {name:<40} {'-':>10} {new!s:>10}")
+            continue
+        change = (new / old - 1) * 100 if old else 0.0
+        lines.append(f"  {name:<40} {old:>10} {new:>10} {change:+7.1f}%")
+    return lines
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument('before')
+    parser.add_argument('after')
+    parser.add_argument('--metric', default='p50_ms')
+    args = parser.parse_args(argv)
+    with open(args.before, encoding='utf-8') as f:
+        before = json.load(f)
+    with open(args.after, encoding='utf-8') as f:
+        after = json.load(f)
+    print('\n'.join(compare(before, after, args.metric)))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,47 @@
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
+import json
+import logging
+import time
 
-from fastapi import FastAPI,File,UploadFile
+#导入计时钩子需在其他模块之前安装
+from source.utils.startup import install_import_timer, is_lazy_startup, startup_report
+install_import_timer()
+
+from fastapi import FastAPI,File,UploadFile,HTTPException,Request,Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
 import uvicorn
 import os
-from source.services.pdf_parser import PDFParser
+from source.services.pdf_parser import PDFLimitError, PDFParseError, shutdown_page_executor
 from source.services.cache_service import cache_service
-from source.services.info_extractor import process_resume
 from source.services.resume_analysis import perform_resume_analysis
-from source.services.resume_matcher import match_resume_to_job
+from source.services.resume_matcher import match_resume_to_job, rank_resumes_for_job
+from source.services.model_registry import warmup_models
+from source.services.parsed_resume import ParsedResume, parsed_resume_memo
+from source.services.job_index import job_index
+from source.services.inference_scheduler import shutdown_inference_scheduler
+from source.utils.metrics import HTTP_METRIC, begin_request, end_request, metrics, server_timing_header
+from source.utils.profiler import profiler
+from source.services.tfidf_model import get_tfidf_model, get_tfidf_model_path, is_online_update_enabled
+from source.services.resume_ingest import (
+    MAX_BATCH_TOTAL_BYTES,
+    MAX_BATCH_UPLOAD_BYTES,
+    MAX_UPLOAD_BYTES,
+    batch_ingestor,
+    expand_batch_files,
+    resume_ingestor,
+    upload_cache_key,
+)
+
+#日志级别由 LOG_LEVEL 控制(默认INFO)
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL","INFO").upper(),
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+)
+logger = logging.getLogger("main")
+#jieba自带输出handler,不再重复输出到根logger
+logging.getLogger("jieba").propagate = False
 
 app = FastAPI(title="AI简历分析系统")
 
@@ -21,52 +54,191 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-@app.post("/upload/resume")
-async def upload_resume(file:UploadFile = File(...)):
+@app.middleware("http")
+async def record_timings(request:Request,call_next):
     """
-    简历上传接口
+    记录请求总耗时,并把请求内各阶段耗时写入 Server-Timing 响应头
+    流式响应只包含开始返回之前的阶段
+    按 PROFILE_SAMPLE_RATE 比例或携带 PROFILE_TOKEN 令牌的请求进行栈采样,采样编号写入 X-Profile-Id 响应头
     """
-    #创建临时存储目录
-    os.makedirs("temp",exist_ok=True)
+    profile = profiler.start(request.method,request.url.path,request.headers)
+    token = begin_request()
+    start = time.perf_counter()
+    try:
+        response = await call_next(request)
+    except Exception:
+        if profile is not None:
+            profiler.stop(profile,request.url.path,500,time.perf_counter() - start)
+        raise
+    finally:
+        timings = end_request(token)
+    total = time.perf_counter() - start
+    #按路由模板聚合,避免路径参数产生过多时间序列
+    route = request.scope.get("route")
+    path = getattr(route,"path","unmatched")
+    metrics.observe(
+        HTTP_METRIC,total,
+        method=request.method,
+        path=path,
+        status=str(response.status_code)
+    )
+    response.headers["Server-Timing"] = server_timing_header(timings,total)
+    if profile is not None:
+        profiler.stop(profile,path,response.status_code,total)
+        response.headers["X-Profile-Id"] = profile.profile_id
+    return response
 
-    #保存上传文件
-    file_location = f"temp/{file.filename}"
-    with open(file_location,"wb+") as file_object:
-        file_object.write(await file.read())
+@app.on_event("startup")
+async def warmup():
+    """
+    启动预热: 每个worker只加载一次抽取器/模型
+    RESUME_EXTRACTOR_MODE=regex(默认)时不加载torch
+    STARTUP_MODE=lazy时跳过预热,所有资源在首次请求时加载
+    """
+    if not is_lazy_startup():
+        status = warmup_models()
+        logger.info("Model warmup:%s",status)
+    await cache_service.start()
+    startup_report.mark_ready()
+    logger.info(startup_report.format())
 
-    #解析PDF
-    text = PDFParser.extract_text(file_location)
+@app.on_event("shutdown")
+async def shutdown():
+    """
+    关闭解析线程池和推理调度线程;开启在线更新时,退出前把增量更新的TF-IDF文档频率合并保存(多worker互不覆盖)
+    """
+    resume_ingestor.shutdown()
+    batch_ingestor.shutdown()
+    shutdown_page_executor()
+    shutdown_inference_scheduler()
+    profiler.shutdown()
+    if is_online_update_enabled():
+        get_tfidf_model().save_merged(get_tfidf_model_path())
+    await cache_service.close()
 
-    #信息提取
-    resume_info = process_resume(text)
+async def save_parsed_resume(parsed:ParsedResume):
+    """
+    保存上传时构建的简历文档,匹配时按document_id取回
+    """
+    parsed_resume_memo.put(parsed)
+    try:
+        await cache_service.cache_parsed_resume(parsed.to_dict())
+    except Exception as e:
+        logger.warning("Parsed resume cache error:%s",e)
 
-    #删除临时文件
-    os.remove(file_location)
+async def load_parsed_resume(resume_info:Dict[str,Any]) -> Optional[ParsedResume]:
+    """
+    按简历信息中的document_id取回简历文档: 先查进程内缓存,再查Redis/MongoDB
+    """
+    return (await load_parsed_resumes([resume_info]))[0]
+
+async def load_parsed_resumes(resume_infos:List[Dict[str,Any]]) -> List[Optional[ParsedResume]]:
+    """
+    批量取回简历文档: 进程内缓存未命中的合并为一次Redis往返
+    """
+    document_ids = [
+        resume_info.get("document_id") if isinstance(resume_info,dict) else None
+        for resume_info in resume_infos
+    ]
+    parsed_resumes = [parsed_resume_memo.get(document_id) for document_id in document_ids]
+    missing = [
+        i for i,(document_id,parsed) in enumerate(zip(document_ids,parsed_resumes))
+        if document_id and parsed is None
+    ]
+    if not missing:
+        return parsed_resumes
+    try:
+        cached = await cache_service.get_cached_parsed_resumes([document_ids[i] for i in missing])
+    except Exception as e:
+        logger.warning("Parsed resume cache error:%s",e)
+        return parsed_resumes
+    for i,data in zip(missing,cached):
+        parsed = ParsedResume.from_dict(data)
+        if parsed is not None:
+            parsed_resume_memo.put(parsed)
+            parsed_resumes[i] = parsed
+    return parsed_resumes
+
+@app.post("/upload/resume")
+async def upload_resume(response:Response,file:UploadFile = File(...)):
+    """
+    简历上传接口
+    直接从内存字节解析PDF,解析与抽取在有界线程池中执行,不阻塞事件循环
+    按文件内容哈希去重,重复上传的文件直接返回之前的解析结果
+    """
+    #读取上传文件(多读一个字节用于判断是否超限)
+    data = await file.read(MAX_UPLOAD_BYTES + 1)
+    #超限文件不计算哈希、不进入解析
+    if len(data) > MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413,detail=f"File exceeds {MAX_UPLOAD_BYTES} bytes")
+
+    async def parse_upload():
+        #解析PDF并提取信息
+        parsed = await resume_ingestor.ingest(data)
+        #保存简历文档,后续匹配复用分词结果
+        await save_parsed_resume(parsed)
+        return {
+            "document_id":parsed.document_id,
+            "resume_info":parsed.resume_info
+        }
+
+    try:
+        upload,tier = await cache_service.get_or_compute_upload(upload_cache_key(data),parse_upload)
+    except PDFLimitError as e:
+        raise HTTPException(status_code=413,detail=str(e))
+    except PDFParseError as e:
+        #无法解析的文件不缓存,也不作为成功返回
+        raise HTTPException(status_code=422,detail=str(e))
+    response.headers["X-Cache-Tier"] = tier
 
     return {
         "filename":file.filename,
-        "resume_info":resume_info
+        "resume_info":upload["resume_info"]
     }
 
+@app.post("/upload/resumes/batch")
+async def upload_resumes_batch(files:List[UploadFile] = File(...)):
+    """
+    批量简历上传接口
+    支持zip压缩包或多个PDF文件,多进程并行解析,每完成一份以NDJSON返回一行
+    """
+    uploads = []
+    total_bytes = 0
+    for file in files:
+        data = await file.read(MAX_BATCH_UPLOAD_BYTES + 1)
+        if len(data) > MAX_BATCH_UPLOAD_BYTES:
+            raise HTTPException(status_code=413,detail=f"{file.filename} exceeds {MAX_BATCH_UPLOAD_BYTES} bytes")
+        total_bytes += len(data)
+        if total_bytes > MAX_BATCH_TOTAL_BYTES:
+            raise HTTPException(status_code=413,detail=f"Batch exceeds {MAX_BATCH_TOTAL_BYTES} bytes")
+        uploads.append((file.filename,data))
+    #解压在线程池中执行,边展开边检查文件数和累计字节数
+    try:
+        batch = await run_in_threadpool(expand_batch_files,uploads)
+    except PDFLimitError as e:
+        raise HTTPException(status_code=413,detail=str(e))
+
+    return StreamingResponse(
+        batch_ingestor.ingest_many_ndjson(batch,on_parsed=save_parsed_resume),
+        media_type="application/x-ndjson"
+    )
+
 @app.post("/analyze/resume")
-async def match_resume(resume_info:Dict[str,Any]):
+async def match_resume(resume_info:Dict[str,Any],response:Response):
     try:
         #详细调试信息
-        print("Resume Info Type:",type(resume_info))
-        print("Resume Info Keys:",resume_info.keys())
-        #检查缓存
-        cached_result = cache_service.get_cached_resume_analysis(resume_info)
-        if cached_result:
-            return cached_result
-        #执行分析
-        analysis_result = perform_resume_analysis(resume_info)
-
-        #缓存结果
-        await cache_service.cache_resume_analysis(resume_info,analysis_result)
-
+        logger.debug("Resume Info Type:%s",type(resume_info))
+        logger.debug("Resume Info Keys:%s",resume_info.keys())
+        #检查缓存(L1 -> Redis),未命中时执行分析并缓存,并发相同请求只分析一次
+        analysis_result,tier = await cache_service.get_or_compute_resume_analysis(
+            resume_info,
+            lambda: run_in_threadpool(perform_resume_analysis,resume_info)
+        )
+        #命中层: l1/redis/mongo,重新计算时为miss
+        response.headers["X-Cache-Tier"] = tier
         return analysis_result
     except Exception as e:
-        print(f"Resume analysis error:{e}")
+        logger.error("Resume analysis error:%s",e)
         return{
             "error":"简历分析失败",
             "details":str(e),
@@ -75,27 +247,139 @@ async def match_resume(resume_info:Dict[str,Any]):
         }
 
 @app.post("/match/resume")
-async def match_resume( resume_info:Dict[str,Any],job_description:Dict[str,Any]):
+async def match_resume( resume_info:Dict[str,Any],job_description:Dict[str,Any],response:Response):
     if isinstance(job_description,str):
         job_description = {
             "job_description":job_description
         }
-    cached_result = cache_service.get_cached_resume_match(resume_info,job_description)
-    if cached_result:
-        return cached_result
 
-    #执行匹配
-    match_result = match_resume_to_job(resume_info,job_description)
+    async def compute_match():
+        #执行匹配
+        parsed = await load_parsed_resume(resume_info)
+        return await run_in_threadpool(match_resume_to_job,resume_info,job_description,parsed)
 
-    #缓存结果
-    await cache_service.cache_resume_match_result(resume_info,job_description,match_result)
-    print("Resume Info:",resume_info)
-    print("Job Description:",job_description)
+    #检查缓存(L1 -> Redis),未命中时执行匹配并缓存,并发相同请求只匹配一次
+    match_result,tier = await cache_service.get_or_compute_resume_match(resume_info,job_description,compute_match)
+    response.headers["X-Cache-Tier"] = tier
     return  {
         "match_result":match_result
     }
 
 
+@app.post("/match/rank")
+async def rank_resumes(resumes:List[Dict[str,Any]],job_description:Dict[str,Any],top_k:Optional[int] = None):
+    """
+    多份简历对同一职位批量排序
+    一次往返查询全部简历的匹配缓存,只计算未命中的简历,按综合分降序以NDJSON逐行返回
+    """
+    #缓存key只计算一次,读取和写回共用
+    cache_keys = cache_service.match_cache_keys(resumes,job_description)
+    try:
+        cached_results = await cache_service.get_cached_resume_matches(resumes,job_description,cache_keys)
+    except Exception as e:
+        logger.warning("Match cache error:%s",e)
+        cached_results = [None] * len(resumes)
+    ranking = [{"index":i,**cached} for i,cached in enumerate(cached_results) if cached]
+
+    missing = [i for i,cached in enumerate(cached_results) if not cached]
+    if missing:
+        missing_resumes = [resumes[i] for i in missing]
+        parsed_resumes = await load_parsed_resumes(missing_resumes)
+        #分词/TF-IDF/句向量计算在线程池中执行,不阻塞事件循环
+        computed = await run_in_threadpool(
+            rank_resumes_for_job,missing_resumes,job_description,parsed_resumes=parsed_resumes
+        )
+        match_results = [None] * len(missing)
+        for item in computed:
+            match_results[item["index"]] = {key:value for key,value in item.items() if key != "index"}
+            item["index"] = missing[item["index"]]
+        ranking.extend(computed)
+        try:
+            await cache_service.cache_resume_match_results(
+                missing_resumes,job_description,match_results,cache_keys=[cache_keys[i] for i in missing]
+            )
+        except Exception as e:
+            logger.warning("Match cache error:%s",e)
+
+    ranking.sort(key=lambda item:(-item["comprehensive_match_score"],item["index"]))
+    if top_k is not None:
+        ranking = ranking[:max(top_k,0)]
+
+    def iter_ranking():
+        for rank,item in enumerate(ranking,start=1):
+            item["rank"] = rank
+            yield json.dumps(item,ensure_ascii=False) + "\n"
+
+    return StreamingResponse(iter_ranking(),media_type="application/x-ndjson")
+
+@app.post("/jobs")
+async def add_jobs(jobs:List[Dict[str,Any]]):
+    """
+    职位入库接口(写入职位向量索引)
+    """
+    #编码和文件写入在线程池中执行
+    job_ids = await run_in_threadpool(job_index.add_jobs,jobs)
+    return {
+        "job_ids":job_ids,
+        "total_jobs":len(job_index)
+    }
+
+@app.post("/match/top-jobs")
+async def match_top_jobs(resume_info:Dict[str,Any],top_k:int = 10):
+    """
+    为简历检索最匹配的top-k职位
+    """
+    return {
+        "matches":await run_in_threadpool(job_index.search,resume_info,top_k=top_k)
+    }
+
+@app.get("/startup-report")
+async def get_startup_report():
+    """
+    启动耗时报告: 各模块导入耗时与各资源初始化耗时(含首次请求时的延迟加载)
+    """
+    return startup_report.as_dict()
+
+@app.get("/metrics")
+async def get_metrics():
+    """
+    Prometheus格式指标: 各阶段与请求耗时直方图、各缓存层命中计数、写入队列与推理批次统计(每个worker进程各自统计)
+    """
+    return PlainTextResponse(metrics.render(),media_type="text/plain; version=0.0.4")
+
+@app.get("/admin/profiles")
+async def list_profiles(request:Request):
+    """
+    保留的请求栈采样(最慢的N份及令牌触发的最近N份),按耗时降序
+    需在 X-Profile-Token 请求头中携带 PROFILE_TOKEN,未设置令牌时不可访问
+    """
+    if not profiler.is_authorized(request.headers):
+        raise HTTPException(status_code=403,detail="Invalid profile token")
+    return {
+        "enabled":profiler.enabled,
+        "sample_rate":profiler.sample_rate,
+        "profiles":[profile.summary() for profile in profiler.profiles()]
+    }
+
+@app.get("/admin/profiles/{profile_id}")
+async def download_profile(profile_id:str,request:Request,format:str = "speedscope"):
+    """
+    下载一份请求栈采样: format=speedscope(https://www.speedscope.app 打开)或 collapsed(折叠栈,可生成火焰图)
+    """
+    if not profiler.is_authorized(request.headers):
+        raise HTTPException(status_code=403,detail="Invalid profile token")
+    profile = profiler.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404,detail=f"Profile {profile_id} not found")
+    try:
+        content,media_type,filename = profiler.export(profile,format)
+    except ValueError as e:
+        raise HTTPException(status_code=400,detail=str(e))
+    return Response(
+        content,
+        media_type=media_type,
+        headers={"Content-Disposition":f'attachment; filename="{filename}"'}
+    )
 
 if __name__ == "__main__":
     port = int(os.getenv("PORT", 8000)) 
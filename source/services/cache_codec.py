@@ -0,0 +1,65 @@
+import hashlib
+import json
+import os
+import zlib
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # 可选依赖,未安装时使用标准库json
+    orjson = None
+
+# 序列化后超过该字节数的缓存值压缩存储(0表示不压缩)
+COMPRESS_MIN_BYTES = int(os.getenv('CACHE_COMPRESS_MIN_BYTES', '4096'))
+COMPRESS_LEVEL = int(os.getenv('CACHE_COMPRESS_LEVEL', '1'))
+
+# 压缩值的首字节标记(JSON文本不会以该字节开头,未压缩的旧值可直接读取)
+ZLIB_MARKER = b'\x01'
+
+
+def dumps_canonical(data: Any) -> bytes:
+    """
+    确定性序列化(键排序、无多余空白),用于生成缓存key
+    """
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, sort_keys=True, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def canonical_digest(data: Any) -> str:
+    """
+    内容摘要(blake2b, 128位)
+    """
+    return hashlib.blake2b(dumps_canonical(data), digest_size=16).hexdigest()
+
+
+def combine_digests(*digests: str) -> str:
+    """
+    由多个摘要组合出新的摘要(如简历摘要+职位摘要),无需重新序列化原始数据
+    """
+    return hashlib.blake2b(':'.join(digests).encode('ascii'), digest_size=16).hexdigest()
+
+
+def encode_value(value: Any) -> bytes:
+    """
+    缓存值序列化,超过阈值时zlib压缩
+    """
+    if orjson is not None:
+        data = orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+    else:
+        data = json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    if COMPRESS_MIN_BYTES and len(data) >= COMPRESS_MIN_BYTES:
+        compressed = zlib.compress(data, COMPRESS_LEVEL)
+        if len(compressed) < len(data):
+            return ZLIB_MARKER + compressed
+    return data
+
+
+def decode_value(data: Any) -> Any:
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    if data[:1] == ZLIB_MARKER:
+        data = zlib.decompress(data[1:])
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
@@ -1,30 +1,329 @@
-import redis
-import json
-import hashlib
-from typing import Dict, Any, Optional
-from motor.motor_asyncio import AsyncIOMotorClient
+import asyncio
+import logging
+import os
+import time
+from collections import Counter, OrderedDict
+from typing import Dict, Any, Awaitable, Callable, List, Optional, Sequence, Tuple
 from datetime import datetime, timedelta
 
+from source.services.cache_codec import canonical_digest, combine_digests, decode_value, encode_value
+from source.services.write_behind import WriteBehindPersister
+from source.utils.metrics import MetricFamily, metrics, stage
+
+logger = logging.getLogger(__name__)
+
+# 命中层
+TIER_L1 = 'l1'
+TIER_REDIS = 'redis'
+TIER_MONGO = 'mongo'
+TIER_MISS = 'miss'
+
+# Redis key前缀 -> (MongoDB集合, 查询字段, 结果字段)
+MONGO_TIERS = {
+    'resume_analysis': ('resumes', 'cache_key', 'analysis_result'),
+    'resume_match': ('match_results', 'cache_key', 'match_result'),
+    'parsed_resume': ('parsed_resumes', 'document_id', 'parsed_resume'),
+    'resume_upload': ('resume_uploads', 'upload_key', 'upload'),
+}
+
+
+def get_redis_url() -> str:
+    """
+    Redis地址: 优先REDIS_URL,否则由REDIS_HOST/REDIS_PORT/REDIS_DB/REDIS_PASSWORD拼接
+    """
+    url = os.getenv('REDIS_URL')
+    if url:
+        return url
+    host = os.getenv('REDIS_HOST', 'localhost')
+    port = os.getenv('REDIS_PORT', '6379')
+    db = os.getenv('REDIS_DB', '0')
+    password = os.getenv('REDIS_PASSWORD')
+    auth = f":{password}@" if password else ''
+    return f"redis://{auth}{host}:{port}/{db}"
+
+
+class L1Cache:
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        """
+        进程内缓存: 按TTL过期,超过条目上限时淘汰最久未使用的条目
+        返回的是缓存对象本身,调用方不要修改
+        :param max_entries: 最大条目数(0表示关闭)
+        :param ttl_seconds: 过期秒数
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._items: 'OrderedDict[str, Tuple[float, Any]]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        item = self._items.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self._items[key]
+            self.misses += 1
+            return None
+        self._items.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        if self.max_entries <= 0:
+            return
+        ttl = self.ttl_seconds if ttl_seconds is None else min(ttl_seconds, self.ttl_seconds)
+        self._items[key] = (time.monotonic() + ttl, value)
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_entries:
+            self._items.popitem(last=False)
+
+    def clear(self) -> None:
+        self._items.clear()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+class SingleFlight:
+    def __init__(self):
+        """
+        请求合并: 同一key并发未命中时只执行一次计算,其余请求等待同一结果
+        """
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    async def do(self, key: str, func: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+        if task is None:
+            # 计算在独立任务中执行: 发起请求被取消(如客户端断开)时计算继续,其余等待者仍能拿到结果
+            task = asyncio.ensure_future(func())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        # shield: 任一等待者(包括发起者)被取消都不影响正在进行的计算
+        return await asyncio.shield(task)
+
+    def _finish(self, key: str, task: asyncio.Future) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # 标记异常已读取,没有等待者时不产生警告
+        if not task.cancelled():
+            task.exception()
+
+
 class CacheService:
     def __init__(self,
-                 redis_host='localhost',
-                 redis_port=6379,
-                 mongo_uri='mongodb://localhost:27017'):
+                 redis_url: Optional[str] = None,
+                 mongo_uri: Optional[str] = None,
+                 redis_max_connections: Optional[int] = None,
+                 mongo_max_pool_size: Optional[int] = None):
         """
         初始化缓存和数据库服务
+        客户端在首次使用时才创建,导入本模块不加载redis/motor也不建立连接
+        :param redis_url: Redis地址,默认读取环境变量
+        :param mongo_uri: MongoDB地址,默认读取 MONGO_URI
+        :param redis_max_connections: Redis连接池上限,默认读取 REDIS_MAX_CONNECTIONS
+        :param mongo_max_pool_size: MongoDB连接池上限,默认读取 MONGO_MAX_POOL_SIZE
         """
-        # Redis 缓存配置
-        self.redis_client = redis.Redis(
-            host=redis_host,
-            port=redis_port,
-            decode_responses=True
+        self.redis_url = redis_url or get_redis_url()
+        self.mongo_uri = mongo_uri or os.getenv('MONGO_URI', 'mongodb://localhost:27017')
+        self.mongo_db_name = os.getenv('MONGO_DB', 'resume_analysis_db')
+        self.redis_max_connections = redis_max_connections or int(os.getenv('REDIS_MAX_CONNECTIONS', '32'))
+        self.mongo_max_pool_size = mongo_max_pool_size or int(os.getenv('MONGO_MAX_POOL_SIZE', '50'))
+        # 连接池耗尽时的等待秒数,以及单次命令的超时秒数
+        self.redis_pool_timeout = float(os.getenv('REDIS_POOL_TIMEOUT', '5'))
+        self.redis_socket_timeout = float(os.getenv('REDIS_SOCKET_TIMEOUT', '2'))
+        self._redis_client = None
+        self._mongo_client = None
+        self._db = None
+
+        # L1进程内缓存与并发未命中合并
+        self.l1 = L1Cache(
+            max_entries=int(os.getenv('CACHE_L1_MAX_ENTRIES', '1024')),
+            ttl_seconds=float(os.getenv('CACHE_L1_TTL_SECONDS', '300'))
         )
+        self.single_flight = SingleFlight()
+        # 各层命中次数
+        self.tier_counts: Counter = Counter()
+        self._index_task = None
+        # MongoDB持久化异步攒批写入,响应不等待MongoDB
+        self.persister = WriteBehindPersister(lambda: self.db)
 
+    @property
+    def redis_client(self):
+        # 异步Redis客户端,共享有界连接池(池满时等待而不是新建连接)
+        if self._redis_client is None:
+            import redis.asyncio as aioredis
+            pool = aioredis.BlockingConnectionPool.from_url(
+                self.redis_url,
+                max_connections=self.redis_max_connections,
+                timeout=self.redis_pool_timeout,
+                socket_timeout=self.redis_socket_timeout,
+                decode_responses=False
+            )
+            self._redis_client = aioredis.Redis(connection_pool=pool)
+        return self._redis_client
+
+    @property
+    def db(self):
         # MongoDB 配置
-        self.mongo_client = AsyncIOMotorClient(mongo_uri)
-        self.db = self.mongo_client['resume_analysis_db']
-        self.resume_collection = self.db['resumes']
-        self.match_result_collection = self.db['match_results']
+        if self._db is None:
+            from motor.motor_asyncio import AsyncIOMotorClient
+            self._mongo_client = AsyncIOMotorClient(self.mongo_uri, maxPoolSize=self.mongo_max_pool_size)
+            self._db = self._mongo_client[self.mongo_db_name]
+        return self._db
+
+    @property
+    def resume_collection(self):
+        return self.db['resumes']
+
+    @property
+    def match_result_collection(self):
+        return self.db['match_results']
+
+    @property
+    def parsed_resume_collection(self):
+        return self.db['parsed_resumes']
+
+    async def start(self) -> None:
+        """
+        启动MongoDB攒批写入和索引创建(服务启动时调用)
+        """
+        self.persister.start()
+        # 后台创建索引,MongoDB不可用时不阻塞启动
+        self._index_task = asyncio.create_task(self.ensure_indexes())
+
+    async def close(self) -> None:
+        """
+        写完待持久化数据,关闭连接池(服务退出时调用)
+        """
+        await self.persister.stop()
+        if self._index_task is not None and not self._index_task.done():
+            self._index_task.cancel()
+        self._index_task = None
+        if self._redis_client is not None:
+            await self._redis_client.aclose()
+            await self._redis_client.connection_pool.disconnect()
+            self._redis_client = None
+        if self._mongo_client is not None:
+            self._mongo_client.close()
+            self._mongo_client = None
+            self._db = None
+
+    async def _lookup_many(self, keys: Sequence[str]) -> List[Tuple[Optional[Any], str]]:
+        """
+        分层读取: L1 -> Redis(一次pipeline) -> MongoDB(每个集合一次查询)
+        下层命中时回填上层; Redis不可用时直接查MongoDB,避免故障切换后集中重算
+        :param keys: 缓存key列表(如 resume_match:<hash>)
+        :return: 与key一一对应的 (结果, 命中层),未命中为 (None, 'miss')
+        """
+        results: List[Tuple[Optional[Any], str]] = []
+        for key in keys:
+            value = self.l1.get(key)
+            results.append((value, TIER_L1) if value is not None else (None, TIER_MISS))
+
+        missing = [i for i, (value, _) in enumerate(results) if value is None]
+        if missing:
+            try:
+                with stage('cache_redis'):
+                    async with self.redis_client.pipeline(transaction=False) as pipe:
+                        for i in missing:
+                            pipe.get(keys[i])
+                        values = await pipe.execute()
+            except Exception as e:
+                logger.warning("Redis read error:%s", e)
+                values = [None] * len(missing)
+            for i, value in zip(missing, values):
+                if value:
+                    value = decode_value(value)
+                    self.l1.set(keys[i], value)
+                    results[i] = (value, TIER_REDIS)
+            missing = [i for i in missing if results[i][0] is None]
+
+        if missing:
+            with stage('cache_mongo'):
+                await self._lookup_mongo(keys, missing, results)
+
+        for key, (_, tier) in zip(keys, results):
+            self._count_lookup(key, tier)
+        return results
+
+    def _count_lookup(self, key: str, tier: str) -> None:
+        self.tier_counts[tier] += 1
+        metrics.inc('resume_cache_lookups_total', cache=key.partition(':')[0], tier=tier)
+
+    async def _lookup_mongo(self,
+                            keys: Sequence[str],
+                            missing: List[int],
+                            results: List[Tuple[Optional[Any], str]]) -> None:
+        # 按key前缀分组,每个集合一次 $in 查询
+        groups: Dict[str, Dict[str, int]] = {}
+        for i in missing:
+            prefix, _, ident = keys[i].partition(':')
+            if prefix in MONGO_TIERS:
+                groups.setdefault(prefix, {})[ident] = i
+
+        now = datetime.utcnow()
+        repopulate = []
+        for prefix, idents in groups.items():
+            collection, field, result_field = MONGO_TIERS[prefix]
+            try:
+                async for doc in self.db[collection].find(
+                    {field: {'$in': list(idents)}, 'expires_at': {'$gt': now}},
+                    {field: 1, result_field: 1, 'expires_at': 1}
+                ):
+                    i = idents[doc[field]]
+                    value = doc[result_field]
+                    ttl_seconds = max(int((doc['expires_at'] - now).total_seconds()), 1)
+                    self.l1.set(keys[i], value, ttl_seconds)
+                    results[i] = (value, TIER_MONGO)
+                    repopulate.append((keys[i], value, ttl_seconds))
+            except Exception as e:
+                logger.warning("MongoDB read error:%s", e)
+
+        # 回填Redis,剩余有效期与MongoDB一致
+        if repopulate:
+            try:
+                async with self.redis_client.pipeline(transaction=False) as pipe:
+                    for key, value, ttl_seconds in repopulate:
+                        pipe.setex(key, ttl_seconds, encode_value(value))
+                    await pipe.execute()
+            except Exception as e:
+                logger.warning("Redis write error:%s", e)
+
+    async def _get_json(self, key: str) -> Optional[Any]:
+        return (await self._lookup_many([key]))[0][0]
+
+    async def _get_json_many(self, keys: Sequence[str]) -> List[Optional[Any]]:
+        return [value for value, _ in await self._lookup_many(keys)]
+
+    async def _get_or_compute(self,
+                              key: str,
+                              compute: Callable[[], Awaitable[Any]],
+                              store: Callable[[Any], Awaitable[None]]) -> Tuple[Any, str]:
+        """
+        分层读取缓存,未命中时计算并写回;同一key的并发未命中只计算一次
+        缓存读写失败不影响返回计算结果
+        :return: (结果, 命中层),重新计算时命中层为 'miss'
+        """
+        cached_result = self.l1.get(key)
+        if cached_result is not None:
+            self._count_lookup(key, TIER_L1)
+            return cached_result, TIER_L1
+
+        async def load():
+            cached, tier = (await self._lookup_many([key]))[0]
+            if cached is not None:
+                return cached, tier
+            result = await compute()
+            try:
+                with stage('cache_write'):
+                    await store(result)
+            except Exception as e:
+                logger.warning("Cache write error:%s", e)
+            return result, TIER_MISS
+
+        return await self.single_flight.do(key, load)
 
     def generate_cache_key(self, data: Dict[str, Any]) -> str:
         """
@@ -32,79 +331,109 @@ class CacheService:
         :param data: 输入数据
         :return: 哈希字符串
         """
-        # 将数据转换为确定性字符串
-        data_str = json.dumps(data, sort_keys=True)
-        return hashlib.md5(data_str.encode('utf-8')).hexdigest()
+        # 确定性序列化后取摘要
+        return canonical_digest(data)
+
+    def match_cache_key(self,
+                        resume_info: Dict[str, Any],
+                        job_description: Dict[str, Any],
+                        job_digest: Optional[str] = None) -> str:
+        """
+        匹配结果key: 由简历摘要和职位摘要组合
+        :param job_digest: 已计算的职位摘要,同一职位匹配多份简历时只计算一次
+        """
+        return combine_digests(
+            self.generate_cache_key(resume_info),
+            job_digest or self.generate_cache_key(job_description)
+        )
+
+    def match_cache_keys(self,
+                         resume_infos: Sequence[Dict[str, Any]],
+                         job_description: Dict[str, Any]) -> List[str]:
+        job_digest = self.generate_cache_key(job_description)
+        return [self.match_cache_key(resume_info, job_description, job_digest) for resume_info in resume_infos]
 
     async def cache_resume_analysis(self,
                                     resume_info: Dict[str, Any],
                                     analysis_result: Dict[str, Any],
-                                    expire_hours: int = 24) -> None:
+                                    expire_hours: int = 24,
+                                    cache_key: Optional[str] = None) -> None:
         """
         缓存简历分析结果
         :param resume_info: 简历信息
         :param analysis_result: 分析结果
         :param expire_hours: 缓存过期时间
+        :param cache_key: 已计算的缓存key,为空时重新计算
         """
 
         # 生成缓存key
-        cache_key = self.generate_cache_key(resume_info)
-        # 存储到 Redis
-        self.redis_client.setex(
-            f"resume_analysis:{cache_key}",
-            timedelta(hours=expire_hours),
-            json.dumps(analysis_result)
-        )
-
-        # 持久化到 MongoDB
-        await self.resume_collection.update_one(
+        cache_key = cache_key or self.generate_cache_key(resume_info)
+        self.l1.set(f"resume_analysis:{cache_key}", analysis_result, expire_hours * 3600)
+        # 持久化到 MongoDB(攒批异步写入);先于Redis入队,Redis不可用时MongoDB层仍能取到新结果
+        self.persister.upsert(
+            'resumes',
             {'cache_key': cache_key},
             {'$set': {
                 'resume_info': resume_info,
                 'analysis_result': analysis_result,
                 'created_at': datetime.utcnow(),
                 'expires_at': datetime.utcnow() + timedelta(hours=expire_hours)
-            }},
-            upsert=True
+            }}
         )
 
-    def get_cached_resume_analysis(self, resume_info: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        # 存储到 Redis
+        await self.redis_client.setex(
+            f"resume_analysis:{cache_key}",
+            timedelta(hours=expire_hours),
+            encode_value(analysis_result)
+        )
+
+    async def get_cached_resume_analysis(self, resume_info: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """
         获取缓存的简历分析结果
         :param resume_info: 简历信息
         :return: 缓存结果或 None
         """
         cache_key = self.generate_cache_key(resume_info)
-        # 先从 Redis 获取
-        cached_result = self.redis_client.get(f"resume_analysis:{cache_key}")
-        if cached_result:
-            return json.loads(cached_result)
-        return None
+        # 先从 L1/Redis 获取
+        return await self._get_json(f"resume_analysis:{cache_key}")
+
+    async def get_or_compute_resume_analysis(self,
+                                             resume_info: Dict[str, Any],
+                                             compute: Callable[[], Awaitable[Dict[str, Any]]],
+                                             expire_hours: int = 24) -> Tuple[Dict[str, Any], str]:
+        """
+        获取简历分析结果,未命中时计算并缓存(并发相同请求只计算一次)
+        :param resume_info: 简历信息
+        :param compute: 执行分析的协程函数
+        :param expire_hours: 缓存过期时间
+        :return: (分析结果, 命中层 l1/redis/mongo/miss)
+        """
+        # key每个请求只计算一次,读取和写回共用
+        cache_key = self.generate_cache_key(resume_info)
+        return await self._get_or_compute(
+            f"resume_analysis:{cache_key}",
+            compute,
+            lambda result: self.cache_resume_analysis(resume_info, result, expire_hours, cache_key)
+        )
 
-    async def cache_resume_match_result(self,resume_info: Dict[str, Any],job_description: Dict[str, Any],match_result: Dict[str, Any],expire_hours: int = 24) -> None:
+    async def cache_resume_match_result(self,resume_info: Dict[str, Any],job_description: Dict[str, Any],match_result: Dict[str, Any],expire_hours: int = 24,cache_key: Optional[str] = None) -> None:
         """
         缓存简历匹配结果
         :param resume_info: 简历信息
         :param job_description: 职位描述
         :param match_result: 匹配结果
         :param expire_hours: 缓存过期时间
+        :param cache_key: 已计算的缓存key,为空时重新计算
         """
 
         # 生成缓存key
-        cache_key = self.generate_cache_key({
-            'resume_info': resume_info,
-            'job_description': job_description
-        })
+        cache_key = cache_key or self.match_cache_key(resume_info, job_description)
+        self.l1.set(f"resume_match:{cache_key}", match_result, expire_hours * 3600)
 
-        # 存储到 Redis
-        self.redis_client.setex(
-            f"resume_match:{cache_key}",
-            timedelta(hours=expire_hours),
-            json.dumps(match_result)
-        )
-
-        # 持久化到 MongoDB
-        await self.match_result_collection.update_one(
+        # 持久化到 MongoDB(攒批异步写入);先于Redis入队,Redis不可用时MongoDB层仍能取到新结果
+        self.persister.upsert(
+            'match_results',
             {'cache_key': cache_key},
             {'$set': {
                 'resume_info': resume_info,
@@ -112,42 +441,220 @@ class CacheService:
                 'match_result': match_result,
                 'created_at': datetime.utcnow(),
                 'expires_at': datetime.utcnow() + timedelta(hours=expire_hours)
-            }},
-            upsert=True
+            }}
+        )
+
+        # 存储到 Redis
+        await self.redis_client.setex(
+            f"resume_match:{cache_key}",
+            timedelta(hours=expire_hours),
+            encode_value(match_result)
         )
 
-    def get_cached_resume_match(self,
-                                resume_info: Dict[str, Any],
-                                job_description: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    async def get_cached_resume_match(self,
+                                      resume_info: Dict[str, Any],
+                                      job_description: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """
         获取缓存的简历匹配结果
         :param resume_info: 简历信息
         :param job_description: 职位描述
         :return: 缓存结果或 None
         """
-        cache_key = self.generate_cache_key({
-            'resume_info': resume_info,
-            'job_description': job_description
-        })
+        cache_key = self.match_cache_key(resume_info, job_description)
+
+        # 先从 L1/Redis 获取
+        return await self._get_json(f"resume_match:{cache_key}")
+
+    async def get_or_compute_resume_match(self,
+                                          resume_info: Dict[str, Any],
+                                          job_description: Dict[str, Any],
+                                          compute: Callable[[], Awaitable[Dict[str, Any]]],
+                                          expire_hours: int = 24) -> Tuple[Dict[str, Any], str]:
+        """
+        获取简历匹配结果,未命中时计算并缓存(并发相同请求只计算一次)
+        :param resume_info: 简历信息
+        :param job_description: 职位描述
+        :param compute: 执行匹配的协程函数
+        :param expire_hours: 缓存过期时间
+        :return: (匹配结果, 命中层 l1/redis/mongo/miss)
+        """
+        cache_key = self.match_cache_key(resume_info, job_description)
+        return await self._get_or_compute(
+            f"resume_match:{cache_key}",
+            compute,
+            lambda result: self.cache_resume_match_result(resume_info, job_description, result, expire_hours, cache_key)
+        )
+
+    async def get_cached_resume_matches(self,
+                                        resume_infos: Sequence[Dict[str, Any]],
+                                        job_description: Dict[str, Any],
+                                        cache_keys: Optional[Sequence[str]] = None) -> List[Optional[Dict[str, Any]]]:
+        """
+        批量获取多份简历对同一职位的缓存匹配结果(一次往返)
+        :param resume_infos: 简历信息列表
+        :param job_description: 职位描述
+        :param cache_keys: 已计算的缓存key(match_cache_keys),为空时重新计算
+        :return: 与简历一一对应的缓存结果,未命中为 None
+        """
+        cache_keys = cache_keys or self.match_cache_keys(resume_infos, job_description)
+        return await self._get_json_many([f"resume_match:{cache_key}" for cache_key in cache_keys])
+
+    async def cache_resume_match_results(self,
+                                         resume_infos: Sequence[Dict[str, Any]],
+                                         job_description: Dict[str, Any],
+                                         match_results: Sequence[Dict[str, Any]],
+                                         expire_hours: int = 24,
+                                         cache_keys: Optional[Sequence[str]] = None) -> None:
+        """
+        批量缓存多份简历对同一职位的匹配结果
+        Redis写入合并为一次pipeline往返, MongoDB由攒批写入合并为bulk_write
+        """
+        if not resume_infos:
+            return
+        cache_keys = cache_keys or self.match_cache_keys(resume_infos, job_description)
+        for cache_key, match_result in zip(cache_keys, match_results):
+            self.l1.set(f"resume_match:{cache_key}", match_result, expire_hours * 3600)
+        # MongoDB写入先于Redis入队,Redis不可用时MongoDB层仍能取到新结果
+        now = datetime.utcnow()
+        for cache_key, resume_info, match_result in zip(cache_keys, resume_infos, match_results):
+            self.persister.upsert(
+                'match_results',
+                {'cache_key': cache_key},
+                {'$set': {
+                    'resume_info': resume_info,
+                    'job_description': job_description,
+                    'match_result': match_result,
+                    'created_at': now,
+                    'expires_at': now + timedelta(hours=expire_hours)
+                }}
+            )
+        async with self.redis_client.pipeline(transaction=False) as pipe:
+            for cache_key, match_result in zip(cache_keys, match_results):
+                pipe.setex(f"resume_match:{cache_key}", timedelta(hours=expire_hours), encode_value(match_result))
+            await pipe.execute()
+
+    async def cache_parsed_resume(self,
+                                  parsed_resume: Dict[str, Any],
+                                  expire_hours: int = 24) -> None:
+        """
+        缓存上传时构建的简历文档(文本、分词结果、句子偏移)
+        :param parsed_resume: ParsedResume.to_dict() 的结果
+        :param expire_hours: 缓存过期时间
+        """
+        document_id = parsed_resume['document_id']
+        # 持久化到 MongoDB(攒批异步写入);先于Redis入队,Redis不可用时MongoDB层仍能取到新结果
+        self.persister.upsert(
+            'parsed_resumes',
+            {'document_id': document_id},
+            {'$set': {
+                'parsed_resume': parsed_resume,
+                'created_at': datetime.utcnow(),
+                'expires_at': datetime.utcnow() + timedelta(hours=expire_hours)
+            }}
+        )
+
+        # 存储到 Redis
+        await self.redis_client.setex(
+            f"parsed_resume:{document_id}",
+            timedelta(hours=expire_hours),
+            encode_value(parsed_resume)
+        )
+
+    async def cache_upload_result(self,
+                                  upload_key: str,
+                                  upload: Dict[str, Any],
+                                  expire_hours: int = 24) -> None:
+        """
+        缓存上传文件的解析结果(按文件内容哈希去重)
+        :param upload_key: 文件哈希与抽取器指纹
+        :param upload: {'document_id': ..., 'resume_info': ...}
+        :param expire_hours: 缓存过期时间
+        """
+        self.l1.set(f"resume_upload:{upload_key}", upload, expire_hours * 3600)
+        # 持久化到 MongoDB(攒批异步写入);先于Redis入队,Redis不可用时MongoDB层仍能取到新结果
+        self.persister.upsert(
+            'resume_uploads',
+            {'upload_key': upload_key},
+            {'$set': {
+                'upload': upload,
+                'created_at': datetime.utcnow(),
+                'expires_at': datetime.utcnow() + timedelta(hours=expire_hours)
+            }}
+        )
+
+        # 存储到 Redis
+        await self.redis_client.setex(
+            f"resume_upload:{upload_key}",
+            timedelta(hours=expire_hours),
+            encode_value(upload)
+        )
+
+    async def get_or_compute_upload(self,
+                                    upload_key: str,
+                                    compute: Callable[[], Awaitable[Dict[str, Any]]],
+                                    expire_hours: int = 24) -> Tuple[Dict[str, Any], str]:
+        """
+        获取上传文件的解析结果,未命中时解析并缓存(同一文件并发上传只解析一次)
+        :param upload_key: 文件哈希与抽取器指纹
+        :param compute: 执行解析的协程函数
+        :param expire_hours: 缓存过期时间
+        :return: (解析结果, 命中层 l1/redis/mongo/miss)
+        """
+        return await self._get_or_compute(
+            f"resume_upload:{upload_key}",
+            compute,
+            lambda result: self.cache_upload_result(upload_key, result, expire_hours)
+        )
 
-        # 先从 Redis 获取
-        cached_result = self.redis_client.get(f"resume_match:{cache_key}")
-        if cached_result:
-            return json.loads(cached_result)
-        return None
+    async def get_cached_parsed_resume(self, document_id: str) -> Optional[Dict[str, Any]]:
+        """
+        获取缓存的简历文档
+        :param document_id: 文档ID
+        :return: ParsedResume.to_dict() 的结果或 None
+        """
+        return await self._get_json(f"parsed_resume:{document_id}")
+
+    async def get_cached_parsed_resumes(self, document_ids: Sequence[str]) -> List[Optional[Dict[str, Any]]]:
+        """
+        批量获取缓存的简历文档: Redis一次往返, 未命中的再一次查询MongoDB
+        :param document_ids: 文档ID列表
+        :return: 与文档ID一一对应的结果,未命中为 None
+        """
+        return await self._get_json_many([f"parsed_resume:{document_id}" for document_id in document_ids])
+
+    async def ensure_indexes(self) -> None:
+        """
+        创建查询索引和TTL索引(过期文档由MongoDB自动删除,替代定期扫描清理)
+        """
+        for collection, field, _ in MONGO_TIERS.values():
+            try:
+                await self.db[collection].create_index(field, unique=True)
+                await self.db[collection].create_index('expires_at', expireAfterSeconds=0)
+            except Exception as e:
+                logger.warning("MongoDB index error on %s:%s", collection, e)
 
-    async def clear_expired_cache(self):
+    def collect_metrics(self) -> List[MetricFamily]:
         """
-        清理过期缓存
+        /metrics 采集: L1状态与MongoDB写入队列统计
         """
+        persister = self.persister.stats()
+        return [
+            MetricFamily('resume_cache_l1_entries', 'gauge', 'Entries in the in-process L1 cache',
+                         [({}, len(self.l1))]),
+            MetricFamily('resume_cache_l1_requests_total', 'counter', 'L1 cache gets by result',
+                         [({'result': 'hit'}, self.l1.hits), ({'result': 'miss'}, self.l1.misses)]),
+            MetricFamily('resume_cache_mongo_writes_total', 'counter', 'Write-behind MongoDB upserts by outcome',
+                         [({'outcome': name}, persister[name])
+                          for name in ('enqueued', 'written', 'dropped', 'failed', 'coalesced')]),
+            MetricFamily('resume_cache_mongo_write_queue', 'gauge', 'Upserts waiting in the write-behind queue',
+                         [({}, persister['pending'])]),
+            MetricFamily('resume_cache_mongo_write_queue_bytes', 'gauge',
+                         'Estimated bytes of queued and in-flight write-behind upserts',
+                         [({}, persister['pending_bytes'])]),
+        ]
 
-        # MongoDB 清理过期文档
-        await self.resume_collection.delete_many({
-            'expires_at': {'$lt': datetime.utcnow()}
-        })
-        await self.match_result_collection.delete_many({
-            'expires_at': {'$lt': datetime.utcnow()}
-        })
 
 # 缓存服务单例
-cache_service = CacheService()
\ No newline at end of file
+cache_service = CacheService()
+metrics.describe('resume_cache_lookups_total', 'counter', 'Cache lookups by cache and tier (l1/redis/mongo/miss)')
+metrics.register_collector(cache_service.collect_metrics)
\ No newline at end of file
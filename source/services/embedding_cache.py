@@ -0,0 +1,227 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from source.utils.metrics import MetricFamily, metrics, stage
+
+logger = logging.getLogger(__name__)
+
+# 句向量缓存参数
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv('EMBEDDING_CACHE_MAX_ENTRIES', '4096'))
+EMBEDDING_CACHE_TTL_HOURS = int(os.getenv('EMBEDDING_CACHE_TTL_HOURS', '168'))
+# Redis不可用后暂停访问的秒数,避免每次编码都等待连接超时
+REDIS_RETRY_SECONDS = 30
+
+# 缓存中向量统一以float16存储
+EMBEDDING_DTYPE = np.float16
+
+
+def normalize_text(text: Optional[str]) -> str:
+    """
+    空白归一化,仅空白不同的文本共享同一向量
+    """
+    return ' '.join((text or '').split())
+
+
+def text_digest(text: str) -> str:
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
+
+class EmbeddingCache:
+    def __init__(self,
+                 max_entries: int = EMBEDDING_CACHE_MAX_ENTRIES,
+                 ttl_hours: int = EMBEDDING_CACHE_TTL_HOURS,
+                 redis_url: Optional[str] = None,
+                 use_redis: Optional[bool] = None):
+        """
+        句向量缓存: 进程内LRU + Redis,key为 模型标识 + 归一化文本摘要
+        向量以float16原始字节存储(384维每条768字节),只编码未命中的文本
+        在线程池中同步调用,因此使用同步Redis客户端
+        :param max_entries: 进程内LRU条目上限(0表示关闭)
+        :param ttl_hours: Redis过期小时数
+        :param redis_url: Redis地址,默认与缓存服务相同
+        :param use_redis: 是否使用Redis,默认读取 EMBEDDING_CACHE_REDIS(默认开启)
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_hours * 3600
+        self.redis_url = redis_url
+        if use_redis is None:
+            use_redis = os.getenv('EMBEDDING_CACHE_REDIS', '1') != '0'
+        self.use_redis = use_redis
+        self._items: 'OrderedDict[str, np.ndarray]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._redis_client = None
+        self._redis_retry_at = 0.0
+        # 计数器
+        self.l1_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+
+    @property
+    def redis_client(self):
+        if self._redis_client is None:
+            import redis
+            from source.services.cache_service import get_redis_url
+            self._redis_client = redis.Redis.from_url(
+                self.redis_url or get_redis_url(),
+                socket_timeout=float(os.getenv('REDIS_SOCKET_TIMEOUT', '2')),
+                socket_connect_timeout=float(os.getenv('REDIS_SOCKET_TIMEOUT', '2'))
+            )
+        return self._redis_client
+
+    def _redis_available(self) -> bool:
+        return self.use_redis and time.monotonic() >= self._redis_retry_at
+
+    def _redis_failed(self, e: Exception) -> None:
+        logger.warning("Embedding cache Redis error, retry in %ss:%s", REDIS_RETRY_SECONDS, e)
+        self._redis_retry_at = time.monotonic() + REDIS_RETRY_SECONDS
+
+    @staticmethod
+    def make_key(model_id: str, text: str) -> str:
+        return f"embedding:{model_id}:{text_digest(normalize_text(text))}"
+
+    def _l1_get(self, key: str) -> Optional[np.ndarray]:
+        with self._lock:
+            vector = self._items.get(key)
+            if vector is not None:
+                self._items.move_to_end(key)
+            return vector
+
+    def _l1_set(self, key: str, vector: np.ndarray) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._items[key] = vector
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+
+    def get_many(self, keys: Sequence[str], dim: int) -> List[Optional[np.ndarray]]:
+        """
+        批量读取(进程内LRU -> Redis MGET)
+        :param dim: 向量维度,长度不符的缓存值视为未命中
+        :return: 与keys对应的float16向量,未命中为None
+        """
+        vectors = [self._l1_get(key) for key in keys]
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        self.l1_hits += len(keys) - len(missing)
+        if missing and self._redis_available():
+            try:
+                values = self.redis_client.mget([keys[i] for i in missing])
+            except Exception as e:
+                self._redis_failed(e)
+                values = [None] * len(missing)
+            for i, value in zip(missing, values):
+                if value is None or len(value) != dim * EMBEDDING_DTYPE().itemsize:
+                    continue
+                vector = np.frombuffer(value, dtype=EMBEDDING_DTYPE)
+                vectors[i] = vector
+                self._l1_set(keys[i], vector)
+                self.redis_hits += 1
+        self.misses += sum(1 for vector in vectors if vector is None)
+        return vectors
+
+    def set_many(self, keys: Sequence[str], vectors: np.ndarray) -> None:
+        """
+        批量写入,Redis写入通过一次pipeline完成
+        :param vectors: (len(keys), dim) 矩阵,转为float16存储
+        """
+        vectors = np.asarray(vectors, dtype=EMBEDDING_DTYPE)
+        for key, vector in zip(keys, vectors):
+            self._l1_set(key, vector)
+        if keys and self._redis_available():
+            try:
+                pipe = self.redis_client.pipeline(transaction=False)
+                for key, vector in zip(keys, vectors):
+                    pipe.setex(key, self.ttl_seconds, vector.tobytes())
+                pipe.execute()
+            except Exception as e:
+                self._redis_failed(e)
+
+    def encode(self, engine, texts: Sequence[str], normalize: bool = False) -> np.ndarray:
+        """
+        带缓存的编码: 批量查询缓存,只对未命中且去重后的文本调用模型
+        命中与未命中的结果都经过float16取整,同一文本的得分不随缓存状态变化
+        :param engine: EmbeddingEngine
+        :param texts: 文本列表
+        :param normalize: 是否L2归一化
+        :return: float32矩阵 (len(texts), embedding_dim)
+        """
+        if isinstance(texts, str):
+            texts = [texts]
+        dim = engine.embedding_dim
+        if not texts:
+            return np.zeros((0, dim), dtype=np.float32)
+
+        keys = [self.make_key(engine.model_id, text) for text in texts]
+        cached = self.get_many(keys, dim)
+
+        # 批内重复文本只编码一次
+        pending = OrderedDict()
+        for i, vector in enumerate(cached):
+            if vector is None:
+                pending.setdefault(keys[i], normalize_text(texts[i]))
+        computed = {}
+        if pending:
+            miss_keys = list(pending)
+            with stage('inference'):
+                vectors = engine.encode(list(pending.values())).astype(EMBEDDING_DTYPE)
+            self.set_many(miss_keys, vectors)
+            computed = dict(zip(miss_keys, vectors))
+
+        embeddings = np.empty((len(texts), dim), dtype=np.float32)
+        for i, vector in enumerate(cached):
+            embeddings[i] = vector if vector is not None else computed[keys[i]]
+        if normalize:
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            embeddings /= np.clip(norms, 1e-12, None)
+        return embeddings
+
+    def encode_pooled(self, engine, texts: Sequence[str]) -> np.ndarray:
+        """
+        长文本编码: 每份文本按句子切成不超过模型长度的块,所有块一起经缓存编码,
+        各块归一化向量取平均后再归一化,整份简历都参与相似度而不只是开头部分
+        :param engine: EmbeddingEngine 或 InferenceScheduler(需提供chunk_text)
+        :param texts: 文本列表
+        :return: L2归一化的float32矩阵 (len(texts), embedding_dim)
+        """
+        if isinstance(texts, str):
+            texts = [texts]
+        chunk_lists = [engine.chunk_text(text) for text in texts]
+        chunk_vectors = self.encode(engine, [chunk for chunks in chunk_lists for chunk in chunks], normalize=True)
+
+        embeddings = np.empty((len(texts), engine.embedding_dim), dtype=np.float32)
+        start = 0
+        for i, chunks in enumerate(chunk_lists):
+            embeddings[i] = chunk_vectors[start:start + len(chunks)].mean(axis=0)
+            start += len(chunks)
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        embeddings /= np.clip(norms, 1e-12, None)
+        return embeddings
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'l1_hits': self.l1_hits,
+            'redis_hits': self.redis_hits,
+            'misses': self.misses,
+            'entries': len(self._items)
+        }
+
+    def collect_metrics(self) -> List[MetricFamily]:
+        return [
+            MetricFamily('resume_embedding_cache_lookups_total', 'counter', 'Embedding cache lookups by tier', [
+                ({'tier': 'l1'}, self.l1_hits), ({'tier': 'redis'}, self.redis_hits), ({'tier': 'miss'}, self.misses)
+            ]),
+            MetricFamily('resume_embedding_cache_entries', 'gauge', 'Vectors in the in-process embedding LRU',
+                         [({}, len(self._items))]),
+        ]
+
+
+embedding_cache = EmbeddingCache()
+metrics.register_collector(embedding_cache.collect_metrics)
@@ -0,0 +1,269 @@
+import json
+import logging
+import os
+import platform
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from source.services.model_registry import DEFAULT_MODEL_PATH, model_registry
+from source.services.parsed_resume import SENTENCE_PATTERN
+
+logger = logging.getLogger(__name__)
+
+# 按CPU指令集选择的ONNX模型变体(由优到劣)
+ONNX_VARIANTS = [
+    ('avx512_vnni', 'model_qint8_avx512_vnni.onnx'),
+    ('avx512', 'model_qint8_avx512.onnx'),
+    ('avx2', 'model_quint8_avx2.onnx'),
+]
+ARM64_VARIANT = 'model_qint8_arm64.onnx'
+# 无量化变体可用时的回退顺序(O4为GPU半精度,CPU不使用)
+FALLBACK_VARIANTS = ['model_O3.onnx', 'model_O2.onnx', 'model_O1.onnx', 'model.onnx']
+# 长文本分块编码时每份文本最多编码的块数(超出部分丢弃),限制超长简历的推理开销
+EMBEDDING_MAX_CHUNKS = int(os.getenv('EMBEDDING_MAX_CHUNKS', '64'))
+
+
+def detect_cpu_features() -> set:
+    """
+    读取当前CPU支持的指令集标志
+    :return: 指令集标志集合(如 avx2、avx512_vnni)
+    """
+    features = set()
+    machine = platform.machine().lower()
+    if machine in ('arm64', 'aarch64'):
+        features.add('arm64')
+    try:
+        with open('/proc/cpuinfo', 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.startswith('flags'):
+                    flags = line.split(':', 1)[1].split()
+                    features.update(flags)
+                    break
+    except OSError:
+        pass
+    # avx512f 作为 avx512 的判断依据
+    if 'avx512f' in features and 'avx512bw' in features:
+        features.add('avx512')
+    return features
+
+
+def _is_lfs_pointer(path: str) -> bool:
+    """
+    判断文件是否为未拉取的git-lfs指针文件
+    """
+    try:
+        if os.path.getsize(path) > 1024:
+            return False
+        with open(path, 'rb') as f:
+            return f.read(40).startswith(b'version https://git-lfs')
+    except OSError:
+        return True
+
+
+def select_onnx_variant(model_path: str = DEFAULT_MODEL_PATH,
+                        features: Optional[set] = None) -> str:
+    """
+    根据CPU指令集选择最优的ONNX模型文件
+    可通过环境变量 EMBEDDING_ONNX_VARIANT 指定文件名
+    :param model_path: 模型目录
+    :param features: CPU指令集标志,默认自动检测
+    :return: ONNX模型文件路径
+    """
+    onnx_dir = os.path.join(model_path, 'onnx')
+    override = os.getenv('EMBEDDING_ONNX_VARIANT')
+    if override:
+        return os.path.join(onnx_dir, override)
+
+    if features is None:
+        features = detect_cpu_features()
+
+    candidates = []
+    if 'arm64' in features:
+        candidates.append(ARM64_VARIANT)
+    else:
+        candidates.extend(name for flag, name in ONNX_VARIANTS if flag in features)
+    candidates.extend(FALLBACK_VARIANTS)
+
+    for name in candidates:
+        path = os.path.join(onnx_dir, name)
+        if os.path.exists(path) and not _is_lfs_pointer(path):
+            return path
+    raise FileNotFoundError(f"No usable ONNX model found in {onnx_dir}")
+
+
+class EmbeddingEngine:
+    def __init__(self, model_path: str = DEFAULT_MODEL_PATH, onnx_file: Optional[str] = None):
+        """
+        基于ONNX Runtime的句向量引擎(不依赖PyTorch)
+        :param model_path: sentence-transformers模型目录
+        :param onnx_file: 指定ONNX文件,默认按CPU指令集自动选择
+        """
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        self.model_path = model_path
+        self.onnx_file = onnx_file or select_onnx_variant(model_path)
+
+        # 池化配置
+        pooling_config = self._load_json(os.path.join(model_path, '1_Pooling', 'config.json'))
+        self.embedding_dim = pooling_config.get('word_embedding_dimension', 384)
+        self.pooling_mode = 'mean'
+        if pooling_config.get('pooling_mode_cls_token'):
+            self.pooling_mode = 'cls'
+        elif pooling_config.get('pooling_mode_max_tokens'):
+            self.pooling_mode = 'max'
+        elif pooling_config.get('pooling_mode_mean_sqrt_len_tokens'):
+            self.pooling_mode = 'mean_sqrt_len'
+
+        # 分词器
+        st_config = self._load_json(os.path.join(model_path, 'sentence_bert_config.json'))
+        self.max_seq_length = st_config.get('max_seq_length', 128)
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_path, 'tokenizer.json'))
+        self.tokenizer.enable_truncation(max_length=self.max_seq_length)
+        pad_id = self.tokenizer.token_to_id('<pad>')
+        self.tokenizer.enable_padding(pad_id=pad_id if pad_id is not None else 1, pad_token='<pad>')
+        # 分块时计数用的分词器(不截断、不补齐)
+        self.chunk_tokenizer = Tokenizer.from_file(os.path.join(model_path, 'tokenizer.json'))
+        self.chunk_tokenizer.no_truncation()
+        self.chunk_tokenizer.no_padding()
+
+        # 推理会话
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        num_threads = int(os.getenv('EMBEDDING_NUM_THREADS', '0'))
+        if num_threads > 0:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(
+            self.onnx_file,
+            sess_options=options,
+            providers=['CPUExecutionProvider']
+        )
+        self.input_names = {item.name for item in self.session.get_inputs()}
+        # 模型标识(句向量缓存key的一部分),模型文件或池化配置变化时缓存自然失效
+        self.model_id = '/'.join([
+            os.path.basename(os.path.normpath(model_path)),
+            os.path.splitext(os.path.basename(self.onnx_file))[0],
+            self.pooling_mode,
+            str(self.max_seq_length)
+        ])
+
+    @staticmethod
+    def _load_json(path: str) -> Dict:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _pool(self, token_embeddings: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+        """
+        按 1_Pooling/config.json 对token向量池化
+        """
+        if self.pooling_mode == 'cls':
+            return token_embeddings[:, 0]
+        mask = attention_mask[:, :, None].astype(np.float32)
+        if self.pooling_mode == 'max':
+            masked = np.where(mask > 0, token_embeddings, -1e9)
+            return masked.max(axis=1)
+        summed = (token_embeddings * mask).sum(axis=1)
+        counts = np.clip(mask.sum(axis=1), 1e-9, None)
+        if self.pooling_mode == 'mean_sqrt_len':
+            return summed / np.sqrt(counts)
+        return summed / counts
+
+    def _encode_batch(self, texts: Sequence[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(list(texts))
+        input_ids = np.asarray([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.asarray([e.attention_mask for e in encodings], dtype=np.int64)
+        feeds = {'input_ids': input_ids, 'attention_mask': attention_mask}
+        if 'token_type_ids' in self.input_names:
+            feeds['token_type_ids'] = np.zeros_like(input_ids)
+        token_embeddings = self.session.run(None, feeds)[0]
+        return self._pool(token_embeddings, attention_mask)
+
+    def encode(self, texts: Sequence[str], batch_size: int = 32, normalize: bool = False) -> np.ndarray:
+        """
+        文本编码为句向量
+        :param texts: 文本列表
+        :param batch_size: 批大小
+        :param normalize: 是否L2归一化
+        :return: float32矩阵 (len(texts), embedding_dim)
+        """
+        if isinstance(texts, str):
+            texts = [texts]
+        if not texts:
+            return np.zeros((0, self.embedding_dim), dtype=np.float32)
+
+        # 按长度排序分批,减少padding浪费
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        embeddings = np.empty((len(texts), self.embedding_dim), dtype=np.float32)
+        for start in range(0, len(order), batch_size):
+            indices = order[start:start + batch_size]
+            embeddings[indices] = self._encode_batch([texts[i] or '' for i in indices])
+
+        if normalize:
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            embeddings /= np.clip(norms, 1e-12, None)
+        return embeddings
+
+    def chunk_text(self, text: str, max_chunks: int = EMBEDDING_MAX_CHUNKS) -> List[str]:
+        """
+        按句子把文本切成不超过max_seq_length个token的块(超过模型长度的部分在编码时会被截断)
+        相邻句子合并到同一块,单句超长时按token边界切开
+        :param text: 文本
+        :param max_chunks: 最多返回的块数
+        :return: 文本块列表,空文本返回 ['']
+        """
+        # 预留 <s> </s> 两个特殊token
+        budget = max(self.max_seq_length - 2, 1)
+        pieces = [
+            match.group().strip()
+            for line in (text or '').splitlines()
+            for match in SENTENCE_PATTERN.finditer(line)
+            if match.group().strip()
+        ]
+        if not pieces:
+            return ['']
+
+        chunks: List[str] = []
+        current: List[str] = []
+        current_tokens = 0
+        for piece, encoding in zip(pieces, self.chunk_tokenizer.encode_batch(pieces, add_special_tokens=False)):
+            token_count = len(encoding.ids)
+            if current and current_tokens + token_count > budget:
+                chunks.append(' '.join(current))
+                current, current_tokens = [], 0
+            if token_count > budget:
+                offsets = encoding.offsets
+                for start in range(0, token_count, budget):
+                    window = offsets[start:start + budget]
+                    chunks.append(piece[window[0][0]:window[-1][1]])
+                continue
+            current.append(piece)
+            current_tokens += token_count
+        if current:
+            chunks.append(' '.join(current))
+        return chunks[:max_chunks]
+
+
+model_registry.register("embedding_engine", EmbeddingEngine)
+
+_engine_unavailable = False
+
+
+def get_embedding_engine() -> Optional[EmbeddingEngine]:
+    """
+    获取进程共享的句向量引擎
+    SEMANTIC_BACKEND=tfidf 或依赖/模型文件缺失时返回None,调用方回退到TF-IDF
+    """
+    global _engine_unavailable
+    if _engine_unavailable or os.getenv('SEMANTIC_BACKEND', 'auto').lower() == 'tfidf':
+        return None
+    try:
+        return model_registry.get("embedding_engine")
+    except Exception as e:
+        # 只报告一次,避免每个请求重复尝试加载
+        logger.warning("Embedding engine unavailable, fallback to TF-IDF:%s", e)
+        _engine_unavailable = True
+        return None
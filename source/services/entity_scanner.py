@@ -0,0 +1,148 @@
+import re
+from typing import Dict, Iterator, List, NamedTuple, Optional
+
+# 中文字符
+CJK = r'[\u4e00-\u9fa5]'
+
+# 各实体的正则(与逐项 re.search/re.findall 的结果保持一致)
+ENTITY_PATTERNS = {
+    'NAME': CJK + r'{2,4}',
+    'PHONE': r'1[3-9]\d{9}',
+    'EMAIL': r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}',
+    'EDUCATION': r'大专|本科|硕士|博士|研究生',
+    'WORK_YEAR': r'\d{1,2}(?=年工作经验)',
+    'SCHOOL': CJK + r'+(?:大学|学院|学校)',
+    'MAJOR': CJK + r'+(?:专业|系)',
+    'COMPANY': CJK + r'+(?:公司|集团|企业)',
+    'POSITION': CJK + r'+(?:工程师|经理|总监|专员)',
+}
+
+# 在中文连续片段内识别的实体(各正则均以中文字符开头,不会跨越片段)
+RUN_ENTITIES = ('SCHOOL', 'MAJOR', 'COMPANY', 'POSITION')
+
+# 片段关键词: 不含任何关键词的中文片段无需再做实体匹配
+RUN_KEYWORDS = re.compile(
+    '大学|学院|学校|专业|系|公司|集团|企业|工程师|经理|总监|专员|' + ENTITY_PATTERNS['EDUCATION']
+)
+
+# 字段标签不作为姓名(如"姓名:张三"中的"姓名"、"性别男"中的"性别")
+NAME_LABELS = re.compile(
+    '姓名|名字|性别|年龄|民族|籍贯|电话号码|手机号码|电话|手机|邮箱|出生年月|政治面貌|求职意向|个人简历|简历'
+)
+
+
+def _build_scanner_pattern() -> re.Pattern:
+    """
+    把所有实体合并为一个带命名分组的交替正则
+    - EMAIL/PHONE/WORK_YEAR 用零宽断言捕获,不消耗字符,彼此重叠时都能被识别
+      (邮箱与电话可能起点相同,合并在同一分支内)
+    - 中文连续片段整体匹配一次,片段内的实体在片段上单独判断
+    """
+    alternatives = [
+        f"(?=(?P<EMAIL>{ENTITY_PATTERNS['EMAIL']}))(?=(?P<EMAIL_PHONE>{ENTITY_PATTERNS['PHONE']}))?",
+        f"(?=(?P<PHONE>{ENTITY_PATTERNS['PHONE']}))",
+        f"(?=(?P<WORK_YEAR>{ENTITY_PATTERNS['WORK_YEAR']}))",
+        f"(?P<RUN>{CJK}+)",
+    ]
+    return re.compile('|'.join(alternatives))
+
+
+class Span(NamedTuple):
+    type: str
+    value: str
+    start: int
+    end: int
+
+
+class EntityScanner:
+    # 编译一次,所有实例共享
+    pattern = _build_scanner_pattern()
+    run_patterns = [(name, re.compile(ENTITY_PATTERNS[name])) for name in RUN_ENTITIES]
+    education_pattern = re.compile(ENTITY_PATTERNS['EDUCATION'])
+
+    _EMAIL = pattern.groupindex['EMAIL']
+    _EMAIL_PHONE = pattern.groupindex['EMAIL_PHONE']
+    _PHONE = pattern.groupindex['PHONE']
+    _WORK_YEAR = pattern.groupindex['WORK_YEAR']
+    _RUN = pattern.groupindex['RUN']
+
+    def scan(self, text: str) -> Iterator[Span]:
+        """
+        单次扫描文本,按位置顺序产出带类型和偏移的实体片段
+        NAME 只产出第一个(与 re.search 语义一致,跳过以字段标签开头的片段中的标签部分),其余类型产出全部出现
+        :param text: 简历文本
+        :return: Span迭代器
+        """
+        # 零宽匹配会在同一实体内部的每个位置重复命中,按类型只保留不重叠的匹配
+        email_end = phone_end = work_year_end = 0
+        name_found = False
+        for match in self.pattern.finditer(text):
+            index = match.lastindex
+            if index == self._RUN:
+                run = match.group(index)
+                start = match.start()
+                if not name_found:
+                    label = NAME_LABELS.match(run)
+                    name_start = label.end() if label is not None else 0
+                    if len(run) - name_start >= 2:
+                        name_found = True
+                        name = run[name_start:name_start + 4]
+                        yield Span('NAME', name, start + name_start, start + name_start + len(name))
+                if RUN_KEYWORDS.search(run) is None:
+                    continue
+                education = self.education_pattern.search(run)
+                if education is not None:
+                    yield Span('EDUCATION', education.group(), start + education.start(), start + education.end())
+                for name, run_pattern in self.run_patterns:
+                    entity = run_pattern.match(run)
+                    if entity is not None:
+                        yield Span(name, entity.group(), start, start + entity.end())
+            elif index == self._WORK_YEAR:
+                if match.start(index) >= work_year_end:
+                    work_year_end = match.end(index)
+                    yield Span('WORK_YEAR', match.group(index), match.start(index), work_year_end)
+            elif index == self._PHONE:
+                if match.start(index) >= phone_end:
+                    phone_end = match.end(index)
+                    yield Span('PHONE', match.group(index), match.start(index), phone_end)
+            else:
+                if match.start(self._EMAIL) >= email_end:
+                    email_end = match.end(self._EMAIL)
+                    yield Span('EMAIL', match.group(self._EMAIL), match.start(self._EMAIL), email_end)
+                if index == self._EMAIL_PHONE and match.start(index) >= phone_end:
+                    phone_end = match.end(index)
+                    yield Span('PHONE', match.group(index), match.start(index), phone_end)
+
+    def collect(self, text: str) -> 'ScanResult':
+        """
+        扫描并按实体类型归类
+        """
+        return ScanResult(list(self.scan(text)))
+
+
+class ScanResult:
+    def __init__(self, spans: List[Span]):
+        """
+        扫描结果,按类型索引
+        """
+        self.spans = spans
+        self.by_type: Dict[str, List[Span]] = {}
+        for span in spans:
+            self.by_type.setdefault(span.type, []).append(span)
+
+    def first(self, entity_type: str) -> Optional[str]:
+        """
+        该类型第一个实体的值(等价于 re.search)
+        """
+        spans = self.by_type.get(entity_type)
+        return spans[0].value if spans else None
+
+    def all(self, entity_type: str) -> List[str]:
+        """
+        该类型所有实体的值(等价于 re.findall)
+        """
+        return [span.value for span in self.by_type.get(entity_type, [])]
+
+
+# 扫描器单例
+entity_scanner = EntityScanner()
@@ -0,0 +1,260 @@
+import bisect
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from source.services.embedding_engine import get_embedding_engine
+from source.utils.metrics import MetricFamily, metrics
+
+# 攒批参数: 单批最大行数与最长等待毫秒数
+INFERENCE_BATCH_SIZE = int(os.getenv('INFERENCE_BATCH_SIZE', '32'))
+INFERENCE_MAX_WAIT_MS = float(os.getenv('INFERENCE_MAX_WAIT_MS', '5'))
+# 按文本长度(字符)分桶,同一批内长度相近,减少padding浪费
+LENGTH_BUCKETS = (32, 64, 128, 256)
+# 批大小直方图的上界
+HISTOGRAM_BOUNDS = (1, 2, 4, 8, 16, 32, 64, 128)
+
+_STOP = object()
+
+
+class _Request:
+    __slots__ = ('texts', 'future', 'result', 'remaining')
+
+    def __init__(self, texts: List[str], dim: int):
+        self.texts = texts
+        self.future: Future = Future()
+        self.result = np.empty((len(texts), dim), dtype=np.float32)
+        self.remaining = len(texts)
+
+
+class InferenceScheduler:
+    def __init__(self,
+                 engine,
+                 max_batch_size: int = INFERENCE_BATCH_SIZE,
+                 max_wait_ms: float = INFERENCE_MAX_WAIT_MS,
+                 length_buckets: Sequence[int] = LENGTH_BUCKETS):
+        """
+        推理攒批调度器: 并发请求各自提交的编码行按长度分桶合批,由专用工作线程执行
+        某个桶凑满max_batch_size行或最早的行等待超过max_wait_ms时执行该桶
+        接口与EmbeddingEngine一致(embedding_dim/model_id/encode/chunk_text),可直接替换
+        :param engine: EmbeddingEngine
+        :param max_batch_size: 单批最大行数
+        :param max_wait_ms: 最长等待毫秒数
+        :param length_buckets: 长度分桶边界(字符数)
+        """
+        self.engine = engine
+        self.embedding_dim = engine.embedding_dim
+        self.model_id = engine.model_id
+        self.max_seq_length = engine.max_seq_length
+        self.chunk_text = engine.chunk_text
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.length_buckets = tuple(length_buckets)
+        self._queue: 'queue.Queue' = queue.Queue()
+        # 桶序号 -> [(请求, 行号, 文本, 入队时间)]
+        self._buckets: Dict[int, List[tuple]] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        # 计数器
+        self.requests = 0
+        self.rows = 0
+        self.batches = 0
+        self.failed_batches = 0
+        self.pending_rows = 0
+        self.batch_size_histogram = {bound: 0 for bound in HISTOGRAM_BOUNDS}
+        self.batch_size_histogram['+Inf'] = 0
+
+    def _ensure_started(self) -> None:
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name='inference-scheduler', daemon=True)
+                    self._thread.start()
+
+    def submit(self, texts: Sequence[str]) -> Future:
+        """
+        提交一组文本
+        :return: Future,结果为float32矩阵 (len(texts), embedding_dim),行序与texts一致
+        """
+        request = _Request([text or '' for text in texts], self.embedding_dim)
+        if not request.texts:
+            request.future.set_result(request.result)
+            return request.future
+        self._ensure_started()
+        with self._stats_lock:
+            self.requests += 1
+            self.pending_rows += len(request.texts)
+        self._queue.put(request)
+        return request.future
+
+    def encode(self, texts: Sequence[str], batch_size: Optional[int] = None, normalize: bool = False) -> np.ndarray:
+        """
+        同步编码(在线程池中调用),阻塞到所属批次完成
+        :param batch_size: 为与EmbeddingEngine.encode兼容而保留,批大小由调度器决定
+        """
+        if isinstance(texts, str):
+            texts = [texts]
+        embeddings = self.submit(texts).result()
+        if normalize:
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            embeddings = embeddings / np.clip(norms, 1e-12, None)
+        return embeddings
+
+    def stop(self) -> None:
+        """
+        执行完已提交的行后停止工作线程
+        """
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join()
+            self._thread = None
+
+    def _bucket_of(self, text: str) -> int:
+        return bisect.bisect_left(self.length_buckets, len(text))
+
+    def _next_timeout(self) -> Optional[float]:
+        if not self._buckets:
+            return None
+        oldest = min(rows[0][3] for rows in self._buckets.values())
+        return max(oldest + self.max_wait - time.monotonic(), 0.0)
+
+    def _collect(self, first) -> bool:
+        """
+        把第一个请求及此刻已排队的请求拆行放入各长度桶
+        :return: 是否收到停止标记
+        """
+        items = [first]
+        for _ in range(self._queue.qsize()):
+            try:
+                items.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        now = time.monotonic()
+        stopping = False
+        for item in items:
+            if item is _STOP:
+                stopping = True
+                continue
+            for i, text in enumerate(item.texts):
+                self._buckets.setdefault(self._bucket_of(text), []).append((item, i, text, now))
+        return stopping
+
+    def _run(self) -> None:
+        while True:
+            try:
+                stopping = self._collect(self._queue.get(timeout=self._next_timeout()))
+            except queue.Empty:
+                stopping = False
+
+            now = time.monotonic()
+            for bucket in list(self._buckets):
+                rows = self._buckets[bucket]
+                while rows and (stopping or len(rows) >= self.max_batch_size
+                                or now - rows[0][3] >= self.max_wait):
+                    batch, rows = rows[:self.max_batch_size], rows[self.max_batch_size:]
+                    self._execute(batch)
+                if rows:
+                    self._buckets[bucket] = rows
+                else:
+                    del self._buckets[bucket]
+            if stopping:
+                return
+
+    def _execute(self, batch: List[tuple]) -> None:
+        self.batches += 1
+        self.rows += len(batch)
+        with self._stats_lock:
+            self.pending_rows -= len(batch)
+        index = bisect.bisect_left(HISTOGRAM_BOUNDS, len(batch))
+        self.batch_size_histogram[HISTOGRAM_BOUNDS[index] if index < len(HISTOGRAM_BOUNDS) else '+Inf'] += 1
+        try:
+            embeddings = self.engine.encode([text for _, _, text, _ in batch], batch_size=len(batch))
+        except Exception as e:
+            self.failed_batches += 1
+            for request, _, _, _ in batch:
+                if not request.future.done():
+                    request.future.set_exception(e)
+            return
+        for (request, i, _, _), vector in zip(batch, embeddings):
+            if request.future.done():
+                continue
+            request.result[i] = vector
+            request.remaining -= 1
+            if request.remaining == 0:
+                request.future.set_result(request.result)
+
+    def collect_metrics(self) -> List[MetricFamily]:
+        bounds = [bound for bound in self.batch_size_histogram if bound != '+Inf']
+        counts = list(self.batch_size_histogram.values())
+        cumulative = [sum(counts[:i + 1]) for i in range(len(counts))]
+        return [
+            MetricFamily('resume_inference_queue_depth', 'gauge', 'Rows waiting for an inference batch',
+                         [({}, self.pending_rows)]),
+            MetricFamily('resume_inference_batch_size', 'histogram', 'Rows per inference batch',
+                         [({}, (bounds, cumulative, self.rows, self.batches))]),
+            MetricFamily('resume_inference_failed_batches_total', 'counter', 'Inference batches that raised',
+                         [({}, self.failed_batches)]),
+        ]
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            'requests': self.requests,
+            'rows': self.rows,
+            'batches': self.batches,
+            'failed_batches': self.failed_batches,
+            'queue_depth': self.pending_rows,
+            'avg_batch_size': round(self.rows / self.batches, 2) if self.batches else 0,
+            'batch_size_histogram': {str(bound): count for bound, count in self.batch_size_histogram.items()}
+        }
+
+
+_scheduler: Optional[InferenceScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def is_scheduler_enabled() -> bool:
+    return os.getenv('INFERENCE_SCHEDULER', '1') != '0'
+
+
+def get_inference_scheduler() -> Optional[InferenceScheduler]:
+    """
+    获取进程共享的推理调度器,句向量引擎不可用时返回None
+    """
+    global _scheduler
+    if _scheduler is None:
+        engine = get_embedding_engine()
+        if engine is None:
+            return None
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = InferenceScheduler(engine)
+    return _scheduler
+
+
+def get_embedding_encoder():
+    """
+    句向量编码入口: 默认经调度器与并发请求合批, INFERENCE_SCHEDULER=0 时直接调用引擎
+    :return: InferenceScheduler 或 EmbeddingEngine,不可用时返回None
+    """
+    if is_scheduler_enabled():
+        return get_inference_scheduler()
+    return get_embedding_engine()
+
+
+def collect_scheduler_metrics() -> List[MetricFamily]:
+    # 调度器尚未创建时不触发模型加载
+    return _scheduler.collect_metrics() if _scheduler is not None else []
+
+
+metrics.register_collector(collect_scheduler_metrics)
+
+
+def shutdown_inference_scheduler() -> None:
+    if _scheduler is not None:
+        _scheduler.stop()
@@ -1,36 +1,70 @@
-import re
-import torch
-from transformers import AutoTokenizer, AutoModelForTokenClassification
-from typing import Dict, List, Any
+import logging
+from typing import Dict, List, Any, Optional
+
+from source.services.entity_scanner import ENTITY_PATTERNS, entity_scanner
+from source.services.model_registry import (
+    DEFAULT_MODEL_PATH,
+    model_registry,
+    register_ner_model,
+)
+from source.services.resume_sections import SECTION_SKILLS, ResumeScan, SectionedScan, scan_sections
+from source.services.skill_taxonomy import get_skill_taxonomy
+from source.utils.metrics import timed
+
+logger = logging.getLogger(__name__)
+
+# 抽取逻辑版本,抽取规则或输出结构变化时递增,使上传去重缓存失效
+EXTRACTOR_VERSION = 2
 
 class ResumeInfoExtractor:
-    def __init__(self, model_path="source/paraphrase-multilingual-MiniLM-L12-v2"):
+    def __init__(self, model_path=DEFAULT_MODEL_PATH):
         """
-        初始化NER模型
+        初始化抽取器
+        NER模型由注册表按需加载,纯正则抽取不会触碰torch
         """
-        self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
         # 后续采用文本模型进行提取，目前修改中
         if not model_path:
-            model_path = "source/paraphrase-multilingual-MiniLM-L12-v2"
-        self.tokenizer = AutoTokenizer.from_pretrained(model_path)
-        self.model = AutoModelForTokenClassification.from_pretrained(model_path).to(self.device)
-
-        # 自定义实体类型
-        self.entity_types = {
-            'NAME': r'([\u4e00-\u9fa5]{2,4})',
-            'PHONE': r'(1[3-9]\d{9})',
-            'EMAIL': r'([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})',
-            'EDUCATION': r'(大专|本科|硕士|博士|研究生)',
-            'WORK_YEAR': r'(\d{1,2})年工作经验'
-        }
+            model_path = DEFAULT_MODEL_PATH
+        self.model_path = model_path
+        self._tokenizer_name, self._model_name = register_ner_model(model_path)
+
+        # 自定义实体类型(合并编译为单次扫描的实体扫描器)
+        self.entity_types = ENTITY_PATTERNS
+        self.scanner = entity_scanner
+
+    def scan(self, text: str) -> ResumeScan:
+        """
+        按段落标题切分后扫描,各字段只取所在段落的实体(段落中没有时回退到全文)
+        没有识别到段落标题时单次扫描全文
+        """
+        return scan_sections(text, self.scanner)
+
+    @property
+    def tokenizer(self):
+        """
+        NER分词器(首次访问时加载,进程内共享)
+        """
+        return model_registry.get(self._tokenizer_name)
+
+    @property
+    def model(self):
+        """
+        NER模型(首次访问时加载,进程内共享)
+        """
+        return model_registry.get(self._model_name)
+
+    @property
+    def device(self):
+        return next(self.model.parameters()).device
 
-    def extract_basic_info(self, text: str) -> Dict[str, Any]:
+    def extract_basic_info(self, text: str, scan: Optional[ResumeScan] = None) -> Dict[str, Any]:
         """
         提取基本信息
+        :param scan: 已有的扫描结果,为空时扫描text
         """
         #确保text是字符串
         if not isinstance(text, str):
-            print(f"Invalid text type in extract_basic_info:{type(text)}")
+            logger.warning("Invalid text type in extract_basic_info:%s", type(text))
             text = str(text)
         if not text:
             return {
@@ -40,19 +74,18 @@ class ResumeInfoExtractor:
             }
         info = {}
         try:
+            if scan is None:
+                scan = self.scan(text)
             # 姓名提取
-            name_match = re.search(self.entity_types['NAME'], text)
-            info['name'] = name_match.group(1) if name_match else None
+            info['name'] = scan.first('NAME')
 
             # 电话提取
-            phone_match = re.search(self.entity_types['PHONE'], text)
-            info['phone'] = phone_match.group(1) if phone_match else None
+            info['phone'] = scan.first('PHONE')
 
             # 邮箱提取
-            email_match = re.search(self.entity_types['EMAIL'], text)
-            info['email'] = email_match.group(1) if email_match else None
+            info['email'] = scan.first('EMAIL')
         except Exception as e:
-            print(f"Error in extract_basic_info:{e}")
+            logger.error("Error in extract_basic_info:%s", e)
             info = {
                 'name':None,
                 'phone':None,
@@ -60,39 +93,38 @@ class ResumeInfoExtractor:
             }
         return info
 
-    def extract_education_info(self, text: str) -> Dict[str, Any]:
+    def extract_education_info(self, text: str, scan: Optional[ResumeScan] = None) -> Dict[str, Any]:
         """
         提取教育背景信息
+        :param scan: 已有的扫描结果,为空时扫描text
         """
+        if scan is None:
+            scan = self.scan(text)
         edu_info = {}
         # 学历提取
-        edu_match = re.search(self.entity_types['EDUCATION'], text)
-        edu_info['education_level'] = edu_match.group(1) if edu_match else None
+        edu_info['education_level'] = scan.first('EDUCATION')
 
-        # 学校和专业正则(示例)
-        school_pattern = r'([\u4e00-\u9fa5]+(?:大学|学院|学校))'
-        major_pattern = r'([\u4e00-\u9fa5]+(?:专业|系))'
-        school_match = re.search(school_pattern, text)
-        major_match = re.search(major_pattern, text)
-        edu_info['school'] = school_match.group(1) if school_match else None
-        edu_info['major'] = major_match.group(1) if major_match else None
+        # 学校和专业
+        edu_info['school'] = scan.first('SCHOOL')
+        edu_info['major'] = scan.first('MAJOR')
 
         return edu_info
 
-    def extract_work_experience(self, text: str) -> List[Dict[str, Any]]:
+    def extract_work_experience(self, text: str, scan: Optional[ResumeScan] = None) -> List[Dict[str, Any]]:
         """
         提取工作经历
+        :param scan: 已有的扫描结果,为空时扫描text
         """
+        if scan is None:
+            scan = self.scan(text)
 
         # 工作经验年限提取
-        work_year_match = re.search(self.entity_types['WORK_YEAR'], text)
-        work_years = int(work_year_match.group(1)) if work_year_match else 0
+        work_year = scan.first('WORK_YEAR')
+        work_years = int(work_year) if work_year else 0
 
         # 公司和职位提取
-        company_pattern = r'([\u4e00-\u9fa5]+(?:公司|集团|企业))'
-        position_pattern = r'([\u4e00-\u9fa5]+(?:工程师|经理|总监|专员))'
-        companies = re.findall(company_pattern, text)
-        positions = re.findall(position_pattern, text)
+        companies = scan.all('COMPANY')
+        positions = scan.all('POSITION')
         work_experiences = []
 
         for i in range(min(len(companies), len(positions))):
@@ -105,28 +137,29 @@ class ResumeInfoExtractor:
             'work_experiences': work_experiences
         }
 
-    def extract_skills(self, text: str, top_n: int = 5) -> List[str]:
+    def extract_skills(self, text: str, top_n: int = 5, scan: Optional[ResumeScan] = None) -> List[str]:
         """
         技能关键词提取
+        :param scan: 分段扫描结果,有技能段落时优先取其中的技能,不足top_n时由全文补齐
         """
 
-        # 技能关键词库
-        skill_keywords = [
-            'Python', 'Java', 'C++', 'JavaScript', 'React', 'Vue',
-            '机器学习', '数据分析', '深度学习', 'Docker', 'Kubernetes'
-        ]
-
-        # 从文本中找出匹配的技能
-        skills = [skill for skill in skill_keywords if skill in text]
+        # 技能词表自动机一次扫描,别名归一为规范名
+        taxonomy = get_skill_taxonomy()
+        skills = []
+        if isinstance(scan, SectionedScan):
+            skills = taxonomy.extract(scan.text_of((SECTION_SKILLS,)))
+        if len(skills) < top_n:
+            skills.extend(skill for skill in taxonomy.extract(text) if skill not in skills)
         return skills[:top_n]
 
+    @timed('extract')
     def extract_full_resume_info(self, text: str) -> Dict[str, Any]:
         """
         综合信息提取
         """
         # 确保text是字符串
         if not isinstance(text, str):
-            print(f"Invalid text type in extract_basic_info:{type(text)}")
+            logger.warning("Invalid text type in extract_basic_info:%s", type(text))
             text = str(text)
         if not text:
             return {
@@ -136,14 +169,16 @@ class ResumeInfoExtractor:
                 'skills':[]
             }
         try:
+            # 全文切分段落后只扫描一次,各抽取方法消费同一份实体片段
+            scan = self.scan(text)
             return {
-                'basic_info': self.extract_basic_info(text),
-                'education_info': self.extract_education_info(text),
-                'work_experience': self.extract_work_experience(text),
-                'skills': self.extract_skills(text)
+                'basic_info': self.extract_basic_info(text, scan),
+                'education_info': self.extract_education_info(text, scan),
+                'work_experience': self.extract_work_experience(text, scan),
+                'skills': self.extract_skills(text, scan=scan)
             }
         except Exception as e:
-            print(f"Error in extract_full_resume_info:{e}")
+            logger.error("Error in extract_full_resume_info:%s", e)
             return {
                 'basic_info': {},
                 'education_info': {},
@@ -152,13 +187,24 @@ class ResumeInfoExtractor:
             }
 
 
+# 抽取器为进程级单例,由注册表统一管理
+model_registry.register("resume_extractor", ResumeInfoExtractor)
+
+
+def get_resume_extractor() -> ResumeInfoExtractor:
+    """
+    获取进程共享的简历信息抽取器
+    """
+    return model_registry.get("resume_extractor")
+
+
 def process_resume(text: str)->Dict[str,Any]:
     #如果resume_info已经是提取后的字典，直接返回
     if all(key in text for key in ['basic_info','education_info','work_experience','skills']):
         return text
 
     if not text or not isinstance(text,str):
-        print(f"Invalid text input:{text}")
+        logger.warning("Invalid text input:%s", text)
         return {
             'basic_info':{},
             'education_info':{},
@@ -167,10 +213,10 @@ def process_resume(text: str)->Dict[str,Any]:
         }
 
     try:
-        extractor = ResumeInfoExtractor()
+        extractor = get_resume_extractor()
         return extractor.extract_full_resume_info(text)
     except Exception as e:
-        print(f"Error in processing resume:{e}")
+        logger.error("Error in processing resume:%s", e)
         return {
             'basic_info': {},
             'education_info': {},
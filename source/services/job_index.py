@@ -0,0 +1,263 @@
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from source.services.embedding_cache import embedding_cache
+from source.services.inference_scheduler import get_embedding_encoder
+from source.services.parsed_resume import flatten_text, resume_text_of
+from source.services.resume_matcher import ResumeMatcher
+
+# 哈希向量维度(句向量引擎不可用时使用)
+HASHING_DIM = 1024
+# 分块计算相似度,避免float16矩阵整体转换为float32
+SCORE_CHUNK_ROWS = 16384
+
+
+class _HashingEncoder:
+    def __init__(self, dim: int = HASHING_DIM):
+        """
+        无状态的jieba分词哈希TF向量,可持久化且无需拟合
+        """
+        from sklearn.feature_extraction.text import HashingVectorizer
+        from source.utils.jieba_cache import get_jieba
+        jieba = get_jieba()
+        self.dim = dim
+        self.vectorizer = HashingVectorizer(
+            n_features=dim,
+            tokenizer=lambda text: [w for w in jieba.cut(text) if w.strip()],
+            token_pattern=None,
+            lowercase=True,
+            alternate_sign=False,
+            norm='l2'
+        )
+
+    def encode(self, texts: List[str], batch_size: int = 256) -> np.ndarray:
+        return self.vectorizer.transform(texts).toarray().astype(np.float32)
+
+
+class JobIndex:
+    def __init__(self, index_dir: str, dtype: str = 'float16'):
+        """
+        职位向量索引
+        职位向量保存在磁盘上的内存映射矩阵中,元数据按行追加到 jobs.jsonl
+        :param index_dir: 索引目录
+        :param dtype: 向量存储精度 float16/float32
+        """
+        self.index_dir = index_dir
+        self.dtype = np.dtype(dtype)
+        self.meta_path = os.path.join(index_dir, 'meta.json')
+        self.jobs_path = os.path.join(index_dir, 'jobs.jsonl')
+        self.vectors_path = os.path.join(index_dir, 'vectors.bin')
+        self.matcher = ResumeMatcher()
+
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._encoder = None
+        self.backend = None
+        self.dim = 0
+        self.jobs: List[Dict[str, Any]] = []
+        self.min_years = np.zeros(0, dtype=np.float32)
+        self.vectors = None
+
+    def _get_encoder(self, backend: Optional[str] = None):
+        """
+        获取向量编码器: 优先句向量引擎(经推理调度器与并发请求合批),否则哈希向量
+        """
+        if self._encoder is not None:
+            return self._encoder
+        if backend in (None, 'onnx'):
+            engine = get_embedding_encoder()
+            if engine is not None:
+                self._encoder, self.backend, self.dim = engine, 'onnx', engine.embedding_dim
+                return self._encoder
+            if backend == 'onnx':
+                raise RuntimeError("Job index was built with ONNX embeddings but the engine is unavailable")
+        self._encoder = _HashingEncoder()
+        self.backend, self.dim = 'hashing', self._encoder.dim
+        return self._encoder
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        encoder = self._get_encoder(self.backend)
+        if self.backend == 'onnx':
+            # 与匹配相同的分块池化编码,共用句向量缓存,重复检索同一简历时不再编码
+            return embedding_cache.encode_pooled(encoder, texts)
+        vectors = encoder.encode(texts, batch_size=64)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return (vectors / np.clip(norms, 1e-12, None)).astype(np.float32)
+
+    def load(self) -> None:
+        """
+        从磁盘加载索引(向量矩阵只做内存映射,不读入内存)
+        """
+        with self._lock:
+            if self._loaded:
+                return
+            if not os.path.exists(self.meta_path):
+                # 首次提交前中断留下的文件全部作废
+                self._truncate(0, [])
+            else:
+                with open(self.meta_path, 'r', encoding='utf-8') as f:
+                    meta = json.load(f)
+                self.backend, self.dim = meta['backend'], meta['dim']
+                self.dtype = np.dtype(meta['dtype'])
+                with open(self.jobs_path, 'r', encoding='utf-8') as f:
+                    lines = [line for line in f if line.strip()]
+                # 以元数据中的条数为准,截掉写入中断留下的尾部数据,之后的追加才能与向量行对齐
+                self._truncate(meta['count'], lines)
+                self.jobs = [json.loads(line) for line in lines[:meta['count']]]
+                self.min_years = np.asarray(
+                    [job.get('min_work_years', 0) or 0 for job in self.jobs], dtype=np.float32
+                )
+                self._remap(meta['count'])
+            self._loaded = True
+
+    def _truncate(self, count: int, lines: List[str]) -> None:
+        """
+        把向量文件和职位文件截断到已提交的条数
+        :param lines: jobs.jsonl 中的非空行
+        """
+        if os.path.exists(self.vectors_path):
+            size = count * self.dim * self.dtype.itemsize
+            if os.path.getsize(self.vectors_path) > size:
+                os.truncate(self.vectors_path, size)
+        if os.path.exists(self.jobs_path) and (len(lines) > count or not count):
+            tmp_path = self.jobs_path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.writelines(lines[:count])
+            os.replace(tmp_path, self.jobs_path)
+
+    def _remap(self, count: int) -> None:
+        if count == 0:
+            self.vectors = np.zeros((0, self.dim), dtype=self.dtype)
+            return
+        self.vectors = np.memmap(self.vectors_path, dtype=self.dtype, mode='r', shape=(count, self.dim))
+
+    def __len__(self) -> int:
+        self.load()
+        return len(self.jobs)
+
+    def add_jobs(self, jobs: List[Dict[str, Any]]) -> List[str]:
+        """
+        批量添加职位并持久化
+        :param jobs: 职位要求列表(job_description/required_skills/min_work_years等)
+        :return: 职位ID列表
+        """
+        self.load()
+        if not jobs:
+            return []
+        vectors = self._encode([flatten_text(job) for job in jobs])
+        with self._lock:
+            os.makedirs(self.index_dir, exist_ok=True)
+            start = len(self.jobs)
+            records = []
+            for offset, job in enumerate(jobs):
+                records.append({
+                    'job_id': str(job.get('job_id', start + offset)),
+                    'job': job,
+                    'required_skills': job.get('required_skills', []),
+                    'min_work_years': job.get('min_work_years', 0) or 0
+                })
+
+            # 追加写入向量和元数据,最后更新meta作为提交点
+            with open(self.vectors_path, 'ab') as f:
+                f.write(vectors.astype(self.dtype).tobytes())
+            with open(self.jobs_path, 'a', encoding='utf-8') as f:
+                for record in records:
+                    f.write(json.dumps(record, ensure_ascii=False) + '\n')
+            count = start + len(records)
+            tmp_path = self.meta_path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'backend': self.backend,
+                    'dim': self.dim,
+                    'dtype': self.dtype.name,
+                    'count': count
+                }, f)
+            os.replace(tmp_path, self.meta_path)
+
+            self.jobs.extend(records)
+            self.min_years = np.concatenate([
+                self.min_years,
+                np.asarray([r['min_work_years'] for r in records], dtype=np.float32)
+            ])
+            self._remap(count)
+        return [record['job_id'] for record in records]
+
+    def _vector_scores(self, vectors: np.ndarray, query: np.ndarray) -> np.ndarray:
+        """
+        一次矩阵向量乘计算所有职位的余弦相似度(分块避免大块临时内存)
+        """
+        scores = np.empty(len(vectors), dtype=np.float32)
+        for start in range(0, len(vectors), SCORE_CHUNK_ROWS):
+            block = np.asarray(vectors[start:start + SCORE_CHUNK_ROWS], dtype=np.float32)
+            scores[start:start + len(block)] = block @ query
+        return scores
+
+    def search(self,
+               resume_info: Dict[str, Any],
+               top_k: int = 10,
+               shortlist_size: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        为简历检索最匹配的职位
+        先用向量相似度取候选集,再用ResumeMatcher的技能/经验/语义综合分重排
+        :param resume_info: 简历信息
+        :param top_k: 返回职位数
+        :param shortlist_size: 候选集大小,默认 top_k 的5倍
+        :return: 按综合分降序排列的职位列表
+        """
+        self.load()
+        # 在锁内取一致的快照: 追加写入会替换向量矩阵,职位列表只追加,前total条不变
+        with self._lock:
+            jobs, min_years, vectors = self.jobs, self.min_years, self.vectors
+            total = len(jobs)
+        if total == 0 or top_k <= 0:
+            return []
+
+        query = self._encode([resume_text_of(resume_info)])[0]
+        vector_scores = self._vector_scores(vectors, query)
+
+        # argpartition 取候选集,O(N)而非全排序
+        shortlist_size = min(total, shortlist_size or max(top_k * 5, 50))
+        if shortlist_size < total:
+            candidates = np.argpartition(-vector_scores, shortlist_size - 1)[:shortlist_size]
+        else:
+            candidates = np.arange(total)
+
+        resume_skills = resume_info.get('skills', [])
+        resume_years = resume_info.get('work_experience', {}).get('total_work_years', 0) or 0
+        skill_scores = np.asarray([
+            self.matcher.calculate_skill_match_score(resume_skills, jobs[i]['required_skills'])
+            for i in candidates
+        ], dtype=np.float32)
+        min_years = min_years[candidates]
+        experience_scores = np.where(
+            resume_years >= min_years,
+            1.0,
+            resume_years / np.maximum(min_years, 1e-9) if resume_years > 0 else 0.0
+        )
+        semantic_scores = np.clip(vector_scores[candidates], 0.0, 1.0)
+        final_scores = self.matcher.combine_scores(skill_scores, experience_scores, semantic_scores)
+
+        order = np.argsort(-final_scores, kind='stable')[:top_k]
+        results = []
+        for rank in order:
+            record = jobs[candidates[rank]]
+            results.append({
+                'job_id': record['job_id'],
+                'job': record['job'],
+                'skill_match_score': float(skill_scores[rank]),
+                'experience_match_score': float(experience_scores[rank]),
+                'semantic_similarity': float(semantic_scores[rank]),
+                'comprehensive_match_score': float(final_scores[rank])
+            })
+        return results
+
+
+# 职位索引单例(首次使用时从磁盘加载)
+job_index = JobIndex(
+    os.getenv('JOB_INDEX_DIR', 'data/job_index'),
+    dtype=os.getenv('JOB_INDEX_DTYPE', 'float16')
+)
@@ -0,0 +1,170 @@
+import logging
+import os
+import threading
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from source.utils.metrics import stage
+from source.utils.startup import startup_report
+
+logger = logging.getLogger(__name__)
+
+# 模型默认路径
+DEFAULT_MODEL_PATH = "source/paraphrase-multilingual-MiniLM-L12-v2"
+
+# 抽取模式: regex 仅使用正则(不加载torch), model 额外加载NER模型
+EXTRACTOR_MODE_REGEX = "regex"
+EXTRACTOR_MODE_MODEL = "model"
+
+
+def get_extractor_mode() -> str:
+    """
+    读取信息抽取模式
+    :return: regex 或 model
+    """
+    mode = os.getenv("RESUME_EXTRACTOR_MODE", EXTRACTOR_MODE_REGEX).strip().lower()
+    if mode not in (EXTRACTOR_MODE_REGEX, EXTRACTOR_MODE_MODEL):
+        logger.warning("Unknown RESUME_EXTRACTOR_MODE:%s, fallback to %s", mode, EXTRACTOR_MODE_REGEX)
+        mode = EXTRACTOR_MODE_REGEX
+    return mode
+
+
+def is_regex_only() -> bool:
+    """
+    是否为纯正则模式(不触碰torch)
+    """
+    return get_extractor_mode() == EXTRACTOR_MODE_REGEX
+
+
+class ModelRegistry:
+    def __init__(self):
+        """
+        进程级模型注册表
+        每个重型资源只注册加载函数,首次使用时才加载,每个worker进程只加载一次
+        """
+        self._loaders: Dict[str, Callable[[], Any]] = {}
+        self._instances: Dict[str, Any] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._registry_lock = threading.Lock()
+
+    def register(self, name: str, loader: Callable[[], Any]) -> None:
+        """
+        注册资源加载函数
+        :param name: 资源名称
+        :param loader: 无参加载函数
+        """
+        with self._registry_lock:
+            self._loaders[name] = loader
+            self._locks.setdefault(name, threading.Lock())
+            # 重新注册时丢弃旧实例
+            self._instances.pop(name, None)
+
+    def is_registered(self, name: str) -> bool:
+        return name in self._loaders
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._instances
+
+    def get(self, name: str) -> Any:
+        """
+        获取资源实例,未加载时加载一次
+        :param name: 资源名称
+        :return: 资源实例
+        """
+        # 快路径: 已加载直接返回,不加锁
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+
+        if name not in self._loaders:
+            raise KeyError(f"Unknown model resource: {name}")
+
+        # 每个资源一把锁,避免并发请求重复加载
+        with self._locks[name]:
+            instance = self._instances.get(name)
+            if instance is None:
+                # 加载耗时计入启动报告,请求内的延迟加载同时计入该请求的Server-Timing
+                with startup_report.track('init', name), stage(f'load_{name}'):
+                    instance = self._loaders[name]()
+                self._instances[name] = instance
+        return instance
+
+    def warmup(self, names: Optional[Iterable[str]] = None) -> Dict[str, bool]:
+        """
+        预热资源(供FastAPI启动时调用)
+        :param names: 需要预热的资源名,默认全部已注册资源
+        :return: 每个资源是否加载成功
+        """
+        if names is None:
+            names = list(self._loaders.keys())
+        status = {}
+        for name in names:
+            try:
+                self.get(name)
+                status[name] = True
+            except Exception as e:
+                logger.error("Model warmup error(%s):%s", name, e)
+                status[name] = False
+        return status
+
+    def unload(self, name: str) -> None:
+        """
+        释放已加载资源
+        """
+        with self._registry_lock:
+            self._instances.pop(name, None)
+
+
+def _load_ner_tokenizer(model_path: str):
+    from transformers import AutoTokenizer
+    return AutoTokenizer.from_pretrained(model_path)
+
+
+def _load_ner_model(model_path: str):
+    import torch
+    from transformers import AutoModelForTokenClassification
+    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    model = AutoModelForTokenClassification.from_pretrained(model_path).to(device)
+    model.eval()
+    return model
+
+
+# 注册表单例
+model_registry = ModelRegistry()
+
+
+def register_ner_model(model_path: str = DEFAULT_MODEL_PATH):
+    """
+    按模型路径注册NER分词器和模型(只注册,不加载)
+    :param model_path: 模型目录
+    :return: (分词器资源名, 模型资源名)
+    """
+    if model_path == DEFAULT_MODEL_PATH:
+        tokenizer_name, model_name = "ner_tokenizer", "ner_model"
+    else:
+        tokenizer_name, model_name = f"ner_tokenizer:{model_path}", f"ner_model:{model_path}"
+    if not model_registry.is_registered(tokenizer_name):
+        model_registry.register(tokenizer_name, lambda: _load_ner_tokenizer(model_path))
+    if not model_registry.is_registered(model_name):
+        model_registry.register(model_name, lambda: _load_ner_model(model_path))
+    return tokenizer_name, model_name
+
+
+register_ner_model()
+
+
+def warmup_models(include_matching: bool = True) -> Dict[str, bool]:
+    """
+    启动预热: 纯正则模式下只构建抽取器,不加载torch模型
+    :param include_matching: 是否同时预热匹配用的TF-IDF模型和句向量引擎(首次匹配请求最慢的两项加载)
+    """
+    names = ["resume_extractor", "skill_taxonomy"]
+    if not is_regex_only():
+        names += ["ner_tokenizer", "ner_model"]
+    if include_matching:
+        names.append("tfidf_model")
+    status = model_registry.warmup([name for name in names if model_registry.is_registered(name)])
+    if include_matching and model_registry.is_registered("embedding_engine"):
+        # 经get_embedding_engine预热: SEMANTIC_BACKEND=tfidf时跳过,不可用时记录一次并回退TF-IDF
+        from source.services.embedding_engine import get_embedding_engine
+        status["embedding_engine"] = get_embedding_engine() is not None
+    return status
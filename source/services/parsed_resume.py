@@ -0,0 +1,157 @@
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from source.services.tfidf_model import words_to_tokens
+from source.utils.metrics import stage
+from source.utils.text_cleaner import resume_text_pipeline
+
+# 文档结构版本,结构变化时递增,旧缓存自动失效
+PARSED_RESUME_VERSION = 1
+
+# 句子切分: 以中英文句末标点结尾
+SENTENCE_PATTERN = re.compile(r'[^。！？!?；;]+[。！？!?；;]?')
+
+
+def flatten_text(data: Any) -> str:
+    """
+    将简历/职位字典中的文本叶子节点拼接为一段文本
+    """
+    if data is None:
+        return ''
+    if isinstance(data, str):
+        return data
+    if isinstance(data, dict):
+        return ' '.join(flatten_text(value) for value in data.values())
+    if isinstance(data, (list, tuple, set)):
+        return ' '.join(flatten_text(item) for item in data)
+    return str(data)
+
+
+def resume_text_of(resume_info: Dict[str, Any]) -> str:
+    """
+    没有上传文档时,由简历字段拼出用于语义匹配的文本(不含文档ID)
+    """
+    if not isinstance(resume_info, dict):
+        return flatten_text(resume_info)
+    return flatten_text({key: value for key, value in resume_info.items() if key != 'document_id'})
+
+
+class ParsedResume:
+    def __init__(self,
+                 document_id: str,
+                 text: str,
+                 words: List[str],
+                 sentences: List[List[int]],
+                 resume_info: Optional[Dict[str, Any]] = None):
+        """
+        上传时一次性构建的简历文档
+        持有清洗后的文本、分词结果、句子偏移和抽取字段,分析和匹配阶段直接复用
+        :param document_id: 文档ID(清洗后文本的哈希)
+        :param text: 清洗脱敏后的文本
+        :param words: jieba分词结果
+        :param sentences: 句子偏移 [[start, end], ...]
+        :param resume_info: 抽取的简历字段
+        """
+        self.document_id = document_id
+        self.text = text
+        self.words = words
+        self.sentences = sentences
+        self.resume_info = resume_info or {}
+        self._tokens = None
+
+    @property
+    def tokens(self) -> List[str]:
+        """
+        TF-IDF token(由分词结果派生,不再重新分词)
+        """
+        if self._tokens is None:
+            self._tokens = words_to_tokens(self.words)
+        return self._tokens
+
+    @property
+    def segmented_text(self) -> str:
+        """
+        空格连接的分词文本(等价于 ResumeMatcher.preprocess_text 的结果)
+        """
+        return ' '.join(self.words)
+
+    def iter_sentences(self):
+        for start, end in self.sentences:
+            yield self.text[start:end]
+
+    @staticmethod
+    def compute_document_id(text: str) -> str:
+        return hashlib.md5(text.encode('utf-8')).hexdigest()
+
+    @classmethod
+    def build(cls, raw_text: str, resume_info: Optional[Dict[str, Any]] = None) -> 'ParsedResume':
+        """
+        从原始文本构建文档: 清洗、分词、切句各执行一次
+        :param raw_text: PDF提取的文本
+        :param resume_info: 已抽取的简历字段
+        """
+        result = resume_text_pipeline.run(raw_text or '')
+        with stage('clean_text'):
+            text = result['safe_text']
+        with stage('segment'):
+            words = result['words']
+        sentences = [
+            [match.start(), match.end()]
+            for match in SENTENCE_PATTERN.finditer(text)
+            if match.group().strip()
+        ]
+        return cls(cls.compute_document_id(text), text, words, sentences, resume_info)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'version': PARSED_RESUME_VERSION,
+            'document_id': self.document_id,
+            'text': self.text,
+            'words': self.words,
+            'sentences': self.sentences,
+            'resume_info': self.resume_info
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> Optional['ParsedResume']:
+        if not data or data.get('version') != PARSED_RESUME_VERSION:
+            return None
+        return cls(
+            data['document_id'],
+            data['text'],
+            data['words'],
+            data['sentences'],
+            data.get('resume_info')
+        )
+
+
+class ParsedResumeMemo:
+    def __init__(self, max_size: int = 256):
+        """
+        进程内最近使用的文档(LRU),避免同一简历多次匹配时反复读取缓存
+        """
+        self.max_size = max_size
+        self._items: 'OrderedDict[str, ParsedResume]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, parsed: ParsedResume) -> None:
+        with self._lock:
+            self._items[parsed.document_id] = parsed
+            self._items.move_to_end(parsed.document_id)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def get(self, document_id: Optional[str]) -> Optional[ParsedResume]:
+        if not document_id:
+            return None
+        with self._lock:
+            parsed = self._items.get(document_id)
+            if parsed is not None:
+                self._items.move_to_end(document_id)
+            return parsed
+
+
+parsed_resume_memo = ParsedResumeMemo()
@@ -1,27 +1,191 @@
-import fitz
-from typing import List
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Iterator, List, Optional, Union
 
+from source.utils.metrics import stage
 from source.utils.text_cleaner import process_resume_text
 
+logger = logging.getLogger(__name__)
+
+# 按页分块并行提取默认关闭: 每个分块都要把整份PDF字节传给子进程,单核或页数不多时比串行更慢
+PARALLEL_ENABLED = os.getenv('PDF_PARALLEL', '0') == '1'
+# 开启时页数达到该值才按页分块并行提取
+PARALLEL_MIN_PAGES = int(os.getenv('PDF_PARALLEL_MIN_PAGES', '24'))
+# 每个并行分块的页数
+PAGE_CHUNK_SIZE = int(os.getenv('PDF_PAGE_CHUNK_SIZE', '8'))
+# 并行提取进程数
+PARSE_PROCESSES = int(os.getenv('PDF_PARSE_PROCESSES', str(min(4, os.cpu_count() or 1))))
+
+PDFSource = Union[str, bytes]
+
+
+class PDFLimitError(ValueError):
+    """
+    PDF超出大小或页数限制
+    """
+
+
+class PDFParseError(ValueError):
+    """
+    PDF无法打开或解析
+    """
+
+
+def _open_document(source: PDFSource):
+    # 延迟导入PyMuPDF,服务启动时不加载
+    import fitz
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return fitz.open(stream=source, filetype="pdf")
+    return fitz.open(source)
+
+
+def _extract_page_range(source: PDFSource, start: int, stop: int) -> List[str]:
+    """
+    提取指定页范围的原始文本(在子进程中执行,每个进程独立打开文档)
+    """
+    doc = _open_document(source)
+    try:
+        return [doc.load_page(index).get_text() for index in range(start, stop)]
+    finally:
+        doc.close()
+
+
+_page_executor = None
+_page_executor_lock = threading.Lock()
+
+
+def _get_page_executor() -> ProcessPoolExecutor:
+    # PyMuPDF不支持多线程共享文档,并行提取使用进程池
+    global _page_executor
+    with _page_executor_lock:
+        if _page_executor is None:
+            _page_executor = ProcessPoolExecutor(
+                max_workers=PARSE_PROCESSES,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return _page_executor
+
+
+def _discard_page_executor(executor: ProcessPoolExecutor) -> None:
+    """
+    子进程异常退出后进程池不可再用,丢弃后下次并行提取时重新创建
+    """
+    global _page_executor
+    with _page_executor_lock:
+        if _page_executor is executor:
+            _page_executor = None
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_page_executor() -> None:
+    global _page_executor
+    with _page_executor_lock:
+        executor, _page_executor = _page_executor, None
+    if executor is not None:
+        executor.shutdown(wait=True)
+
 
 class PDFParser:
     @staticmethod
-    def extract_text(file_path:str) -> str:
+    def iter_page_texts(source: PDFSource, page_cap: Optional[int] = None) -> Iterator[str]:
+        """
+        逐页产出原始文本(生成器,到达页数上限时提前停止)
+        :param source: PDF文件路径或字节
+        :param page_cap: 最多读取的页数
+        """
+        doc = _open_document(source)
+        try:
+            page_count = doc.page_count if page_cap is None else min(doc.page_count, page_cap)
+            for index in range(page_count):
+                yield doc.load_page(index).get_text()
+        finally:
+            doc.close()
+
+    @staticmethod
+    def _collect_page_texts(doc, source: PDFSource, page_count: int, parallel: Optional[bool]) -> List[str]:
+        if parallel is None:
+            parallel = PARALLEL_ENABLED and page_count >= PARALLEL_MIN_PAGES and PARSE_PROCESSES > 1
+        if not parallel or page_count <= PAGE_CHUNK_SIZE:
+            return [doc.load_page(index).get_text() for index in range(page_count)]
+
+        # 按固定页数分块并行提取,保持页序
+        executor = _get_page_executor()
+        try:
+            futures = [
+                executor.submit(_extract_page_range, source, start, min(start + PAGE_CHUNK_SIZE, page_count))
+                for start in range(0, page_count, PAGE_CHUNK_SIZE)
+            ]
+            parts = []
+            for future in futures:
+                parts.extend(future.result())
+            return parts
+        except BrokenProcessPool as e:
+            # 重建进程池,本次改为串行提取
+            logger.warning("PDF page worker pool broken, falling back to serial extraction:%s", e)
+            _discard_page_executor(executor)
+            return [doc.load_page(index).get_text() for index in range(page_count)]
+
+    @staticmethod
+    def _extract(source: PDFSource,
+                 max_pages: Optional[int],
+                 page_cap: Optional[int],
+                 parallel: Optional[bool],
+                 clean: bool = True) -> str:
+        with stage('pdf_parse'):
+            doc = _open_document(source)
+            try:
+                # 先按page_cap截取,只校验实际读取的页数
+                page_count = doc.page_count if page_cap is None else min(doc.page_count, page_cap)
+                if max_pages is not None and page_count > max_pages:
+                    raise PDFLimitError(f"PDF has {page_count} pages to read, limit is {max_pages}")
+                parts = PDFParser._collect_page_texts(doc, source, page_count, parallel)
+            finally:
+                doc.close()
+        # 各页文本只拼接一次,清洗流程对全文只执行一次
+        raw_text = '\n'.join(parts)
+        return process_resume_text(raw_text) if clean else raw_text
+
+    @staticmethod
+    def extract_text(file_path:str,
+                     page_cap: Optional[int] = None,
+                     parallel: Optional[bool] = None) -> str:
         """
         从PDF文件提取全文本内容
         :param file_path: PDF文本路径
+        :param page_cap: 最多读取的页数,默认全部
+        :param parallel: 是否按页分块并行提取,默认由 PDF_PARALLEL 和页数决定
         :return: 提取的文本内容
         """
         try:
-            doc = fitz.open(file_path)
-            full_text = ""
-            for page in doc:
-                text = page.get_text()
-                processed_text = process_resume_text(text)
-                full_text += processed_text
-            return full_text
+            return PDFParser._extract(file_path, None, page_cap, parallel)
         except Exception as e:
-            print(f"PDF解析错误：{e}")
+            logger.error("PDF解析错误：%s", e)
             return ""
-        finally:
-            doc.close() if 'doc' in locals() else None
+
+    @staticmethod
+    def extract_text_from_bytes(data: bytes,
+                                max_pages: Optional[int] = None,
+                                page_cap: Optional[int] = None,
+                                parallel: Optional[bool] = None,
+                                clean: bool = True) -> str:
+        """
+        直接从内存中的PDF字节提取全文本内容(不落盘)
+        :param data: PDF文件字节
+        :param max_pages: 最大页数(按page_cap截取后的页数计),超出时抛出PDFLimitError
+        :param page_cap: 最多读取的页数,默认全部
+        :param parallel: 是否按页分块并行提取,默认由 PDF_PARALLEL 和页数决定
+        :param clean: 是否执行清洗流程,为False时返回拼接后的原始文本(由调用方构建ParsedResume)
+        :return: 提取的文本内容
+        :raises PDFParseError: 文件无法作为PDF打开或解析(不返回空文本,避免被当作解析成功缓存)
+        """
+        try:
+            return PDFParser._extract(data, max_pages, page_cap, parallel, clean)
+        except PDFLimitError:
+            raise
+        except Exception as e:
+            logger.error("PDF解析错误：%s", e)
+            raise PDFParseError(f"Unable to parse PDF:{e}") from e
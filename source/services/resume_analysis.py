@@ -3,8 +3,11 @@ from typing import Dict, Any, List
 from source.services.info_extractor import process_resume
 
 from source.services.resume_matcher import match_resume_to_job
+from source.services.skill_taxonomy import DIVERSITY_TARGET_CATEGORIES, get_skill_taxonomy
+from source.utils.metrics import timed
 
 
+@timed('analysis')
 def perform_resume_analysis(resume_info: Dict[str, Any]) -> Dict[str, Any]:
     """
     综合简历分析函数
@@ -63,23 +66,13 @@ def _calculate_skill_diversity(skills: List[str]) -> float:
     :return: 技能多样性得分 (0-1)
     """
 
-    # 技能权重映射
-    skill_categories = {
-        'programming': ['Python', 'Java', 'C++', 'JavaScript', 'Go'],
-        'data_science': ['Machine Learning', 'Data Analysis', 'AI', 'Statistics'],
-        'cloud': ['Docker', 'Kubernetes', 'AWS', 'Azure'],
-        'web_frontend': ['React', 'Vue', 'Angular', 'HTML', 'CSS'],
-        'web_backend': ['Node.js', 'Django', 'Flask', 'Spring']
-    }
-
-    # 计算跨类别技能数
-    category_count = sum(
-        1 for category in skill_categories.values()
-        if any(skill in category for skill in skills)
-    )
+    # 按技能词表归类,统计覆盖的类别数
+    taxonomy = get_skill_taxonomy()
+    categories = {taxonomy.category_of(skill) for skill in skills}
+    categories.discard(None)
 
     # 标准化得分
-    return min(category_count / len(skill_categories), 1.0)
+    return min(len(categories) / DIVERSITY_TARGET_CATEGORIES, 1.0)
 
 
 def _calculate_experience_depth(work_experience: Dict) -> float:
@@ -0,0 +1,276 @@
+import asyncio
+import contextvars
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple
+
+from source.services.info_extractor import EXTRACTOR_VERSION, process_resume
+from source.services.model_registry import get_extractor_mode
+from source.services.parsed_resume import PARSED_RESUME_VERSION, ParsedResume
+from source.services.pdf_parser import PDFLimitError, PDFParser
+from source.services.skill_taxonomy import get_skill_taxonomy_path
+from source.services.tfidf_model import get_tfidf_model, is_online_update_enabled
+
+# 上传限制
+MAX_UPLOAD_BYTES = int(os.getenv('MAX_UPLOAD_BYTES', str(10 * 1024 * 1024)))
+MAX_PDF_PAGES = int(os.getenv('MAX_PDF_PAGES', '100'))
+# 只解析前N页(0表示不限制)
+PDF_PAGE_CAP = int(os.getenv('PDF_PAGE_CAP', '0')) or None
+
+# 解析线程数与最大排队数(超出时等待,避免无界堆积)
+INGEST_WORKERS = int(os.getenv('INGEST_WORKERS', str(min(4, os.cpu_count() or 1))))
+INGEST_MAX_PENDING = int(os.getenv('INGEST_MAX_PENDING', str(INGEST_WORKERS * 4)))
+
+# 批量上传: 进程池大小与单批最大文件数
+BATCH_WORKERS = int(os.getenv('BATCH_WORKERS', str(os.cpu_count() or 1)))
+MAX_BATCH_FILES = int(os.getenv('MAX_BATCH_FILES', '500'))
+MAX_BATCH_UPLOAD_BYTES = int(os.getenv('MAX_BATCH_UPLOAD_BYTES', str(200 * 1024 * 1024)))
+# 单批上传及展开后的文件总字节数上限
+MAX_BATCH_TOTAL_BYTES = int(os.getenv('MAX_BATCH_TOTAL_BYTES', str(512 * 1024 * 1024)))
+
+
+class UploadTooLargeError(PDFLimitError):
+    """
+    上传文件超出大小限制
+    """
+
+
+@lru_cache(maxsize=1)
+def extractor_fingerprint() -> str:
+    """
+    抽取结果的版本指纹
+    抽取逻辑版本、文档结构版本、抽取模式、技能词表内容或分页上限任一变化时指纹改变,旧的去重结果不再命中
+    """
+    with open(get_skill_taxonomy_path(), 'rb') as f:
+        taxonomy_digest = hashlib.blake2b(f.read(), digest_size=8).hexdigest()
+    return '-'.join([
+        f"e{EXTRACTOR_VERSION}",
+        f"p{PARSED_RESUME_VERSION}",
+        get_extractor_mode(),
+        taxonomy_digest,
+        f"cap{PDF_PAGE_CAP or 0}"
+    ])
+
+
+def upload_cache_key(data: bytes) -> str:
+    """
+    上传去重key: 文件字节的blake2b哈希 + 抽取器指纹
+    """
+    return f"{hashlib.blake2b(data, digest_size=16).hexdigest()}:{extractor_fingerprint()}"
+
+
+def ingest_resume_bytes(data: bytes, parallel: Optional[bool] = None, online_update: bool = True) -> ParsedResume:
+    """
+    解析PDF字节并构建简历文档(同步,在工作线程中执行)
+    清洗、分词只执行一次,抽取字段、TF-IDF更新和后续匹配共用同一份结果
+    :param data: PDF文件字节
+    :param parallel: 是否按页分块并行解析,默认由页数决定
+    :param online_update: 是否增量更新TF-IDF文档频率(批量子进程中为False,由主进程更新)
+    :return: 简历文档,resume_info中带有document_id
+    """
+    if len(data) > MAX_UPLOAD_BYTES:
+        raise UploadTooLargeError(f"File is {len(data)} bytes, limit is {MAX_UPLOAD_BYTES}")
+
+    #解析PDF(原始文本,清洗在构建文档时进行)
+    raw_text = PDFParser.extract_text_from_bytes(
+        data, max_pages=MAX_PDF_PAGES, page_cap=PDF_PAGE_CAP, parallel=parallel, clean=False
+    )
+    parsed = ParsedResume.build(raw_text)
+
+    #信息提取
+    resume_info = process_resume(parsed.text)
+    resume_info['document_id'] = parsed.document_id
+    parsed.resume_info = resume_info
+
+    #增量更新TF-IDF文档频率(复用分词结果)
+    if online_update and is_online_update_enabled() and parsed.text:
+        get_tfidf_model().partial_fit([parsed.tokens], tokenized=True)
+    return parsed
+
+
+class ResumeIngestor:
+    def __init__(self, max_workers: int = INGEST_WORKERS, max_pending: int = INGEST_MAX_PENDING):
+        """
+        有界线程池: 解析与抽取不阻塞事件循环
+        :param max_workers: 解析线程数
+        :param max_pending: 同时在处理和排队的最大请求数
+        """
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor = None
+        self._semaphore = None
+
+    def _ensure_started(self) -> None:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='resume-ingest')
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_pending)
+
+    async def ingest(self, data: bytes) -> ParsedResume:
+        """
+        在线程池中解析PDF字节并构建简历文档
+        """
+        self._ensure_started()
+        async with self._semaphore:
+            loop = asyncio.get_running_loop()
+            # 复制上下文,工作线程中各阶段耗时计入当前请求
+            context = contextvars.copy_context()
+            return await loop.run_in_executor(self._executor, context.run, ingest_resume_bytes, data)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        self._semaphore = None
+
+
+def _iter_batch_entries(filename: str, data: bytes) -> Iterator[Tuple[str, int, Callable[[], bytes]]]:
+    """
+    批量上传文件的条目: zip压缩包展开为其中的PDF,其余文件原样返回
+    :return: (文件名, 解压后字节数, 读取函数) 迭代器,zip成员只在调用读取函数时解压
+    """
+    if not zipfile.is_zipfile(io.BytesIO(data)):
+        yield filename, len(data), lambda: data
+        return
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        for info in archive.infolist():
+            if info.is_dir() or not info.filename.lower().endswith('.pdf'):
+                continue
+            yield info.filename, info.file_size, lambda info=info: archive.read(info)
+
+
+def expand_batch_files(uploads: List[Tuple[str, bytes]],
+                       max_files: int = MAX_BATCH_FILES,
+                       max_total_bytes: int = MAX_BATCH_TOTAL_BYTES) -> List[Tuple[str, bytes]]:
+    """
+    展开整批上传文件,边展开边检查文件数和累计字节数(同步,在工作线程中执行)
+    zip成员在解压前按声明大小计入累计字节数,超出任一上限时立即停止
+    :param uploads: (上传文件名, 字节) 列表
+    :return: (文件名, 字节) 列表
+    """
+    batch = []
+    total_bytes = 0
+    for filename, data in uploads:
+        for name, size, read in _iter_batch_entries(filename, data):
+            if len(batch) >= max_files:
+                raise UploadTooLargeError(f"Batch exceeds {max_files} files")
+            # 解压前按声明大小拦截,防止压缩炸弹(超出单文件上限的成员记为空文件,由解析时报错)
+            if size > MAX_UPLOAD_BYTES:
+                batch.append((name, b''))
+                continue
+            total_bytes += size
+            if total_bytes > max_total_bytes:
+                raise UploadTooLargeError(f"Batch exceeds {max_total_bytes} bytes after expansion")
+            batch.append((name, read()))
+    return batch
+
+
+def ingest_batch_item(filename: str, data: bytes) -> Dict[str, Any]:
+    """
+    批量上传中的单个文件(在子进程中执行,异常只影响当前文件)
+    """
+    try:
+        if not data:
+            raise UploadTooLargeError(f"File is empty or exceeds {MAX_UPLOAD_BYTES} bytes")
+        # 批量任务已在进程池中并行,单个文件内不再分页并行
+        # 子进程中的模型只是副本,TF-IDF增量更新由主进程根据返回的文档执行
+        parsed = ingest_resume_bytes(data, parallel=False, online_update=False)
+        return {'filename': filename, 'resume_info': parsed.resume_info, 'parsed_resume': parsed.to_dict()}
+    except Exception as e:
+        return {'filename': filename, 'error': str(e)}
+
+
+def _init_batch_worker() -> None:
+    # 子进程启动时预热抽取器和技能词表(子进程只做解析抽取,不加载匹配用模型)
+    from source.services.model_registry import warmup_models
+    warmup_models(include_matching=False)
+
+
+class BatchResumeIngestor:
+    def __init__(self, max_workers: int = BATCH_WORKERS):
+        """
+        批量简历解析: 进程池并行解析,绕开GIL
+        :param max_workers: 进程数,默认CPU核数
+        """
+        self.max_workers = max_workers
+        self._executor = None
+
+    def _ensure_started(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn避免在已启动线程的服务进程中fork
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_batch_worker
+            )
+        return self._executor
+
+    async def ingest_many(self, files: List[Tuple[str, bytes]]) -> AsyncIterator[Dict[str, Any]]:
+        """
+        并行解析多个文件,按完成顺序逐个产出结果
+        :param files: (文件名, 字节) 列表
+        """
+        executor = self._ensure_started()
+        loop = asyncio.get_running_loop()
+        futures = {}
+        for index, (filename, data) in enumerate(files):
+            future = loop.run_in_executor(executor, ingest_batch_item, filename, data)
+            futures[future] = (index, filename)
+
+        pending = set(futures)
+        online_update = is_online_update_enabled()
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            results = []
+            for future in done:
+                index, filename = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    # 子进程崩溃等进程池级错误同样只记录到对应文件
+                    if isinstance(e, BrokenProcessPool) and self._executor is executor:
+                        # 进程池已损坏,下一批重新创建
+                        self._executor = None
+                    result = {'filename': filename, 'error': str(e)}
+                result['index'] = index
+                if 'parsed_resume' in result:
+                    result['parsed_resume'] = ParsedResume.from_dict(result['parsed_resume'])
+                results.append(result)
+            # 在主进程中增量更新TF-IDF文档频率(复用子进程的分词结果)
+            tokens = [
+                result['parsed_resume'].tokens for result in results
+                if result.get('parsed_resume') is not None and result['parsed_resume'].text
+            ]
+            if online_update and tokens:
+                get_tfidf_model().partial_fit(tokens, tokenized=True)
+            for result in results:
+                yield result
+
+    async def ingest_many_ndjson(self,
+                                 files: List[Tuple[str, bytes]],
+                                 on_parsed: Optional[Callable[[ParsedResume], Awaitable[None]]] = None) -> AsyncIterator[str]:
+        """
+        以NDJSON逐行产出结果,简历文档交给on_parsed保存,不随响应返回
+        """
+        async for result in self.ingest_many(files):
+            parsed = result.pop('parsed_resume', None)
+            if parsed is not None and on_parsed is not None:
+                await on_parsed(parsed)
+            yield json.dumps(result, ensure_ascii=False) + '\n'
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+# 简历解析单例
+resume_ingestor = ResumeIngestor()
+batch_ingestor = BatchResumeIngestor()
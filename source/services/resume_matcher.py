@@ -1,23 +1,37 @@
 import numpy as np
-from typing import Dict, List, Any
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-import jieba
+from functools import lru_cache
+from typing import Dict, List, Any, Optional, Sequence, Tuple
+
+from source.services.embedding_cache import embedding_cache
+from source.services.inference_scheduler import get_embedding_encoder
+from source.services.parsed_resume import ParsedResume, flatten_text, resume_text_of
+from source.services.skill_taxonomy import get_skill_taxonomy
+from source.services.tfidf_model import get_tfidf_model, words_to_tokens
+from source.utils.jieba_cache import get_jieba
+from source.utils.metrics import timed
+
+
+@lru_cache(maxsize=1024)
+def segment_words(text: str) -> Tuple[str, ...]:
+    """
+    jieba分词(按文本缓存,同一职位描述匹配多份简历时只分词一次)
+    """
+    return tuple(get_jieba().cut(text))
+
 
 class ResumeMatcher:
     def __init__(self):
         """
         初始化简历匹配器
+        TF-IDF使用离线拟合的语料模型,请求时只做transform,匹配器本身无状态可共享
         """
-        self.tfidf_vectorizer = TfidfVectorizer()
 
     def preprocess_text(self, text: str) -> str:
         """
         文本预处理
         """
         # 分词
-        words = list(jieba.cut(text))
-        return ' '.join(words)
+        return ' '.join(segment_words(text))
 
     def calculate_skill_match_score(self,
                                     resume_skills: List[str],
@@ -29,26 +43,17 @@ class ResumeMatcher:
         :return: 匹配分数 (0-1)
         """
 
-        # 技能权重映射
-        skill_weights = {
-            'Python': 1.5,
-            'Java': 1.4,
-            'machine learning': 1.6,
-            'data analysis': 1.5,
-            'AI': 1.7,
-            'backend': 1.4,
-            'frontend': 1.3
-        }
-
         #如果职位没有技能要求，返回0
         if not job_skills:
             return 0.0
 
-        # 技能交集
-        matched_skills = set(resume_skills) & set(job_skills)
+        # 技能交集(别名统一为词表规范名,权重取自词表)
+        taxonomy = get_skill_taxonomy()
+        job_skills = [taxonomy.canonicalize(skill) for skill in job_skills]
+        matched_skills = {taxonomy.canonicalize(skill) for skill in resume_skills} & set(job_skills)
         # 计算加权匹配度
-        total_weight = sum(skill_weights.get(skill.lower(), 1.0) for skill in matched_skills)
-        total_job_weight = sum(skill_weights.get(skill.lower(), 1.0) for skill in job_skills)
+        total_weight = sum(taxonomy.weight_of(skill) for skill in matched_skills)
+        total_job_weight = sum(taxonomy.weight_of(skill) for skill in job_skills)
         return min(total_weight / total_job_weight, 1.0)
 
     def calculate_experience_match_score(self,
@@ -72,32 +77,41 @@ class ResumeMatcher:
 
     def calculate_semantic_similarity(self,
                                       resume_text: str,
-                                      job_description: str) -> float:
+                                      job_description: str,
+                                      resume_words: Optional[Sequence[str]] = None) -> float:
         """
         语义相似度计算
         :param resume_text: 简历文本
         :param job_description: 职位描述
+        :param resume_words: 简历的分词结果(来自ParsedResume),为空时现场分词
         :return: 语义相似度分数 (0-1)
         """
+        return float(self.calculate_batch_semantic_similarity(
+            [resume_text], job_description, [resume_words]
+        )[0])
 
-        # 文本预处理
-        processed_resume = self.preprocess_text(resume_text)
-        processed_job = self.preprocess_text(job_description)
-
-        # 构建TF-IDF向量
-        tfidf_matrix = self.tfidf_vectorizer.fit_transform([processed_resume, processed_job])
-        # 计算余弦相似度
-        cosine_sim = cosine_similarity(tfidf_matrix[0:1], tfidf_matrix[1:2])[0][0]
-        return cosine_sim
+    @staticmethod
+    def combine_scores(skill_match_score, experience_match_score, semantic_similarity):
+        """
+        按权重合成综合匹配分(标量或numpy数组均可)
+        """
+        return (
+                skill_match_score * 0.4 +
+                experience_match_score * 0.3 +
+                semantic_similarity * 0.3
+        )
 
+    @timed('match_score')
     def calculate_comprehensive_match_score(self,
                                             resume_info: Dict[str, Any],
-                                            job_requirements: Dict[str, Any]) -> Dict[str, float]:
+                                            job_requirements: Dict[str, Any],
+                                            parsed_resume: Optional[ParsedResume] = None) -> Dict[str, float]:
 
         """
         综合匹配度计算
         :param resume_info: 简历信息
         :param job_requirements: 职位要求
+        :param parsed_resume: 上传时构建的简历文档,有则复用其文本和分词结果
         :return: 匹配度详细信息
         """
 
@@ -115,15 +129,16 @@ class ResumeMatcher:
 
         # 语义相似度
         semantic_similarity = self.calculate_semantic_similarity(
-            str(resume_info),
-            str(job_requirements)
+            parsed_resume.text if parsed_resume else resume_text_of(resume_info),
+            flatten_text(job_requirements),
+            parsed_resume.words if parsed_resume else None
         )
 
         # 综合评分(可调整权重)
-        comprehensive_score = (
-                skill_match_score * 0.4 +
-                experience_match_score * 0.3 +
-                semantic_similarity * 0.3
+        comprehensive_score = self.combine_scores(
+            skill_match_score,
+            experience_match_score,
+            semantic_similarity
         )
 
         return {
@@ -133,12 +148,151 @@ class ResumeMatcher:
             'comprehensive_match_score': comprehensive_score
         }
 
+    @timed('rank')
+    def rank(self,
+             resumes: List[Dict[str, Any]],
+             job_requirements: Dict[str, Any],
+             top_k: Optional[int] = None,
+             parsed_resumes: Optional[Sequence[Optional[ParsedResume]]] = None) -> List[Dict[str, Any]]:
+        """
+        批量计算多份简历与同一职位的匹配度并排序
+        职位只预处理一次,技能/经验分以numpy数组计算,语义相似度为一次矩阵乘
+        :param resumes: 简历信息列表
+        :param job_requirements: 职位要求
+        :param top_k: 只返回前k名,默认全部
+        :param parsed_resumes: 与resumes一一对应的简历文档(可为None),有则复用分词结果
+        :return: 按综合分降序排列的结果(index为简历在输入中的位置)
+        """
+        if not resumes:
+            return []
+
+        # 职位预处理(只做一次)
+        taxonomy = get_skill_taxonomy()
+        job_skills = [taxonomy.canonicalize(skill) for skill in job_requirements.get('required_skills', []) or []]
+        job_skill_weights = np.asarray(
+            [taxonomy.weight_of(skill) for skill in job_skills], dtype=np.float64
+        )
+        job_skill_index = {skill: i for i, skill in enumerate(job_skills)}
+        total_job_weight = job_skill_weights.sum()
+        job_min_years = job_requirements.get('min_work_years', 0) or 0
+
+        # 技能匹配度: 命中矩阵 (简历数 x 职位技能数) 与权重向量相乘
+        if job_skills:
+            hits = np.zeros((len(resumes), len(job_skills)), dtype=np.float64)
+            for row, resume_info in enumerate(resumes):
+                for skill in set(resume_info.get('skills', []) or []):
+                    col = job_skill_index.get(taxonomy.canonicalize(skill))
+                    if col is not None:
+                        hits[row, col] = 1.0
+            skill_scores = np.minimum(hits @ job_skill_weights / total_job_weight, 1.0)
+        else:
+            skill_scores = np.zeros(len(resumes), dtype=np.float64)
+
+        # 工作经验匹配度
+        resume_years = np.asarray([
+            (resume_info.get('work_experience', {}) or {}).get('total_work_years', 0) or 0
+            for resume_info in resumes
+        ], dtype=np.float64)
+        if job_min_years > 0:
+            experience_scores = np.where(resume_years >= job_min_years, 1.0,
+                                         np.clip(resume_years, 0, None) / job_min_years)
+        else:
+            experience_scores = np.ones(len(resumes), dtype=np.float64)
+
+        # 语义相似度
+        if parsed_resumes is None:
+            parsed_resumes = [None] * len(resumes)
+        semantic_scores = self.calculate_batch_semantic_similarity(
+            [parsed.text if parsed else resume_text_of(resume_info)
+             for resume_info, parsed in zip(resumes, parsed_resumes)],
+            flatten_text(job_requirements),
+            [parsed.words if parsed else None for parsed in parsed_resumes]
+        )
+
+        final_scores = self.combine_scores(skill_scores, experience_scores, semantic_scores)
+
+        # 排序(有top_k时先用argpartition截断)
+        if top_k is not None and 0 < top_k < len(resumes):
+            candidates = np.argpartition(-final_scores, top_k - 1)[:top_k]
+            order = candidates[np.argsort(-final_scores[candidates], kind='stable')]
+        else:
+            order = np.argsort(-final_scores, kind='stable')
+
+        return [{
+            'index': int(i),
+            'skill_match_score': float(skill_scores[i]),
+            'experience_match_score': float(experience_scores[i]),
+            'semantic_similarity': float(semantic_scores[i]),
+            'comprehensive_match_score': float(final_scores[i])
+        } for i in order]
+
+    def calculate_batch_semantic_similarity(self,
+                                            resume_texts: List[str],
+                                            job_description: str,
+                                            resume_words: Optional[Sequence[Optional[Sequence[str]]]] = None) -> np.ndarray:
+        """
+        批量语义相似度计算
+        :param resume_texts: 简历文本列表
+        :param job_description: 职位描述
+        :param resume_words: 与简历文本对应的分词结果,缺失项现场分词
+        :return: 相似度数组 (0-1)
+        """
+        encoder = get_embedding_encoder()
+        if encoder is not None:
+            # 长简历分块编码后平均池化;相同的文本块只编码一次,之后从句向量缓存读取
+            embeddings = embedding_cache.encode_pooled(encoder, resume_texts + [job_description])
+            return np.clip(embeddings[:-1] @ embeddings[-1], 0.0, 1.0)
+
+        # 已有分词结果的简历不再分词,职位描述分词结果按文本缓存
+        if resume_words is None:
+            resume_words = [None] * len(resume_texts)
+        words_list = [
+            words if words is not None else segment_words(text)
+            for text, words in zip(resume_texts, resume_words)
+        ]
+        words_list.append(segment_words(job_description))
+
+        # 行向量已L2归一化,点积即余弦相似度
+        tfidf_model = get_tfidf_model()
+        if tfidf_model.is_fitted:
+            tfidf_matrix = tfidf_model.transform([words_to_tokens(words) for words in words_list], tokenized=True)
+            similarities = tfidf_matrix[:-1] @ tfidf_matrix[-1].T
+            return np.clip(similarities.toarray().ravel(), 0.0, 1.0)
+
+        # 尚无语料模型(或文档数未达到TFIDF_MIN_DOCUMENTS)时每份简历与职位单独拟合,与单份匹配结果一致,不随同批其他简历变化(sklearn只在此时导入)
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        job_text = ' '.join(words_list[-1])
+        similarities = np.zeros(len(resume_texts), dtype=np.float64)
+        for i, words in enumerate(words_list[:-1]):
+            try:
+                pair_matrix = TfidfVectorizer().fit_transform([' '.join(words), job_text])
+            except ValueError:
+                # 简历和职位都没有可用词
+                continue
+            similarities[i] = (pair_matrix[0] @ pair_matrix[1].T).toarray()[0, 0]
+        return np.clip(similarities, 0.0, 1.0)
+
+
+# 匹配器无状态,进程内共享一个实例
+_default_matcher = ResumeMatcher()
+
 
 # 使用示例
-def match_resume_to_job(resume_info: Dict[str, Any], job_description: Dict[str, Any]):
+def match_resume_to_job(resume_info: Dict[str, Any],
+                        job_description: Dict[str, Any],
+                        parsed_resume: Optional[ParsedResume] = None):
     """
     简历与职位匹配主函数
     """
 
-    matcher = ResumeMatcher()
-    return matcher.calculate_comprehensive_match_score(resume_info, job_description)
\ No newline at end of file
+    return _default_matcher.calculate_comprehensive_match_score(resume_info, job_description, parsed_resume)
+
+
+def rank_resumes_for_job(resumes: List[Dict[str, Any]],
+                         job_description: Dict[str, Any],
+                         top_k: Optional[int] = None,
+                         parsed_resumes: Optional[Sequence[Optional[ParsedResume]]] = None) -> List[Dict[str, Any]]:
+    """
+    多份简历对同一职位排序主函数
+    """
+    return _default_matcher.rank(resumes, job_description, top_k=top_k, parsed_resumes=parsed_resumes)
\ No newline at end of file
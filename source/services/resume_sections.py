@@ -0,0 +1,184 @@
+import re
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Union
+
+from source.services.entity_scanner import EntityScanner, ScanResult, Span
+
+# 段落类型
+SECTION_BASIC = 'basic'
+SECTION_EDUCATION = 'education'
+SECTION_WORK = 'work'
+SECTION_SKILLS = 'skills'
+SECTION_PROJECTS = 'projects'
+SECTION_OTHER = 'other'
+
+# 段落标题 -> 段落类型(英文标题只识别首字母大写和全大写两种写法)
+SECTION_HEADINGS = {
+    SECTION_BASIC: ['个人简历', '个人信息', '基本信息', '基本资料', '个人资料', '联系方式', '求职意向',
+                    'Personal Information', 'Contact Information', 'Contact'],
+    SECTION_EDUCATION: ['教育背景', '教育经历', '学习经历', '学历背景', 'Education Background', 'Education'],
+    SECTION_WORK: ['工作经历', '工作经验', '实习经历', '实习经验', '职业经历', '任职经历',
+                   'Work Experience', 'Professional Experience', 'Employment History', 'Experience'],
+    SECTION_SKILLS: ['专业技能', '技能特长', '技能专长', '个人技能', '技术能力', '掌握技能',
+                     'Technical Skills', 'Skills'],
+    SECTION_PROJECTS: ['项目经验', '项目经历', '项目介绍', 'Project Experience', 'Projects'],
+    SECTION_OTHER: ['自我评价', '个人评价', '自我介绍', '获奖情况', '荣誉奖项', '证书', '兴趣爱好', '校园经历',
+                    'Self Evaluation', 'Summary', 'Awards', 'Certifications', 'Interests'],
+}
+
+# 各实体所在的段落,段落中没有该实体时回退到全文
+ENTITY_SECTIONS = {
+    'NAME': (SECTION_BASIC,),
+    'PHONE': (SECTION_BASIC,),
+    'EMAIL': (SECTION_BASIC,),
+    'WORK_YEAR': (SECTION_BASIC, SECTION_WORK, SECTION_OTHER),
+    'EDUCATION': (SECTION_EDUCATION,),
+    'SCHOOL': (SECTION_EDUCATION,),
+    'MAJOR': (SECTION_EDUCATION,),
+    'COMPANY': (SECTION_WORK,),
+    'POSITION': (SECTION_WORK,),
+}
+
+
+def _build_heading_index() -> Dict[str, str]:
+    index = {}
+    for kind, headings in SECTION_HEADINGS.items():
+        for heading in headings:
+            index[heading] = kind
+            if heading.isascii():
+                index[heading.upper()] = kind
+    return index
+
+
+HEADING_KINDS = _build_heading_index()
+
+
+def _build_heading_pattern() -> re.Pattern:
+    """
+    标题需出现在文本开头或分隔符之后,后接冒号、空白或文本结尾
+    清洗后的文本换行已折叠为空格,句中的"丰富的工作经验"、"5年工作经验"不会被当作标题
+    """
+    headings = '|'.join(re.escape(h) for h in sorted(HEADING_KINDS, key=len, reverse=True))
+    return re.compile(
+        r'(?<![^\s|｜:：;；。，,、)）】\]])'
+        r'(?:[一二三四五六七八九十]{1,2}[、.．]|\d{1,2}[、.．])?[【\[]?'
+        rf'(?P<heading>{headings})'
+        r'[】\]]?(?:[ \t]*[:：]|(?=\s|[【\[]|$))'
+    )
+
+
+HEADING_PATTERN = _build_heading_pattern()
+
+
+class Section(NamedTuple):
+    kind: str
+    heading: Optional[str]
+    # 正文范围(不含标题)
+    start: int
+    end: int
+
+
+def _is_heading(match: re.Match) -> bool:
+    """
+    首字母大写的英文标题容易与正文单词混淆(如 "I have Experience in Go"),需带冒号;全大写或中文标题不需要
+    """
+    heading = match.group('heading')
+    return not heading.isascii() or heading.isupper() or match.group().rstrip().endswith((':', '：'))
+
+
+def sectionize(text: str) -> List[Section]:
+    """
+    线性扫描一次,按标题切分段落
+    第一个标题之前的内容(通常是姓名和联系方式)归为basic段
+    :param text: 简历文本
+    :return: 按位置排序的段落,没有识别到标题时为空列表
+    """
+    headings = [match for match in HEADING_PATTERN.finditer(text or '') if _is_heading(match)]
+    if not headings:
+        return []
+    sections = []
+    if headings[0].start() > 0:
+        sections.append(Section(SECTION_BASIC, None, 0, headings[0].start()))
+    for match, following in zip(headings, headings[1:] + [None]):
+        end = following.start() if following is not None else len(text)
+        heading = match.group('heading')
+        sections.append(Section(HEADING_KINDS[heading], heading, match.end(), end))
+    return sections
+
+
+class SectionedScan:
+    def __init__(self, text: str, sections: Sequence[Section], scanner: EntityScanner):
+        """
+        分段扫描结果: 段落在首次被需要时才扫描,且每个段落只扫描一次
+        first/all 与 ScanResult 接口一致,按 ENTITY_SECTIONS 只取相关段落中的实体,没有时回退到全文
+        项目经验等与字段无关的段落(通常是简历中最长的部分)只在回退时才扫描
+        :param text: 简历文本
+        :param sections: sectionize 的结果
+        :param scanner: 实体扫描器
+        """
+        self.text = text
+        self.sections = list(sections)
+        self.scanner = scanner
+        self._section_spans: List[Optional[List[Span]]] = [None] * len(self.sections)
+        self._whole: Optional[ScanResult] = None
+
+    def _scan_section(self, index: int) -> List[Span]:
+        spans = self._section_spans[index]
+        if spans is None:
+            section = self.sections[index]
+            spans = [
+                Span(span.type, span.value, span.start + section.start, span.end + section.start)
+                for span in self.scanner.scan(self.text[section.start:section.end])
+            ]
+            self._section_spans[index] = spans
+        return spans
+
+    @property
+    def whole(self) -> ScanResult:
+        """
+        全文扫描结果(由各段落结果拼接)
+        """
+        if self._whole is None:
+            self._whole = ScanResult([
+                span for index in range(len(self.sections)) for span in self._scan_section(index)
+            ])
+        return self._whole
+
+    def _spans(self, entity_type: str) -> List[Span]:
+        kinds = ENTITY_SECTIONS.get(entity_type)
+        if kinds:
+            spans = [
+                span
+                for index, section in enumerate(self.sections) if section.kind in kinds
+                for span in self._scan_section(index) if span.type == entity_type
+            ]
+            if spans:
+                return spans
+        return self.whole.by_type.get(entity_type, [])
+
+    def first(self, entity_type: str) -> Optional[str]:
+        spans = self._spans(entity_type)
+        return spans[0].value if spans else None
+
+    def all(self, entity_type: str) -> List[str]:
+        return [span.value for span in self._spans(entity_type)]
+
+    def text_of(self, kinds: Iterable[str]) -> str:
+        """
+        拼接指定类型段落的正文,没有对应段落时返回空字符串
+        """
+        kinds = set(kinds)
+        return '\n'.join(self.text[s.start:s.end] for s in self.sections if s.kind in kinds)
+
+
+# 抽取器使用的扫描结果类型
+ResumeScan = Union[SectionedScan, ScanResult]
+
+
+def scan_sections(text: str, scanner: EntityScanner) -> ResumeScan:
+    """
+    识别到段落标题时分段扫描,否则直接扫描全文
+    """
+    sections = sectionize(text)
+    if not sections:
+        return scanner.collect(text)
+    return SectionedScan(text, sections, scanner)
@@ -0,0 +1,227 @@
+import json
+import os
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+
+from source.services.model_registry import model_registry
+
+# 默认技能词表路径(可通过环境变量 SKILL_TAXONOMY_PATH 覆盖)
+DEFAULT_TAXONOMY_PATH = "source/data/skill_taxonomy.json"
+
+# 技能多样性按覆盖的类别数计分,覆盖该数量的类别即满分
+DIVERSITY_TARGET_CATEGORIES = 5
+
+
+def _is_word_char(char: str) -> bool:
+    """
+    英文单词字符(用于英文技能词的边界判断,中文不做边界限制)
+    """
+    return char.isascii() and (char.isalnum() or char == '_')
+
+
+def _lower_preserving_length(text: str) -> str:
+    """
+    转小写且保证长度不变,保证匹配位置可以映射回原文
+    """
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered
+    return ''.join(c if len(c.lower()) != 1 else c.lower() for c in text)
+
+
+class AhoCorasick:
+    def __init__(self):
+        """
+        Aho-Corasick多模式匹配自动机
+        一次线性扫描找出文本中所有模式串的出现位置
+        """
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[int]] = [[]]
+        self.patterns: List[str] = []
+        self._built = False
+
+    def add(self, pattern: str) -> int:
+        """
+        添加模式串
+        :return: 模式串编号
+        """
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        pattern_id = len(self.patterns)
+        self.patterns.append(pattern)
+        self._output[state].append(pattern_id)
+        self._built = False
+        return pattern_id
+
+    def build(self) -> None:
+        """
+        BFS构建失败指针,并把失败链上的输出合并到每个状态
+        """
+        queue = deque()
+        for state in self._goto[0].values():
+            self._fail[state] = 0
+            queue.append(state)
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+        self._built = True
+
+    def iter_matches(self, text: str):
+        """
+        扫描文本
+        :return: (起始位置, 结束位置, 模式串编号) 迭代器
+        """
+        if not self._built:
+            self.build()
+        goto, fail, output, patterns = self._goto, self._fail, self._output, self.patterns
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for pattern_id in output[state]:
+                yield index + 1 - len(patterns[pattern_id]), index + 1, pattern_id
+
+
+class SkillTaxonomy:
+    def __init__(self, skills: List[Dict[str, Any]]):
+        """
+        技能词表: 规范名、别名、类别、权重,编译为一个自动机
+        :param skills: 技能条目列表,别名可为字符串或 {"term":..., "case_sensitive":...}
+        """
+        self.skills: Dict[str, Dict[str, Any]] = {}
+        self._alias_to_name: Dict[str, str] = {}
+        # 每个模式串对应 (规范名, 原始词, 是否区分大小写)
+        self._pattern_info: List[Tuple[str, str, bool]] = []
+        self._automaton = AhoCorasick()
+
+        for skill in skills:
+            name = skill['name']
+            self.skills[name] = {
+                'name': name,
+                'category': skill.get('category', 'other'),
+                'weight': float(skill.get('weight', 1.0))
+            }
+            default_case_sensitive = bool(skill.get('case_sensitive', False))
+            terms = [{'term': name, 'case_sensitive': default_case_sensitive}]
+            for alias in skill.get('aliases', []):
+                if isinstance(alias, str):
+                    terms.append({'term': alias, 'case_sensitive': default_case_sensitive})
+                else:
+                    terms.append({
+                        'term': alias['term'],
+                        'case_sensitive': alias.get('case_sensitive', default_case_sensitive)
+                    })
+            for term in terms:
+                self._add_term(name, term['term'], term['case_sensitive'])
+        self._automaton.build()
+
+        self.categories = sorted({skill['category'] for skill in self.skills.values()})
+
+    def _add_term(self, name: str, term: str, case_sensitive: bool) -> None:
+        term = term.strip()
+        if not term:
+            return
+        self._alias_to_name.setdefault(term.lower(), name)
+        self._automaton.add(term.lower())
+        self._pattern_info.append((name, term, case_sensitive))
+
+    @classmethod
+    def load(cls, path: str) -> 'SkillTaxonomy':
+        """
+        从JSON文件加载技能词表
+        """
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(data.get('skills', []))
+
+    def find_all(self, text: str) -> List[Dict[str, Any]]:
+        """
+        一次扫描找出文本中所有技能出现(忽略大小写,英文词需满足单词边界)
+        重叠时保留最左最长的匹配
+        :return: [{'skill','term','start','end'}] 按出现位置排序
+        """
+        if not text:
+            return []
+        lowered = _lower_preserving_length(text)
+        length = len(text)
+        candidates = []
+        for start, end, pattern_id in self._automaton.iter_matches(lowered):
+            name, term, case_sensitive = self._pattern_info[pattern_id]
+            if case_sensitive and text[start:end] != term:
+                continue
+            # 英文词两端不能紧邻英文字母/数字(避免 Java 命中 JavaScript)
+            if _is_word_char(term[0]) and start > 0 and _is_word_char(text[start - 1]):
+                continue
+            if _is_word_char(term[-1]) and end < length and _is_word_char(text[end]):
+                continue
+            candidates.append((start, -end, name, text[start:end]))
+
+        # 最左最长且不重叠
+        candidates.sort()
+        matches = []
+        last_end = 0
+        for start, neg_end, name, matched in candidates:
+            if start < last_end:
+                continue
+            matches.append({'skill': name, 'term': matched, 'start': start, 'end': -neg_end})
+            last_end = -neg_end
+        return matches
+
+    def extract(self, text: str) -> List[str]:
+        """
+        提取文本中的技能规范名(按首次出现顺序去重)
+        """
+        seen = {}
+        for match in self.find_all(text):
+            seen.setdefault(match['skill'], None)
+        return list(seen)
+
+    def canonicalize(self, skill: str) -> str:
+        """
+        技能名/别名转换为规范名,词表外的技能原样返回
+        """
+        if not isinstance(skill, str):
+            return skill
+        return self._alias_to_name.get(skill.strip().lower(), skill)
+
+    def category_of(self, skill: str) -> Optional[str]:
+        entry = self.skills.get(self.canonicalize(skill))
+        return entry['category'] if entry else None
+
+    def weight_of(self, skill: str, default: float = 1.0) -> float:
+        entry = self.skills.get(self.canonicalize(skill))
+        return entry['weight'] if entry else default
+
+
+def get_skill_taxonomy_path() -> str:
+    return os.getenv('SKILL_TAXONOMY_PATH', DEFAULT_TAXONOMY_PATH)
+
+
+def _load_skill_taxonomy() -> SkillTaxonomy:
+    return SkillTaxonomy.load(get_skill_taxonomy_path())
+
+
+model_registry.register("skill_taxonomy", _load_skill_taxonomy)
+
+
+def get_skill_taxonomy() -> SkillTaxonomy:
+    """
+    获取进程共享的技能词表(首次使用时编译自动机)
+    """
+    return model_registry.get("skill_taxonomy")
@@ -0,0 +1,289 @@
+import argparse
+import logging
+import os
+import re
+import threading
+from collections import Counter
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from source.services.model_registry import model_registry
+
+if TYPE_CHECKING:
+    from scipy import sparse
+
+logger = logging.getLogger(__name__)
+
+# 默认模型路径(可通过环境变量 TFIDF_MODEL_PATH 覆盖)
+DEFAULT_TFIDF_MODEL_PATH = "data/tfidf_model.npz"
+
+# 语料文档数达到该值后才使用语料模型,此前按请求拟合(避免由一两份简历构成的词表)
+TFIDF_MIN_DOCUMENTS = int(os.getenv('TFIDF_MIN_DOCUMENTS', '20'))
+
+# 与sklearn默认token_pattern一致: 至少两个字符的词
+TOKEN_PATTERN = re.compile(r'(?u)\b\w\w+\b')
+
+
+def words_to_tokens(words: List[str]) -> List[str]:
+    """
+    分词结果按token_pattern过滤并转小写
+    """
+    return TOKEN_PATTERN.findall(' '.join(words).lower())
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    jieba分词后按token_pattern过滤并转小写
+    """
+    from source.utils.jieba_cache import get_jieba
+    if not text:
+        return []
+    return words_to_tokens(get_jieba().cut(text))
+
+
+class CorpusTfidfModel:
+    def __init__(self, min_documents: int = TFIDF_MIN_DOCUMENTS):
+        """
+        基于语料拟合的TF-IDF模型
+        保存词表与文档频率,支持增量更新文档频率,请求时只做transform
+        :param min_documents: 文档数达到该值后is_fitted才为True
+        """
+        self.min_documents = max(min_documents, 1)
+        self.vocabulary: Dict[str, int] = {}
+        self.document_frequency = np.zeros(0, dtype=np.int64)
+        self.n_documents = 0
+        self._idf = np.zeros(0, dtype=np.float64)
+        self._lock = threading.Lock()
+        # 自加载(或上次合并保存)以来增量更新的文档频率与文档数,合并保存时只写入这部分
+        self._pending_frequency: Counter = Counter()
+        self._pending_documents = 0
+
+    @property
+    def is_fitted(self) -> bool:
+        return self.n_documents >= self.min_documents and len(self.vocabulary) > 0
+
+    def _update_idf(self) -> None:
+        # 平滑idf,与sklearn TfidfVectorizer(smooth_idf=True)一致
+        self._idf = np.log((1.0 + self.n_documents) / (1.0 + self.document_frequency)) + 1.0
+
+    def partial_fit(self, documents: Iterable[str], tokenized: bool = False) -> 'CorpusTfidfModel':
+        """
+        增量更新文档频率(新词追加到词表末尾,无需全量重新拟合)
+        :param documents: 文本列表,tokenized=True时为分词结果列表
+        :param tokenized: 输入是否已分词
+        """
+        token_sets = [set(doc if tokenized else tokenize(doc)) for doc in documents]
+        with self._lock:
+            new_terms = []
+            for tokens in token_sets:
+                for token in tokens:
+                    if token not in self.vocabulary:
+                        self.vocabulary[token] = len(self.vocabulary)
+                        new_terms.append(token)
+            df = np.zeros(len(self.vocabulary), dtype=np.int64)
+            df[:len(self.document_frequency)] = self.document_frequency
+            for tokens in token_sets:
+                for token in tokens:
+                    df[self.vocabulary[token]] += 1
+            self.document_frequency = df
+            self.n_documents += len(token_sets)
+            for tokens in token_sets:
+                self._pending_frequency.update(tokens)
+            self._pending_documents += len(token_sets)
+            self._update_idf()
+        return self
+
+    def fit(self, documents: Iterable[str], tokenized: bool = False) -> 'CorpusTfidfModel':
+        """
+        在语料上全量拟合
+        """
+        with self._lock:
+            self.vocabulary = {}
+            self.document_frequency = np.zeros(0, dtype=np.int64)
+            self.n_documents = 0
+        model = self.partial_fit(documents, tokenized=tokenized)
+        with self._lock:
+            self._pending_frequency = Counter()
+            self._pending_documents = 0
+        return model
+
+    def transform(self, documents: List[str], tokenized: bool = False) -> 'sparse.csr_matrix':
+        """
+        文本转换为L2归一化的TF-IDF稀疏矩阵(词表外的词忽略)
+        :param documents: 文本列表,tokenized=True时为分词结果列表
+        :param tokenized: 输入是否已分词
+        :return: csr矩阵 (文档数, 词表大小)
+        """
+        from scipy import sparse
+        vocabulary, idf = self.vocabulary, self._idf
+        indptr, indices, data = [0], [], []
+        for doc in documents:
+            counts = Counter(token for token in (doc if tokenized else tokenize(doc)) if token in vocabulary)
+            for token, count in counts.items():
+                col = vocabulary[token]
+                # 增量更新期间词表可能比idf长,越界词忽略
+                if col < len(idf):
+                    indices.append(col)
+                    data.append(count * idf[col])
+            indptr.append(len(indices))
+        matrix = sparse.csr_matrix(
+            (np.asarray(data, dtype=np.float64), np.asarray(indices, dtype=np.int64), np.asarray(indptr)),
+            shape=(len(documents), len(idf))
+        )
+        norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+        norms[norms == 0] = 1.0
+        return sparse.diags(1.0 / norms) @ matrix
+
+    def save(self, path: str) -> None:
+        """
+        序列化到磁盘(npz格式,不使用pickle)
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            terms = np.empty(len(self.vocabulary), dtype=object)
+            for term, index in self.vocabulary.items():
+                terms[index] = term
+            tmp_path = path + '.tmp.npz'
+            np.savez_compressed(
+                tmp_path,
+                terms=terms.astype(str),
+                document_frequency=self.document_frequency,
+                n_documents=np.asarray(self.n_documents)
+            )
+        os.replace(tmp_path, path)
+
+    def save_merged(self, path: str) -> None:
+        """
+        合并保存: 把本进程增量更新的文档频率累加到磁盘上的最新模型后写回,并采用合并后的结果
+        多个worker退出时各自保存,通过文件锁串行执行读取-合并-写入,互不覆盖
+        """
+        import fcntl
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path + '.lock', 'w') as lock_file, self._lock:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            merged = CorpusTfidfModel.load(path) if os.path.exists(path) else CorpusTfidfModel()
+            for term in self._pending_frequency:
+                if term not in merged.vocabulary:
+                    merged.vocabulary[term] = len(merged.vocabulary)
+            df = np.zeros(len(merged.vocabulary), dtype=np.int64)
+            df[:len(merged.document_frequency)] = merged.document_frequency
+            for term, count in self._pending_frequency.items():
+                df[merged.vocabulary[term]] += count
+            merged.document_frequency = df
+            merged.n_documents += self._pending_documents
+            merged.save(path)
+
+            self.vocabulary = merged.vocabulary
+            self.document_frequency = merged.document_frequency
+            self.n_documents = merged.n_documents
+            self._pending_frequency = Counter()
+            self._pending_documents = 0
+            self._update_idf()
+
+    @classmethod
+    def load(cls, path: str) -> 'CorpusTfidfModel':
+        """
+        从磁盘加载模型
+        """
+        model = cls()
+        with np.load(path, allow_pickle=False) as data:
+            model.vocabulary = {term: i for i, term in enumerate(data['terms'].tolist())}
+            model.document_frequency = data['document_frequency'].astype(np.int64)
+            model.n_documents = int(data['n_documents'])
+        model._update_idf()
+        return model
+
+
+def get_tfidf_model_path() -> str:
+    return os.getenv('TFIDF_MODEL_PATH', DEFAULT_TFIDF_MODEL_PATH)
+
+
+def _load_tfidf_model() -> CorpusTfidfModel:
+    path = get_tfidf_model_path()
+    if os.path.exists(path):
+        return CorpusTfidfModel.load(path)
+    logger.warning("TF-IDF model not found at %s, semantic similarity falls back to per-request fitting", path)
+    return CorpusTfidfModel()
+
+
+model_registry.register("tfidf_model", _load_tfidf_model)
+
+
+def get_tfidf_model() -> CorpusTfidfModel:
+    """
+    获取进程共享的语料TF-IDF模型
+    """
+    return model_registry.get("tfidf_model")
+
+
+def is_online_update_enabled() -> bool:
+    """
+    是否在简历上传时增量更新文档频率(TFIDF_ONLINE_UPDATE=1)
+    """
+    return os.getenv('TFIDF_ONLINE_UPDATE', '0') == '1'
+
+
+def _iter_mongo_documents(mongo_uri: str) -> List[str]:
+    """
+    从MongoDB中已持久化的简历/匹配结果读取语料
+    """
+    from pymongo import MongoClient
+    from source.services.parsed_resume import flatten_text
+
+    client = MongoClient(mongo_uri)
+    # 与缓存服务使用同一数据库
+    db = client[os.getenv('MONGO_DB', 'resume_analysis_db')]
+    documents = []
+    for doc in db['resumes'].find({}, {'resume_info': 1}):
+        documents.append(flatten_text(doc.get('resume_info')))
+    for doc in db['match_results'].find({}, {'job_description': 1}):
+        documents.append(flatten_text(doc.get('job_description')))
+    client.close()
+    return documents
+
+
+def _iter_text_files(corpus_dir: str) -> List[str]:
+    documents = []
+    for root, _, files in os.walk(corpus_dir):
+        for name in sorted(files):
+            if name.endswith('.txt'):
+                with open(os.path.join(root, name), 'r', encoding='utf-8') as f:
+                    documents.append(f.read())
+    return documents
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    离线拟合: python -m source.services.tfidf_model --corpus-dir texts/ 或 --mongo-uri mongodb://...
+    """
+    parser = argparse.ArgumentParser(description="Fit corpus TF-IDF model")
+    parser.add_argument('--corpus-dir', help="directory of .txt documents")
+    parser.add_argument('--mongo-uri', help="read stored resumes/job descriptions from MongoDB")
+    parser.add_argument('--output', default=get_tfidf_model_path())
+    parser.add_argument('--update', action='store_true', help="update existing model instead of refitting")
+    args = parser.parse_args(argv)
+
+    documents = []
+    if args.corpus_dir:
+        documents.extend(_iter_text_files(args.corpus_dir))
+    if args.mongo_uri:
+        documents.extend(_iter_mongo_documents(args.mongo_uri))
+    if not documents:
+        parser.error("no documents found, use --corpus-dir and/or --mongo-uri")
+
+    if args.update and os.path.exists(args.output):
+        model = CorpusTfidfModel.load(args.output).partial_fit(documents)
+    else:
+        model = CorpusTfidfModel().fit(documents)
+    model.save(args.output)
+    print(f"TF-IDF model saved to {args.output}: {model.n_documents} documents, {len(model.vocabulary)} terms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+import asyncio
+import json
+import logging
+import os
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+# 攒批写入参数
+WRITE_BATCH_SIZE = int(os.getenv('MONGO_WRITE_BATCH_SIZE', '500'))
+WRITE_FLUSH_SECONDS = float(os.getenv('MONGO_WRITE_FLUSH_SECONDS', '1'))
+WRITE_QUEUE_SIZE = int(os.getenv('MONGO_WRITE_QUEUE_SIZE', '10000'))
+# 排队及写入中数据的字节上限(按JSON序列化长度估算),分析结果等大文档以此为准
+WRITE_QUEUE_BYTES = int(os.getenv('MONGO_WRITE_QUEUE_BYTES', str(64 * 1024 * 1024)))
+
+
+class PendingUpsert(NamedTuple):
+    collection: str
+    filter: Dict[str, Any]
+    update: Dict[str, Any]
+    size: int
+
+
+class WriteBehindPersister:
+    def __init__(self,
+                 get_db: Callable[[], Any],
+                 batch_size: int = WRITE_BATCH_SIZE,
+                 flush_seconds: float = WRITE_FLUSH_SECONDS,
+                 max_queue_size: int = WRITE_QUEUE_SIZE,
+                 max_queue_bytes: int = WRITE_QUEUE_BYTES):
+        """
+        MongoDB异步攒批写入
+        写入请求先进入有界队列,由后台任务按条数或时间窗口合并为bulk_write,响应不等待MongoDB
+        :param get_db: 返回motor数据库对象的函数(首次写入时才创建客户端)
+        :param batch_size: 单批最大写入条数
+        :param flush_seconds: 攒批的最长等待秒数
+        :param max_queue_size: 队列条数上限,超出时丢弃新的写入并计数
+        :param max_queue_bytes: 排队及写入中数据的字节上限,超出时同样丢弃
+        """
+        self.get_db = get_db
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.max_queue_size = max_queue_size
+        self.max_queue_bytes = max_queue_bytes
+        self.pending_bytes = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        # 计数器
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        # 同批内被后续写入覆盖而合并掉的条数
+        self.coalesced = 0
+        self.flushes = 0
+
+    def _ensure_queue(self) -> asyncio.Queue:
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        return self._queue
+
+    def upsert(self, collection: str, filter: Dict[str, Any], update: Dict[str, Any]) -> bool:
+        """
+        提交一次upsert(不等待写入)
+        :return: 是否入队,队列条数或字节数已满时返回False
+        """
+        size = len(json.dumps(update, ensure_ascii=False, default=str))
+        if self.pending_bytes + size > self.max_queue_bytes:
+            self.dropped += 1
+            return False
+        try:
+            self._ensure_queue().put_nowait(PendingUpsert(collection, filter, update, size))
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+        self.pending_bytes += size
+        self.enqueued += 1
+        return True
+
+    def start(self) -> None:
+        if self._task is None:
+            self._ensure_queue()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        写完队列中剩余的数据后停止(服务退出时调用)
+        """
+        if self._task is None:
+            return
+        # None作为结束标记,排在已提交的写入之后
+        await self._queue.put(None)
+        await self._task
+        self._task = None
+
+    async def _run(self) -> None:
+        queue = self._queue
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            batch = [item]
+            deadline = loop.time() + self.flush_seconds
+            stopping = False
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            try:
+                await self._flush(batch)
+            finally:
+                self.pending_bytes -= sum(item.size for item in batch)
+            if stopping:
+                return
+
+    async def _flush(self, batch: List[PendingUpsert]) -> None:
+        from pymongo import UpdateOne
+        from pymongo.errors import BulkWriteError
+
+        # 同一文档在一批内的多次写入只保留最后一次
+        grouped: Dict[str, 'OrderedDict[str, PendingUpsert]'] = {}
+        for item in batch:
+            key = json.dumps(item.filter, sort_keys=True, default=str)
+            ops = grouped.setdefault(item.collection, OrderedDict())
+            ops.pop(key, None)
+            ops[key] = item
+        self.coalesced += len(batch) - sum(len(ops) for ops in grouped.values())
+
+        self.flushes += 1
+        db = self.get_db()
+        for collection, ops in grouped.items():
+            requests = [UpdateOne(item.filter, item.update, upsert=True) for item in ops.values()]
+            try:
+                await db[collection].bulk_write(requests, ordered=False)
+                self.written += len(requests)
+            except BulkWriteError as e:
+                errors = len(e.details.get('writeErrors', []))
+                self.failed += errors
+                self.written += len(requests) - errors
+                logger.error("MongoDB bulk write error:%s of %s writes to %s failed", errors, len(requests), collection)
+            except Exception as e:
+                self.failed += len(requests)
+                logger.error("MongoDB bulk write error:%s", e)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'enqueued': self.enqueued,
+            'written': self.written,
+            'dropped': self.dropped,
+            'failed': self.failed,
+            'coalesced': self.coalesced,
+            'flushes': self.flushes,
+            'pending': self._queue.qsize() if self._queue is not None else 0,
+            'pending_bytes': self.pending_bytes
+        }
@@ -0,0 +1,63 @@
+import argparse
+import os
+import threading
+from typing import List, Optional
+
+# 随代码包发布的预构建词典缓存(可通过环境变量 JIEBA_CACHE_FILE 覆盖)
+DEFAULT_JIEBA_CACHE_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'jieba.cache')
+
+_configure_lock = threading.Lock()
+_configured = False
+
+
+def get_jieba_cache_file() -> str:
+    return os.getenv('JIEBA_CACHE_FILE', DEFAULT_JIEBA_CACHE_FILE)
+
+
+def get_jieba():
+    """
+    延迟导入jieba
+    存在预构建缓存时从缓存加载词典,避免在只读、/tmp为空的函数实例上重新构建前缀词典
+    """
+    global _configured
+    import jieba
+    if _configured:
+        return jieba
+    with _configure_lock:
+        if not _configured:
+            cache_file = get_jieba_cache_file()
+            if os.path.isfile(cache_file):
+                jieba.dt.tmp_dir = os.path.dirname(os.path.abspath(cache_file))
+                jieba.dt.cache_file = os.path.basename(cache_file)
+            _configured = True
+    return jieba
+
+
+def build_cache(cache_file: str) -> None:
+    """
+    构建默认词典的前缀词典缓存
+    """
+    import jieba
+    directory = os.path.dirname(os.path.abspath(cache_file))
+    os.makedirs(directory, exist_ok=True)
+    tokenizer = jieba.Tokenizer()
+    tokenizer.tmp_dir = directory
+    tokenizer.cache_file = os.path.basename(cache_file)
+    if os.path.exists(cache_file):
+        os.remove(cache_file)
+    tokenizer.initialize()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    部署前预构建: python -m source.utils.jieba_cache
+    """
+    parser = argparse.ArgumentParser(description="Prebuild jieba dictionary cache")
+    parser.add_argument('--output', default=get_jieba_cache_file())
+    args = parser.parse_args(argv)
+    build_cache(args.output)
+    print(f"jieba cache saved to {args.output}: {os.path.getsize(args.output)} bytes")
+
+
+if __name__ == "__main__":
+    main()
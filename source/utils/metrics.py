@@ -0,0 +1,211 @@
+import bisect
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from functools import wraps
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from source.utils.profiler import profiler
+
+# 耗时直方图的桶上界(秒)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# 各处理阶段耗时
+STAGE_METRIC = 'resume_stage_duration_seconds'
+# 请求总耗时
+HTTP_METRIC = 'http_request_duration_seconds'
+
+LabelSet = Tuple[Tuple[str, str], ...]
+
+logger = logging.getLogger(__name__)
+
+
+class MetricFamily(NamedTuple):
+    """
+    采集函数返回的指标(gauge/counter/histogram)
+    histogram 的样本为 (标签, (桶上界序列, 各桶累计计数, 总和, 总数))
+    """
+    name: str
+    type: str
+    help: str
+    samples: List[Tuple[Dict[str, str], object]]
+
+
+class Histogram:
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[int]:
+        total, result = 0, []
+        for count in self.counts:
+            total += count
+            result.append(total)
+        return result
+
+
+def _label_set(labels: Dict[str, str]) -> LabelSet:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(labels: Iterable[Tuple[str, str]]) -> str:
+    parts = []
+    for key, value in labels:
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        parts.append(f'{key}="{value}"')
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metrics:
+    def __init__(self):
+        """
+        进程内指标: 直方图与计数器,以Prometheus文本格式输出
+        其余组件的统计(缓存命中、写入队列、推理批次等)由注册的采集函数在输出时读取
+        多worker部署时每个进程各自统计
+        """
+        self._lock = threading.Lock()
+        self._help: Dict[str, Tuple[str, str]] = {}
+        self._histograms: Dict[str, Dict[LabelSet, Histogram]] = {}
+        self._counters: Dict[str, Dict[LabelSet, float]] = {}
+        self._collectors: List[Callable[[], Iterable[MetricFamily]]] = []
+        self.describe(STAGE_METRIC, 'histogram', 'Latency of resume processing stages')
+        self.describe(HTTP_METRIC, 'histogram', 'Latency of HTTP requests')
+
+    def describe(self, name: str, metric_type: str, help_text: str) -> None:
+        self._help[name] = (metric_type, help_text)
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        key = _label_set(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram()
+            histogram.observe(value)
+
+    def inc(self, name: str, value: float = 1, **labels: str) -> None:
+        key = _label_set(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def register_collector(self, collector: Callable[[], Iterable[MetricFamily]]) -> None:
+        self._collectors.append(collector)
+
+    def _families(self) -> List[MetricFamily]:
+        families = []
+        with self._lock:
+            for name, series in self._histograms.items():
+                help_text = self._help.get(name, ('histogram', name))[1]
+                families.append(MetricFamily(name, 'histogram', help_text, [
+                    (dict(labels), (h.buckets, h.cumulative(), h.sum, h.count)) for labels, h in series.items()
+                ]))
+            for name, series in self._counters.items():
+                help_text = self._help.get(name, ('counter', name))[1]
+                families.append(MetricFamily(name, 'counter', help_text, [
+                    (dict(labels), value) for labels, value in series.items()
+                ]))
+        for collector in self._collectors:
+            try:
+                families.extend(collector())
+            except Exception as e:
+                logger.warning("Metrics collector %s failed:%s", getattr(collector, '__qualname__', collector), e)
+        return families
+
+    def render(self) -> str:
+        """
+        Prometheus文本格式(0.0.4)
+        """
+        lines = []
+        for family in self._families():
+            lines.append(f'# HELP {family.name} {family.help}')
+            lines.append(f'# TYPE {family.name} {family.type}')
+            for labels, value in family.samples:
+                items = sorted(labels.items())
+                if family.type != 'histogram':
+                    lines.append(f'{family.name}{_format_labels(items)} {_format_value(value)}')
+                    continue
+                bounds, cumulative, total, count = value
+                for bound, bucket_count in zip(list(bounds) + [float('inf')], cumulative):
+                    le = _format_value(float(bound))
+                    lines.append(f'{family.name}_bucket{_format_labels(items + [("le", le)])} {bucket_count}')
+                lines.append(f'{family.name}_sum{_format_labels(items)} {_format_value(float(total))}')
+                lines.append(f'{family.name}_count{_format_labels(items)} {count}')
+        return '\n'.join(lines) + '\n'
+
+
+metrics = Metrics()
+
+# 当前请求各阶段累计耗时(阶段名 -> 秒),请求之外为None
+_request_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar('request_timings', default=None)
+
+
+def begin_request() -> Token:
+    return _request_timings.set({})
+
+
+def end_request(token: Token) -> Dict[str, float]:
+    timings = _request_timings.get() or {}
+    _request_timings.reset(token)
+    return timings
+
+
+def record_stage(name: str, seconds: float) -> None:
+    metrics.observe(STAGE_METRIC, seconds, stage=name)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings[name] = timings.get(name, 0.0) + seconds
+
+
+@contextmanager
+def stage(name: str):
+    """
+    记录一段处理阶段的耗时: 计入阶段直方图,在请求内时同时计入该请求的Server-Timing
+    请求被栈采样时,阶段执行期间所在线程也加入采样
+    """
+    profile = profiler.attach_thread()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, time.perf_counter() - start)
+        if profile is not None:
+            profiler.detach_thread(profile)
+
+
+def timed(name: str):
+    """
+    同步函数的阶段计时装饰器
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def server_timing_header(timings: Dict[str, float], total: Optional[float] = None) -> str:
+    """
+    生成 Server-Timing 响应头,耗时单位为毫秒
+    """
+    entries = [f'{name};dur={seconds * 1000:.2f}' for name, seconds in timings.items()]
+    if total is not None:
+        entries.append(f'total;dur={total * 1000:.2f}')
+    return ', '.join(entries)
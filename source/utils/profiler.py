@@ -0,0 +1,300 @@
+import heapq
+import hmac
+import itertools
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextvars import ContextVar
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+# 请求采样比例(0-1),默认0不采样
+PROFILE_SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', '0'))
+# 设置后,携带该令牌(X-Profile-Token请求头)的请求总会被采样;管理接口只对携带该令牌的请求开放,未设置时不可访问
+PROFILE_TOKEN = os.getenv('PROFILE_TOKEN', '')
+# 栈采样间隔(毫秒)
+PROFILE_INTERVAL_MS = float(os.getenv('PROFILE_INTERVAL_MS', '5'))
+# 保留最慢的N份采样结果(令牌触发的另外保留最近N份)
+PROFILE_KEEP = int(os.getenv('PROFILE_KEEP', '20'))
+
+TOKEN_HEADER = 'x-profile-token'
+# 不采样的路径(管理接口自身和指标)
+EXCLUDED_PREFIXES = ('/admin/', '/metrics')
+# 单个栈最多记录的帧数
+MAX_STACK_DEPTH = 128
+
+# 帧: (函数限定名, 文件, 首行号)
+Frame = Tuple[str, str, int]
+
+
+class Profile:
+    def __init__(self, profile_id: str, method: str, path: str, forced: bool):
+        """
+        一个请求的栈采样结果
+        采样范围: 处理请求的事件循环线程(整个请求期间),以及各计时阶段(metrics.stage)所在的工作线程
+        事件循环线程由并发请求共享,其样本可能包含其他请求的协程
+        """
+        self.profile_id = profile_id
+        self.method = method
+        self.path = path
+        self.forced = forced
+        self.started_at = time.time()
+        self.duration = 0.0
+        self.status = 0
+        self.frames: List[Frame] = []
+        # (线程名, 帧索引序列[根在前]) -> 样本数
+        self.stacks: Counter = Counter()
+        # 线程ident -> [线程名, 附着次数]
+        self._threads: Dict[int, List[Any]] = {}
+        self._frame_index: Dict[Any, int] = {}
+        self._context_token = None
+        self._seq = 0
+
+    @property
+    def sample_count(self) -> int:
+        return sum(self.stacks.values())
+
+    def _frame_id(self, code) -> int:
+        index = self._frame_index.get(code)
+        if index is None:
+            index = self._frame_index[code] = len(self.frames)
+            self.frames.append((
+                getattr(code, 'co_qualname', code.co_name),
+                code.co_filename,
+                code.co_firstlineno
+            ))
+        return index
+
+    def _sample(self, current_frames: Mapping[int, Any]) -> None:
+        for ident, (thread_name, _) in self._threads.items():
+            frame = current_frames.get(ident)
+            stack = []
+            while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                stack.append(self._frame_id(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                stack.reverse()
+                self.stacks[(thread_name, tuple(stack))] += 1
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'profile_id': self.profile_id,
+            'method': self.method,
+            'path': self.path,
+            'status': self.status,
+            'duration_ms': round(self.duration * 1000, 2),
+            'samples': self.sample_count,
+            'started_at': self.started_at,
+            'forced': self.forced
+        }
+
+    def _frame_name(self, index: int) -> str:
+        name, filename, line = self.frames[index]
+        return f"{name} ({os.path.basename(filename)}:{line})"
+
+    def to_collapsed(self) -> str:
+        """
+        折叠栈格式(flamegraph.pl / speedscope / inferno 均可读取): 每行 "线程;帧;...;帧 样本数"
+        """
+        lines = []
+        for (thread_name, stack), count in self.stacks.most_common():
+            names = [thread_name] + [self._frame_name(index) for index in stack]
+            lines.append(';'.join(name.replace(';', ',') for name in names) + f' {count}')
+        return '\n'.join(lines) + '\n'
+
+    def to_speedscope(self, interval_ms: float = PROFILE_INTERVAL_MS) -> Dict[str, Any]:
+        """
+        speedscope 文件格式(每个线程一个sampled profile,权重为毫秒)
+        """
+        threads: Dict[str, List[Tuple[Tuple[int, ...], int]]] = {}
+        for (thread_name, stack), count in self.stacks.items():
+            threads.setdefault(thread_name, []).append((stack, count))
+        profiles = []
+        for thread_name, samples in threads.items():
+            weights = [count * interval_ms for _, count in samples]
+            profiles.append({
+                'type': 'sampled',
+                'name': f'{self.method} {self.path} [{thread_name}]',
+                'unit': 'milliseconds',
+                'startValue': 0,
+                'endValue': sum(weights),
+                'samples': [list(stack) for stack, _ in samples],
+                'weights': weights
+            })
+        return {
+            '$schema': 'https://www.speedscope.app/file-format-schema.json',
+            'name': f'{self.method} {self.path} {self.duration * 1000:.0f}ms',
+            'exporter': 'resume-analysis-profiler',
+            'activeProfileIndex': 0,
+            'shared': {'frames': [
+                {'name': name, 'file': filename, 'line': line}
+                for name, filename, line in self.frames
+            ]},
+            'profiles': profiles
+        }
+
+
+# 当前请求的采样(请求之外或未采样时为None)
+_current_profile: ContextVar[Optional[Profile]] = ContextVar('current_profile', default=None)
+
+
+class RequestProfiler:
+    def __init__(self,
+                 sample_rate: float = PROFILE_SAMPLE_RATE,
+                 token: str = PROFILE_TOKEN,
+                 interval_ms: float = PROFILE_INTERVAL_MS,
+                 keep: int = PROFILE_KEEP):
+        """
+        按需开启的请求栈采样器: 按比例或由携带令牌的请求触发,由后台线程定时读取相关线程的调用栈
+        未开启(比例为0且未设置令牌)时每个请求只做一次属性判断
+        :param sample_rate: 请求采样比例
+        :param token: 强制采样和访问管理接口的令牌,为空时不支持请求头触发,管理接口拒绝访问
+        :param interval_ms: 栈采样间隔
+        :param keep: 保留最慢的采样份数
+        """
+        self.sample_rate = max(0.0, min(sample_rate, 1.0))
+        self.token = token
+        self.interval = max(interval_ms, 0.5) / 1000
+        self.keep = max(keep, 1)
+        self.enabled = self.sample_rate > 0 or bool(self.token)
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._active: List[Profile] = []
+        # 最慢的采样结果(小根堆)与令牌触发的最近结果
+        self._slowest: List[Tuple[float, int, Profile]] = []
+        self._forced: deque = deque(maxlen=self.keep)
+        self._ids = itertools.count(1)
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = False
+
+    def is_authorized(self, headers: Mapping[str, str]) -> bool:
+        """
+        未设置令牌时拒绝所有请求(采样内容来自线上流量,只对持有令牌的调用方开放)
+        """
+        if not self.token:
+            return False
+        return hmac.compare_digest(headers.get(TOKEN_HEADER, ''), self.token)
+
+    def start(self, method: str, path: str, headers: Mapping[str, str]) -> Optional[Profile]:
+        """
+        决定是否采样该请求;采样时附着当前(事件循环)线程并开始采样
+        """
+        if not self.enabled or path.startswith(EXCLUDED_PREFIXES):
+            return None
+        forced = TOKEN_HEADER in headers and self.is_authorized(headers)
+        if not forced and (self.sample_rate <= 0 or random.random() >= self.sample_rate):
+            return None
+        seq = next(self._ids)
+        profile = Profile(f'{os.getpid()}-{seq}', method, path, forced)
+        profile._seq = seq
+        with self._lock:
+            self._ensure_thread()
+            self._active.append(profile)
+            self._attach(profile)
+            self._wakeup.notify()
+        profile._context_token = _current_profile.set(profile)
+        return profile
+
+    def stop(self, profile: Profile, path: str, status: int, seconds: float) -> None:
+        """
+        结束采样并按耗时保留结果
+        :param path: 路由模板
+        """
+        _current_profile.reset(profile._context_token)
+        with self._lock:
+            self._active.remove(profile)
+            profile._threads.clear()
+            profile.path = path
+            profile.status = status
+            profile.duration = seconds
+            if profile.forced:
+                self._forced.append(profile)
+            elif len(self._slowest) < self.keep:
+                heapq.heappush(self._slowest, (seconds, profile._seq, profile))
+            elif seconds > self._slowest[0][0]:
+                heapq.heapreplace(self._slowest, (seconds, profile._seq, profile))
+
+    def _attach(self, profile: Profile) -> None:
+        entry = profile._threads.get(threading.get_ident())
+        if entry is None:
+            profile._threads[threading.get_ident()] = [threading.current_thread().name, 1]
+        else:
+            entry[1] += 1
+
+    def _detach(self, profile: Profile) -> None:
+        entry = profile._threads.get(threading.get_ident())
+        if entry is not None:
+            entry[1] -= 1
+            if entry[1] <= 0:
+                del profile._threads[threading.get_ident()]
+
+    def attach_thread(self) -> Optional[Profile]:
+        """
+        当前请求被采样时,把当前线程加入采样范围(可嵌套)
+        """
+        profile = _current_profile.get()
+        if profile is not None:
+            with self._lock:
+                if profile in self._active:
+                    self._attach(profile)
+        return profile
+
+    def detach_thread(self, profile: Profile) -> None:
+        with self._lock:
+            self._detach(profile)
+
+    def _ensure_thread(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped = False
+            self._thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                while not self._active and not self._stopped:
+                    self._wakeup.wait()
+                if self._stopped:
+                    return
+                current_frames = sys._current_frames()
+                for profile in self._active:
+                    profile._sample(current_frames)
+            del current_frames
+            time.sleep(self.interval)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            self._stopped = True
+            self._wakeup.notify()
+
+    def profiles(self) -> List[Profile]:
+        """
+        保留的采样结果,按耗时降序
+        """
+        with self._lock:
+            kept = [profile for _, _, profile in self._slowest] + list(self._forced)
+        return sorted(kept, key=lambda profile: profile.duration, reverse=True)
+
+    def get(self, profile_id: str) -> Optional[Profile]:
+        for profile in self.profiles():
+            if profile.profile_id == profile_id:
+                return profile
+        return None
+
+    def export(self, profile: Profile, fmt: str) -> Tuple[str, str, str]:
+        """
+        :param fmt: collapsed 或 speedscope
+        :return: (内容, 媒体类型, 文件名)
+        """
+        if fmt == 'speedscope':
+            content = json.dumps(profile.to_speedscope(self.interval * 1000), ensure_ascii=False)
+            return content, 'application/json', f'profile-{profile.profile_id}.speedscope.json'
+        if fmt == 'collapsed':
+            return profile.to_collapsed(), 'text/plain', f'profile-{profile.profile_id}.collapsed.txt'
+        raise ValueError(f"Unsupported profile format:{fmt}")
+
+
+profiler = RequestProfiler()
@@ -0,0 +1,172 @@
+import importlib.util
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+from source.utils.metrics import MetricFamily, metrics
+
+logger = logging.getLogger(__name__)
+
+# 启动模式: eager 启动时预热抽取器和词表, lazy 全部推迟到首次请求(冷启动敏感的函数计算部署)
+STARTUP_MODE_EAGER = "eager"
+STARTUP_MODE_LAZY = "lazy"
+
+# 计时的第三方重型依赖(只记录顶层包首次导入)
+TRACKED_PACKAGES = frozenset([
+    'numpy', 'scipy', 'sklearn', 'jieba', 'fitz', 'pymupdf', 'redis', 'motor', 'pymongo',
+    'torch', 'transformers', 'onnxruntime', 'tokenizers', 'fastapi', 'uvicorn'
+])
+# 计时的项目模块前缀
+TRACKED_PREFIX = 'source.'
+
+
+def get_startup_mode() -> str:
+    """
+    读取启动模式(STARTUP_MODE=eager/lazy)
+    """
+    mode = os.getenv("STARTUP_MODE", STARTUP_MODE_EAGER).strip().lower()
+    if mode not in (STARTUP_MODE_EAGER, STARTUP_MODE_LAZY):
+        logger.warning("Unknown STARTUP_MODE:%s, fallback to %s", mode, STARTUP_MODE_EAGER)
+        mode = STARTUP_MODE_EAGER
+    return mode
+
+
+def is_lazy_startup() -> bool:
+    return get_startup_mode() == STARTUP_MODE_LAZY
+
+
+def _peak_rss_mb() -> Optional[float]:
+    try:
+        import resource
+    except ImportError:
+        return None
+    # Linux下ru_maxrss单位为KB, macOS为字节
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+class StartupReport:
+    def __init__(self):
+        """
+        启动耗时报告: 按模块记录导入耗时(含其依赖,与 -X importtime 的累计时间一致)和各资源初始化耗时
+        """
+        self.created_at = time.perf_counter()
+        self.ready_at: Optional[float] = None
+        self.entries: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def track(self, kind: str, name: str):
+        """
+        记录一段耗时
+        :param kind: import 或 init
+        :param name: 模块或资源名称
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            with self._lock:
+                self.entries.append({
+                    'kind': kind,
+                    'name': name,
+                    'seconds': round(seconds, 4),
+                    'since_start': round(start - self.created_at, 4)
+                })
+
+    def mark_ready(self) -> None:
+        self.ready_at = time.perf_counter()
+
+    def as_dict(self, top_n: Optional[int] = None) -> Dict[str, Any]:
+        """
+        :param top_n: 每类只保留耗时最长的前N项
+        """
+        with self._lock:
+            entries = list(self.entries)
+        report = {
+            'startup_mode': get_startup_mode(),
+            'ready_seconds': round(self.ready_at - self.created_at, 4) if self.ready_at else None,
+            'peak_rss_mb': _peak_rss_mb()
+        }
+        for kind in ('import', 'init'):
+            items = sorted((e for e in entries if e['kind'] == kind), key=lambda e: e['seconds'], reverse=True)
+            report[kind] = items[:top_n] if top_n else items
+        return report
+
+    def collect_metrics(self) -> List[MetricFamily]:
+        with self._lock:
+            entries = list(self.entries)
+        families = [MetricFamily('resume_model_load_seconds', 'gauge', 'Time spent loading each lazily loaded resource',
+                                 [({'name': e['name']}, e['seconds']) for e in entries if e['kind'] == 'init'])]
+        if self.ready_at:
+            families.append(MetricFamily('resume_startup_ready_seconds', 'gauge', 'Seconds from import to ready',
+                                         [({}, round(self.ready_at - self.created_at, 4))]))
+        return families
+
+    def format(self, top_n: int = 10) -> str:
+        report = self.as_dict(top_n)
+        lines = [f"Startup report: mode={report['startup_mode']} ready={report['ready_seconds']}s "
+                 f"peak_rss={report['peak_rss_mb']}MB"]
+        for kind in ('import', 'init'):
+            for entry in report[kind]:
+                lines.append(f"  {kind:<6} {entry['seconds']:>8.3f}s  {entry['name']}")
+        return '\n'.join(lines)
+
+
+class _ImportTimer:
+    def __init__(self, report: StartupReport):
+        """
+        sys.meta_path 钩子: 为项目模块和重型依赖的加载计时
+        只替换对应spec的loader实例上的exec_module,不改变loader类型
+        """
+        self.report = report
+        self._resolving = set()
+
+    @staticmethod
+    def is_tracked(fullname: str) -> bool:
+        return fullname.startswith(TRACKED_PREFIX) or fullname in TRACKED_PACKAGES
+
+    def find_spec(self, fullname, path=None, target=None):
+        if not self.is_tracked(fullname) or fullname in self._resolving:
+            return None
+        self._resolving.add(fullname)
+        try:
+            # 交给其余finder查找,本钩子只负责计时
+            spec = importlib.util.find_spec(fullname)
+        except (ImportError, ValueError):
+            return None
+        finally:
+            self._resolving.discard(fullname)
+        loader = getattr(spec, 'loader', None) if spec else None
+        exec_module = getattr(loader, 'exec_module', None)
+        if exec_module is None:
+            return spec
+        report = self.report
+
+        def timed_exec_module(module):
+            with report.track('import', fullname):
+                exec_module(module)
+
+        loader.exec_module = timed_exec_module
+        return spec
+
+
+startup_report = StartupReport()
+metrics.register_collector(startup_report.collect_metrics)
+_import_timer = None
+
+
+def install_import_timer() -> None:
+    """
+    安装导入计时钩子(需在导入其他项目模块之前调用, STARTUP_REPORT=0 时不安装)
+    """
+    global _import_timer
+    if _import_timer is not None or os.getenv('STARTUP_REPORT', '1') == '0':
+        return
+    _import_timer = _ImportTimer(startup_report)
+    sys.meta_path.insert(0, _import_timer)
@@ -1,7 +1,31 @@
 import re
+import time
 import unicodedata
-import jieba #中文分词
 import string
+from typing import Any, Callable, Dict, List, NamedTuple, Sequence
+
+from source.utils.jieba_cache import get_jieba
+from source.utils.metrics import timed
+
+# 预编译正则
+SPECIAL_CHAR_PATTERN = re.compile(r'[®™©◆△▲◇○●\u2002-\u200f\u2028-\u202f]')
+WHITESPACE_PATTERN = re.compile(r'\s+')
+EMAIL_PATTERN = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')
+PHONE_PATTERN = re.compile(r'(13[0-9]|14[01456879]|15[0-35-9]|16[2567]|17[0-8]|18[0-9]|19[0-35-9])\d{8}')
+NON_WORD_PATTERN = re.compile(r'[^\w\s]')
+
+# 停用词(不可变集合,只构建一次)
+STOPWORDS = {
+    'zh': frozenset({
+        '的', '了', '和', '是', '就', '都', '而', '及', '与',
+        '很', '可以', '因为', '但是', '所以', '并', '或者'
+    }),
+    'en': frozenset({
+        'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at',
+        'to', 'for', 'of', 'with', 'by', 'from', 'up', 'down'
+    }),
+}
+ENGLISH_PUNCTUATION = frozenset(string.punctuation)
 
 class TextCleaner:
     @staticmethod
@@ -21,9 +45,9 @@ class TextCleaner:
         #统一编码和标准化
         text = unicodedata.normalize('NFKC',text)
         # 去除特殊符号和无效字符
-        text = re.sub(r'[®™©◆△▲◇○●\u2002-\u200f\u2028-\u202f]', '', text)
+        text = SPECIAL_CHAR_PATTERN.sub('', text)
         # 去除多余空白
-        text = re.sub(r'\s+', ' ', text).strip()
+        text = WHITESPACE_PATTERN.sub(' ', text).strip()
         return text
 
     @staticmethod
@@ -31,12 +55,8 @@ class TextCleaner:
         """
         移除敏感信息
         """
-        # 邮箱正则
-        email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-        # 电话号码正则
-        phone_pattern = r'(13[0-9]|14[01456879]|15[0-35-9]|16[2567]|17[0-8]|18[0-9]|19[0-35-9])\d{8}'
-        text = re.sub(email_pattern, '[EMAIL]', text)
-        text = re.sub(phone_pattern, '[PHONE]', text)
+        text = EMAIL_PATTERN.sub('[EMAIL]', text)
+        text = PHONE_PATTERN.sub('[PHONE]', text)
         return text
 
     @staticmethod
@@ -57,11 +77,10 @@ class TextCleaner:
 
         if keep_chinese_punctuation:
             # 仅去除英文标点
-            punct_set = string.punctuation
-            return ''.join(char for char in text if char not in punct_set)
+            return ''.join(char for char in text if char not in ENGLISH_PUNCTUATION)
         else:
             # 去除所有标点
-            return re.sub(r'[^\w\s]', '', text)
+            return NON_WORD_PATTERN.sub('', text)
 
     @staticmethod
     def segment_text(text: str, use_jieba: bool = True) -> list:
@@ -72,7 +91,7 @@ class TextCleaner:
         :return: 分词结果
         """
         if use_jieba:
-            return list(jieba.cut(text))
+            return list(get_jieba().cut(text))
         else:
             return text.split()
 
@@ -84,34 +103,83 @@ class TextCleaner:
         :param language: 语言(zh/en)
         :return: 去除停用词后的列表
         """
-        stopwords = set()
-        # 中文停用词
-        if language == 'zh':
-            stopwords = {
-                '的', '了', '和', '是', '就', '都', '而', '及', '与',
-                '很', '可以', '因为', '但是', '所以', '并', '或者'
-            }
-
-        # 英文停用词
-        elif language == 'en':
-            stopwords = {
-                'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at',
-                'to', 'for', 'of', 'with', 'by', 'from', 'up', 'down'
-            }
+        stopwords = STOPWORDS.get(language, frozenset())
         return [word for word in words if word not in stopwords]
 
 
+class Stage(NamedTuple):
+    name: str
+    func: Callable[..., Any]
+    inputs: Sequence[str]
+
+
+# 简历文本处理流程: 各阶段预先声明,只有被请求时才计算
+RESUME_TEXT_STAGES = [
+    Stage('cleaned_text', TextCleaner.clean_text, ('raw_text',)),
+    Stage('safe_text', TextCleaner.remove_email_and_phone, ('cleaned_text',)),
+    Stage('words', TextCleaner.segment_text, ('safe_text',)),
+    Stage('filtered_words', TextCleaner.remove_stopwords, ('words',)),
+]
+
+
+class PipelineResult:
+    def __init__(self, pipeline: 'TextPipeline', raw_text: str):
+        """
+        流程的惰性结果: 访问某阶段时才计算它及其依赖,结果缓存
+        """
+        self._pipeline = pipeline
+        self._values: Dict[str, Any] = {'raw_text': raw_text}
+        # 各阶段耗时(秒)
+        self.timings: Dict[str, float] = {}
+
+    def __getitem__(self, name: str) -> Any:
+        if name in self._values:
+            return self._values[name]
+        stage = self._pipeline.stages.get(name)
+        if stage is None:
+            raise KeyError(f"Unknown pipeline stage: {name}")
+        args = [self[input_name] for input_name in stage.inputs]
+        start = time.perf_counter()
+        value = stage.func(*args)
+        self.timings[name] = time.perf_counter() - start
+        self._values[name] = value
+        return value
+
+    def computed(self) -> List[str]:
+        """
+        已计算的阶段
+        """
+        return [name for name in self._values if name != 'raw_text']
+
+
+class TextPipeline:
+    def __init__(self, stages: Sequence[Stage]):
+        """
+        声明式文本处理流程
+        :param stages: 阶段列表,每个阶段声明名称、处理函数和输入阶段
+        """
+        self.stages: Dict[str, Stage] = {}
+        for stage in stages:
+            for input_name in stage.inputs:
+                if input_name != 'raw_text' and input_name not in self.stages:
+                    raise ValueError(f"Stage {stage.name} depends on undeclared stage {input_name}")
+            self.stages[stage.name] = stage
+
+    def run(self, raw_text: str) -> PipelineResult:
+        """
+        创建惰性结果,不立即执行任何阶段
+        """
+        return PipelineResult(self, raw_text)
+
+
+resume_text_pipeline = TextPipeline(RESUME_TEXT_STAGES)
+
+
 # 使用示例
+@timed('clean_text')
 def process_resume_text(raw_text: str) -> str:
     """
     简历文本处理流程
+    只计算清洗和脱敏阶段,分词/停用词阶段由需要的调用方按需请求
     """
-    # 清洗文本
-    cleaned_text = TextCleaner.clean_text(raw_text)
-    # 移除敏感信息
-    safe_text = TextCleaner.remove_email_and_phone(cleaned_text)
-    # 分词
-    words = TextCleaner.segment_text(safe_text)
-    # 去除停用词
-    filtered_words = TextCleaner.remove_stopwords(words)
-    return safe_text
\ No newline at end of file
+    return resume_text_pipeline.run(raw_text)['safe_text']
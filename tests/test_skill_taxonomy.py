@@ -0,0 +1,13 @@
+from source.services.skill_taxonomy import SkillTaxonomy, get_skill_taxonomy_path
+
+
+def test_go_name_is_case_sensitive():
+    taxonomy = SkillTaxonomy.load(get_skill_taxonomy_path())
+    assert taxonomy.extract('熟悉 Go 语言') == ['Go']
+    assert taxonomy.extract("let's go home") == []
+
+
+def test_golang_alias_ignores_case():
+    taxonomy = SkillTaxonomy.load(get_skill_taxonomy_path())
+    assert taxonomy.extract('熟悉 Golang 并发编程') == ['Go']
+    assert taxonomy.extract('GOLANG / golang') == ['Go']